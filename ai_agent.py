@@ -25,6 +25,9 @@ from models import (
     PersonaState,
 )
 from logging_config import get_logger, log_with_context
+from text_normalizer import MessageText, normalize
+from lazy_singleton import LazySingleton
+from pattern_registry import pattern_registry
 import logging
 
 logger = get_logger("honeypot.ai_agent")
@@ -75,6 +78,61 @@ FALLBACK_MODELS = [
 MODEL_FAILURE_COUNT: Dict[str, int] = {}
 MAX_FAILURES_BEFORE_SKIP = 3  # Skip model if it fails this many times in a row
 
+# Call/voice phrasing rewritten to message-only wording, applied in order
+_CHANNEL_REWRITES = [
+    (pattern_registry.compile(f"agent.channel_rewrite.{i}", pattern, re.IGNORECASE), repl)
+    for i, (pattern, repl) in enumerate([
+        (r"\bvideo\s*call\b", "video message"),
+        (r"\bvoice\s*call\b", "text message"),
+        (r"\bvoice\s*note\b", "text message"),
+        (r"\bcall\s+me\b", "message me"),
+        (r"\bcall\s+karo\b", "message karo"),
+        (r"\bcall\s+kijiye\b", "message kijiye"),
+        (r"\bcall\s+karke\b", "message karke"),
+        (r"\bcall\s+kar\b", "message kar"),
+        (r"\bphone\s+call\b", "message"),
+        (r"\bcall\b(?=\s+\d)", "message"),
+        (r"\bphir\s+se\s+boliye\b", "phir se likhiye"),
+        (r"\bphir\s+se\s+bolo\b", "phir se likho"),
+        (r"\bbol\s+rahe\s+ho\b", "likh rahe ho"),
+        (r"\bbol\s+rahe\s+hain\b", "likh rahe hain"),
+        # Common "voice/awaaz" phrases (within 100 chars; an unbounded .*? rescans the line per "awaaz")
+        (r"\bawaaz\b.{0,100}?\b(aa\s+rahi|aa\s+raha|sunai|samajh)\b", "message clear nahi aa raha"),
+        (r"\bawaaz\b.{0,100}?\b(kat|cut|break|nahi)\b", "message nahi ja raha"),
+        (r"\bsunai\b.{0,100}?\b(nahi|kam|clear)\b", "message clear nahi aa raha"),
+        (r"\bvoice\b.{0,100}?\b(break|cut|nahi)\b", "message nahi ja raha"),
+        (r"\bawaaz\b", "message"),
+    ])
+]
+_TYPO_SKIP_PATTERN = pattern_registry.compile("agent.typo_skip", r"[\d@:/]")
+_TYPO_WORD_PATTERN = pattern_registry.compile(
+    "agent.typo_word", r"^([\"'\(\[\{]*)([A-Za-z]{3,})([\"'\)\]\}\.,!?;:]*)$"
+)
+_TRAILING_PUNCT_PATTERN = pattern_registry.compile("agent.trailing_punct", r"[.!?]\s*$")
+# Chain-of-thought blocks and stage directions removed from replies, in order
+_RESPONSE_CLEANUP_SPANS = [("<think>", "</think>"), ("<thinking>", "</thinking>"), ("(", ")")]
+_SENTENCE_SPLIT_PATTERN = pattern_registry.compile("agent.sentence_split", r'(?<=[.!?])\s+')
+
+
+def strip_enclosed(text: str, opener: str, closer: str) -> str:
+    """
+    Remove each opener..closer span, like re.sub(opener + ".*?" + closer, "", text)
+    but in one pass: with no closer left, no later opener can match either.
+    """
+    parts = []
+    pos = 0
+    while True:
+        start = text.find(opener, pos)
+        if start == -1:
+            break
+        end = text.find(closer, start + len(opener))
+        if end == -1:
+            break
+        parts.append(text[pos:start])
+        pos = end + len(closer)
+    parts.append(text[pos:])
+    return "".join(parts)
+
 
 class HoneypotAgent:
     """
@@ -400,11 +458,11 @@ class HoneypotAgent:
             word = words[idx]
 
             # Skip words with digits/symbols to avoid corrupting IDs
-            if re.search(r"[\d@:/]", word):
+            if _TYPO_SKIP_PATTERN.search(word):
                 continue
 
             # Split punctuation
-            m = re.match(r"^([\"'\(\[\{]*)([A-Za-z]{3,})([\"'\)\]\}\.,!?;:]*)$", word)
+            m = _TYPO_WORD_PATTERN.match(word)
             if not m:
                 continue
             prefix, core, suffix = m.group(1), m.group(2), m.group(3)
@@ -415,7 +473,7 @@ class HoneypotAgent:
         # Occasionally drop ending punctuation
         if random.random() < 0.2:
             text = " ".join(words)
-            text = re.sub(r"[.!?]\s*$", "", text)
+            text = _TRAILING_PUNCT_PATTERN.sub("", text)
             return text
 
         return " ".join(words)
@@ -444,33 +502,9 @@ class HoneypotAgent:
         if not text:
             return text
 
-        replacements = [
-            (r"\bvideo\s*call\b", "video message"),
-            (r"\bvoice\s*call\b", "text message"),
-            (r"\bvoice\s*note\b", "text message"),
-            (r"\bcall\s+me\b", "message me"),
-            (r"\bcall\s+karo\b", "message karo"),
-            (r"\bcall\s+kijiye\b", "message kijiye"),
-            (r"\bcall\s+karke\b", "message karke"),
-            (r"\bcall\s+kar\b", "message kar"),
-            (r"\bphone\s+call\b", "message"),
-            (r"\bcall\b(?=\s+\d)", "message"),
-            (r"\bphir\s+se\s+boliye\b", "phir se likhiye"),
-            (r"\bphir\s+se\s+bolo\b", "phir se likho"),
-            (r"\bbol\s+rahe\s+ho\b", "likh rahe ho"),
-            (r"\bbol\s+rahe\s+hain\b", "likh rahe hain"),
-        ]
-
         out = text
-        for pattern, repl in replacements:
-            out = re.sub(pattern, repl, out, flags=re.IGNORECASE)
-
-        # Replace common "voice/awaaz" phrases with message-only phrasing
-        out = re.sub(r"\bawaaz\b.*?\b(aa\s+rahi|aa\s+raha|sunai|samajh)\b", "message clear nahi aa raha", out, flags=re.IGNORECASE)
-        out = re.sub(r"\bawaaz\b.*?\b(kat|cut|break|nahi)\b", "message nahi ja raha", out, flags=re.IGNORECASE)
-        out = re.sub(r"\bsunai\b.*?\b(nahi|kam|clear)\b", "message clear nahi aa raha", out, flags=re.IGNORECASE)
-        out = re.sub(r"\bvoice\b.*?\b(break|cut|nahi)\b", "message nahi ja raha", out, flags=re.IGNORECASE)
-        out = re.sub(r"\bawaaz\b", "message", out, flags=re.IGNORECASE)
+        for pattern, repl in _CHANNEL_REWRITES:
+            out = pattern.sub(repl, out)
 
         return out
     
@@ -674,9 +708,9 @@ If you have <8 Hindi words: REWRITE AND ADD MORE BEFORE SUBMITTING.
                 return False, f"AI disclosure detected"
         
         # Clean up response - remove thinking tags from chain-of-thought models
-        response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-        response = re.sub(r'<thinking>.*?</thinking>', '', response, flags=re.DOTALL)
-        response = re.sub(r'\([^)]*\)', '', response).strip()
+        for opener, closer in _RESPONSE_CLEANUP_SPANS:
+            response = strip_enclosed(response, opener, closer)
+        response = response.strip()
         response = response.strip('"\'')
 
         response = ' '.join(response.split())
@@ -687,7 +721,7 @@ If you have <8 Hindi words: REWRITE AND ADD MORE BEFORE SUBMITTING.
         
         # Truncate if too long (>200 chars)
         if len(response) > 200:
-            sentences = re.split(r'(?<=[.!?])\s+', response)
+            sentences = _SENTENCE_SPLIT_PATTERN.split(response)
             truncated = ""
             for sent in sentences:
                 if len(truncated) + len(sent) + 1 <= 180:
@@ -1381,9 +1415,9 @@ Reply with exactly ONE word:
                     
         return text
 
-    def update_persona_emotion(self, session: SessionState, scammer_message: str):
+    def update_persona_emotion(self, session: SessionState, scammer_message: MessageText):
         """Update persona's emotional state based on scammer's tone and message content"""
-        text_lower = scammer_message.lower()
+        text_lower = normalize(scammer_message).lower
         
         # 1. Trust Logic
         if any(word in text_lower for word in ['trust me', 'official', 'genuine', 'verified', 'guaranteed']):
@@ -1413,5 +1447,5 @@ Reply with exactly ONE word:
         logger.info("Model failure counts reset")
 
 
-# Create singleton instance
-reasoning_agent = HoneypotAgent()
+# Create singleton instance (built on first use)
+reasoning_agent = LazySingleton(HoneypotAgent)
@@ -0,0 +1,317 @@
+"""
+Background Model Training
+Training jobs run in a child process and hot-swap the new model into the live
+detector, so neither startup nor /api/train blocks the event loop. With several
+API workers, a file lock lets one of them train at a time, the running job's
+status is shared through a file, and every worker reloads a newly saved artifact.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, one worker is assumed
+    fcntl = None
+
+import scam_detector
+from config import BACKGROUND_TRAINING_CONFIG
+from model_artifacts import read_manifest, write_json
+from scam_detector import ScamDetector, detector
+from logging_config import get_logger
+
+logger = get_logger("honeypot.background_trainer")
+
+
+def _shared_path(suffix: str) -> str:
+    """File next to the model artifact shared by every worker (read per call: tests patch MODEL_PATH)"""
+    return os.path.splitext(scam_detector.MODEL_PATH)[0] + suffix
+
+
+def _try_lock(path: str) -> Optional[IO]:
+    """Open file holding an exclusive lock on path, or None if another process holds it"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(path, "a")
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def _train_in_child(dataset_paths: Optional[List[str]], streaming: Optional[bool]) -> None:
+    """Child process entry point: train and save a versioned artifact; the exit code reports success"""
+    from scam_detector import detector as child_detector
+    accuracy = child_detector.train_model(dataset_paths, streaming=streaming)
+    sys.exit(0 if accuracy is not None else 1)
+
+
+class TrainingJob:
+    """One background training run and its outcome"""
+
+    def __init__(self, dataset_paths: Optional[List[str]], streaming: Optional[bool]):
+        self.id = uuid.uuid4().hex[:12]
+        self.dataset_paths = dataset_paths
+        self.streaming = streaming
+        self.state = "running"  # running | succeeded | failed | cancelled
+        # training (child process) -> loading (artifact load + compile) -> swapped
+        self.phase = "training"
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.pid: Optional[int] = None
+        self.metrics: Dict[str, Any] = {}
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrainingJob":
+        """A job published by another worker (see BackgroundTrainer.get_job)"""
+        job = cls(None, None)
+        job.id = data["jobId"]
+        job.state, job.phase = data["state"], data["phase"]
+        job.started_at = datetime.fromisoformat(data["startedAt"])
+        job.finished_at = datetime.fromisoformat(data["finishedAt"]) if data.get("finishedAt") else None
+        job.error, job.metrics = data.get("error"), data.get("metrics") or {}
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "state": self.state,
+            "phase": self.phase,
+            "startedAt": self.started_at.isoformat(),
+            "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsedSeconds": round(self.elapsed_seconds, 1),
+            "error": self.error,
+            "metrics": self.metrics,
+        }
+
+
+class BackgroundTrainer:
+    """
+    Runs ScamDetector.train_model() as jobs in a child process.
+
+    The child writes a new model artifact (see model_artifacts.py). When it exits
+    cleanly the artifact is loaded and compiled in a thread, then made live with
+    ScamDetector.install_model(), a single reference assignment, so in-flight
+    detections see either the old (vectorizer, model) pair or the new one.
+    Swap listeners run after each successful swap (e.g. clearing cached verdicts).
+    One job runs at a time across all workers sharing the model directory (a lock
+    file held for the job's duration); the last max_jobs_kept local jobs and the
+    latest job of any worker stay queryable. watch_artifacts() installs models
+    that another worker (or an offline trainer) saved.
+    """
+
+    def __init__(
+        self,
+        target: Optional[ScamDetector] = None,
+        start_method: str = BACKGROUND_TRAINING_CONFIG["start_method"],
+        poll_interval_seconds: float = BACKGROUND_TRAINING_CONFIG["poll_interval_seconds"],
+        max_jobs_kept: int = BACKGROUND_TRAINING_CONFIG["max_jobs_kept"],
+        artifact_poll_seconds: float = BACKGROUND_TRAINING_CONFIG["artifact_poll_seconds"]
+    ):
+        self.detector = target or detector
+        self.start_method = start_method
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_jobs_kept = max(1, max_jobs_kept)
+        self.artifact_poll_seconds = artifact_poll_seconds
+
+        self.jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+        self.current_job: Optional[TrainingJob] = None
+
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
+        self._lock: Optional[IO] = None
+        self._skipped_version: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_swap_listener(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run after a new model goes live"""
+        self._listeners.append(callback)
+
+    def _shared_job(self) -> Optional[Dict[str, Any]]:
+        """Latest job published by any worker"""
+        try:
+            with open(_shared_path(".training.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _publish(self, job: TrainingJob) -> None:
+        try:
+            write_json(job.to_dict(), _shared_path(".training.json"))
+        except OSError as e:
+            logger.warning(f"Could not publish training job {job.id}: {e}")
+
+    def get_job(self, job_id: str) -> Optional[TrainingJob]:
+        """A local job, or the latest job when another worker started it"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            shared = self._shared_job()
+            if shared is not None and shared.get("jobId") == job_id:
+                job = TrainingJob.from_dict(shared)
+        return job
+
+    def active_job_id(self) -> Optional[str]:
+        """Id of the job running in this or another worker"""
+        if self.running:
+            return self.current_job.id
+        shared = self._shared_job()
+        return shared["jobId"] if shared and shared.get("state") == "running" else None
+
+    def start(self, dataset_paths: Optional[List[str]] = None, streaming: Optional[bool] = None) -> Optional[TrainingJob]:
+        """
+        Start a training job (must be called from the event loop); None if one is
+        already running here or in another worker
+        """
+        if self.running:
+            return None
+        lock = _try_lock(_shared_path(".training.lock"))
+        if lock is None:
+            return None
+        self._lock = lock
+
+        context = multiprocessing.get_context(self.start_method)
+        process = context.Process(
+            target=_train_in_child,
+            args=(dataset_paths, streaming),
+            name="honeypot-trainer",
+            daemon=True,
+        )
+        job = TrainingJob(dataset_paths, streaming)
+        try:
+            process.start()
+        except Exception:
+            self._release_lock()
+            raise
+        job.pid = process.pid
+        self._publish(job)
+
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs_kept:
+            self.jobs.popitem(last=False)
+        self.current_job = job
+        self._process = process
+        self._task = asyncio.get_running_loop().create_task(self._watch(job, process))
+        logger.info(f"Training job {job.id} started (pid {process.pid})")
+        return job
+
+    async def _watch(self, job: TrainingJob, process: multiprocessing.process.BaseProcess) -> None:
+        try:
+            while process.is_alive():
+                await asyncio.sleep(self.poll_interval_seconds)
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"training process exited with code {process.exitcode}")
+
+            job.phase = "loading"
+            bundle = await asyncio.to_thread(self.detector.load_model_artifact)
+            if bundle is None:
+                raise RuntimeError("training finished without writing a model artifact")
+            self.detector.install_model(bundle)
+            job.phase = "swapped"
+            job.state = "succeeded"
+            job.metrics = {
+                "accuracy": bundle.manifest.get("accuracy"),
+                "trainer": bundle.manifest.get("trainer"),
+                "modelVersion": self.detector.model_version,
+                "modelGeneration": self.detector.live_model.generation,
+            }
+            logger.info(f"Training job {job.id} finished, model {self.detector.model_version} hot-swapped in")
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            logger.error(f"Training job {job.id} failed: {e}")
+            return
+        finally:
+            job.finished_at = datetime.now()
+            self._publish(job)
+            self._release_lock()
+
+        self._notify_swap()
+
+    def _notify_swap(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Model swap listener failed: {e}")
+
+    def _release_lock(self) -> None:
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    async def reload_if_changed(self) -> bool:
+        """Install the saved artifact if its version differs from the live model's"""
+        if self.running:
+            return False  # Our own job installs what it saves
+        manifest = await asyncio.to_thread(read_manifest, scam_detector.MODEL_PATH)
+        version = manifest.get("version") if manifest else None
+        if version is None or version in (self.detector.model_version, self._skipped_version):
+            return False
+        try:
+            bundle = await asyncio.to_thread(self.detector.load_model_artifact)
+        except Exception as e:
+            # Probably caught mid-save; a version that stays broken is not retried
+            logger.warning(f"Could not load model artifact {version}: {e}")
+            self._skipped_version = version
+            return False
+        if bundle is None or bundle.manifest.get("version") == self.detector.model_version:
+            return False
+        self.detector.install_model(bundle)
+        logger.info(f"Model {self.detector.model_version} saved by another process, hot-swapped in")
+        self._notify_swap()
+        return True
+
+    async def watch_artifacts(self) -> None:
+        """Poll the saved manifest and hot-swap in models other workers or trainers save"""
+        while True:
+            await asyncio.sleep(self.artifact_poll_seconds)
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                logger.warning(f"Model artifact check failed: {e}")
+
+    async def wait(self) -> None:
+        """Wait for the current training job, if any, to finish"""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def shutdown(self) -> None:
+        """Stop watching and kill the training process"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+            logger.info("Background training process terminated")
+        self._release_lock()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Latest job for the health endpoint"""
+        if self.current_job is None:
+            return {"state": "idle"}
+        return self.current_job.to_dict()
+
+
+# Global instance
+background_trainer = BackgroundTrainer()
@@ -0,0 +1,94 @@
+"""
+RULE SCORING MICROBENCHMARK
+Compares the legacy per-family keyword loops against the Aho-Corasick automaton
+used by ScamDetector._rule_based_score, and checks both produce identical output.
+
+Usage: python benchmark_rule_scoring.py [num_messages]
+"""
+import random
+import sys
+import time
+
+from scam_detector import ScamDetector
+
+# --- CONFIGURATION ---
+NUM_MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+REPEATS = 3
+SEED = 42
+
+FILLER_WORDS = [
+    "hello", "sir", "madam", "please", "kindly", "your", "the", "account", "we",
+    "have", "noticed", "regarding", "thanks", "dear", "customer", "ji", "aap",
+    "kya", "hai", "main", "from", "office", "team", "message", "information",
+]
+
+
+def legacy_keyword_score(detector: ScamDetector, text_lower: str):
+    """The pre-automaton implementation: one substring scan per keyword"""
+    score = 0.0
+    detected = []
+    for keywords, weight, prefix in detector._keyword_families():
+        for keyword in keywords:
+            if keyword.lower() in text_lower:
+                score += weight
+                detected.append(f"{prefix}{keyword}")
+    return score, detected
+
+
+def automaton_keyword_score(detector: ScamDetector, text_lower: str):
+    """Single-pass automaton implementation"""
+    score = 0.0
+    detected = []
+    automaton = detector.keyword_automaton
+    for entry_id in sorted(automaton.matched_ids(text_lower)):
+        weight, tag = automaton.payloads[entry_id]
+        score += weight
+        detected.append(tag)
+    return score, detected
+
+
+def generate_corpus(detector: ScamDetector, n: int):
+    """Generate messages mixing filler words with 0-6 random scam keywords"""
+    rng = random.Random(SEED)
+    vocabulary = [kw for keywords, _, _ in detector._keyword_families() for kw in keywords]
+    corpus = []
+    for _ in range(n):
+        words = rng.choices(FILLER_WORDS, k=rng.randint(8, 40))
+        for kw in rng.sample(vocabulary, rng.randint(0, 6)):
+            words.insert(rng.randint(0, len(words)), kw)
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def time_it(fn, detector, corpus):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(detector, text.lower())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    detector = ScamDetector()
+    corpus = generate_corpus(detector, NUM_MESSAGES)
+    avg_len = sum(len(t) for t in corpus) / len(corpus)
+
+    mismatches = sum(
+        1 for text in corpus
+        if legacy_keyword_score(detector, text.lower()) != automaton_keyword_score(detector, text.lower())
+    )
+
+    legacy = time_it(legacy_keyword_score, detector, corpus)
+    automaton = time_it(automaton_keyword_score, detector, corpus)
+
+    print(f"Keywords: {len(detector.keyword_automaton)} | Messages: {len(corpus)} | Avg length: {avg_len:.0f} chars")
+    print(f"Legacy loops : {legacy * 1e6 / len(corpus):8.1f} us/msg")
+    print(f"Automaton    : {automaton * 1e6 / len(corpus):8.1f} us/msg")
+    print(f"Speedup      : {legacy / automaton:8.2f}x")
+    print(f"Mismatches   : {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
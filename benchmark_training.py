@@ -0,0 +1,101 @@
+"""
+TRAINING MEMORY/TIME BENCHMARK
+Runs the in-memory trainer (TF-IDF + GradientBoosting) and the streaming trainer
+(HashingVectorizer + SGD partial_fit) in separate processes and reports wall
+time, peak RSS and holdout accuracy for each.
+
+Usage: python benchmark_training.py [dataset.csv ...]
+       (with no datasets, or none found, a synthetic CSV of SYNTHETIC_ROWS rows is generated)
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+# --- CONFIGURATION ---
+SYNTHETIC_ROWS = int(os.getenv("BENCH_SYNTHETIC_ROWS", "100000"))
+SEED = 42
+
+CHILD_SCRIPT = """
+import json, logging, os, resource, sys, time
+logging.disable(logging.CRITICAL)
+import scam_detector as sd
+
+out_dir = sys.argv[2]
+sd.MODEL_PATH = os.path.join(out_dir, "model.joblib")
+sd.VECTORIZER_PATH = os.path.join(out_dir, "vectorizer.joblib")
+sd.COMPILED_MODEL_PATH = os.path.join(out_dir, "trees.joblib")
+
+detector = sd.ScamDetector()
+start = time.perf_counter()
+accuracy = detector.train_model(sys.argv[3:], streaming=sys.argv[1] == "streaming")
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "accuracy": accuracy,
+}))
+"""
+
+SCAM_TEMPLATES = [
+    "urgent your {bank} account will be blocked share otp {n} now",
+    "congratulations you won rs {n} lottery pay processing fee to claim",
+    "dear customer kyc pending update via http://{word}.xyz/{n} immediately",
+    "this is cbi officer {word} a parcel with drugs in your name pay {n} to avoid arrest",
+    "earn {n} daily by liking youtube videos contact {word} on telegram",
+]
+LEGIT_TEMPLATES = [
+    "hi {word} are we still on for lunch at {n}",
+    "your order {n} has been shipped and will arrive tomorrow",
+    "meeting moved to {n} pm please update the {word} notes",
+    "rs {n} credited to your account ref {word}",
+    "happy birthday {word} have a great year",
+]
+WORDS = ["sbi", "hdfc", "icici", "rahul", "priya", "alpha", "delta", "mumbai", "pune", "team", "report"]
+
+
+def generate_dataset(path: str, rows: int) -> None:
+    """Write a synthetic message_text,label CSV"""
+    import pandas as pd
+
+    rng = random.Random(SEED)
+    data = []
+    for _ in range(rows):
+        is_scam = rng.random() < 0.5
+        template = rng.choice(SCAM_TEMPLATES if is_scam else LEGIT_TEMPLATES)
+        text = template.format(bank=rng.choice(WORDS[:3]), word=rng.choice(WORDS), n=rng.randint(1, 99999))
+        data.append((text, "scam" if is_scam else "legitimate"))
+    pd.DataFrame(data, columns=["message_text", "label"]).to_csv(path, index=False)
+
+
+def run_trainer(mode: str, dataset_paths, out_dir: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, mode, out_dir, *dataset_paths],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} trainer failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    dataset_paths = [p for p in sys.argv[1:] if os.path.exists(p)]
+    with tempfile.TemporaryDirectory() as tmp:
+        if not dataset_paths:
+            synthetic = os.path.join(tmp, "synthetic.csv")
+            generate_dataset(synthetic, SYNTHETIC_ROWS)
+            dataset_paths = [synthetic]
+            print(f"Generated synthetic dataset: {SYNTHETIC_ROWS} rows")
+
+        print(f"{'Trainer':10s} {'Wall time':>10s} {'Peak RSS':>10s} {'Accuracy':>9s}")
+        for mode in ("batch", "streaming"):
+            out_dir = os.path.join(tmp, mode)
+            os.makedirs(out_dir)
+            stats = run_trainer(mode, dataset_paths, out_dir)
+            accuracy = f"{stats['accuracy']:.2%}" if stats["accuracy"] is not None else "n/a"
+            print(f"{mode:10s} {stats['seconds']:9.1f}s {stats['peak_rss_mb']:8.0f}MB {accuracy:>9s}")
+
+
+if __name__ == "__main__":
+    main()
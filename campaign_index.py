@@ -0,0 +1,297 @@
+"""
+Near-Duplicate Campaign Index
+MinHash signatures of recently classified messages in a banded LSH index, so a
+reused scam template (new UPI, amount or name) is recognised as the same campaign
+and a high-confidence verdict can be reused without running ML or the LLM
+"""
+import hashlib
+import string
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from config import CAMPAIGN_INDEX_CONFIG
+from detection_cache import copy_result
+from logging_config import get_logger
+from pattern_registry import pattern_registry
+from text_normalizer import MessageText, normalize
+
+logger = get_logger("honeypot.campaign_index")
+
+_DIGIT_PATTERN = pattern_registry.compile("campaign.digit", r"\d")
+# Stripped from token edges; "@" stays so identifiers are still recognised
+_EDGE_PUNCTUATION = string.punctuation.replace("@", "").replace("_", "") + "\u201c\u201d\u2018\u2019\u2026\u2013\u2014\u20b9"
+
+# Fixed seed: signatures (and campaign ids) must match across processes and restarts
+_SEED = 0x5CA3
+
+
+def mask_tokens(text: MessageText) -> List[str]:
+    """
+    Canonical tokens with the parts scammers vary masked out:
+    URLs -> <url>, anything with an @ (UPI, email, handle) -> <id>,
+    anything with a digit (amount, phone, account, reference) -> <num>
+    """
+    tokens = []
+    for token in normalize(text).canonical.split():
+        if "://" in token or token.startswith("www."):
+            tokens.append("<url>")
+            continue
+        token = token.strip(_EDGE_PUNCTUATION)
+        if not token:
+            continue
+        if "@" in token:
+            tokens.append("<id>")
+        elif _DIGIT_PATTERN.search(token):
+            tokens.append("<num>")
+        else:
+            tokens.append(token)
+    return tokens
+
+
+@lru_cache(maxsize=50000)
+def _feature_hash(feature: str) -> int:
+    # blake2b rather than hash(), which changes with PYTHONHASHSEED
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """num_perm hash functions h -> a*h + b (mod 2^64) over unigram and bigram features"""
+
+    def __init__(self, num_perm: int = CAMPAIGN_INDEX_CONFIG["num_perm"]):
+        rng = np.random.default_rng(_SEED)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: List[str]) -> np.ndarray:
+        features = set(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        hashes = np.fromiter((_feature_hash(f) for f in features), dtype=np.uint64, count=len(features))
+        # uint64 array arithmetic wraps, which is the mod 2^64 we want
+        return (np.outer(hashes, self._a) + self._b).min(axis=0)
+
+
+class CampaignMatch(NamedTuple):
+    """Result of CampaignIndex.lookup for one message"""
+    signature: Optional[np.ndarray]     # None when the message is too short to fingerprint
+    campaign_id: Optional[str]          # Campaign of the most similar indexed message, if any
+    verdict: Optional[Tuple]            # Copy of a reusable detect() verdict, if any
+
+
+class _Entry:
+    __slots__ = ("signature", "campaign_id", "stored_at", "verdict")
+
+    def __init__(self, signature: np.ndarray, campaign_id: str, verdict: Optional[Tuple]):
+        self.signature = signature
+        self.campaign_id = campaign_id
+        self.stored_at = time.monotonic()
+        self.verdict = verdict
+
+
+class CampaignIndex:
+    """
+    Banded LSH index of MinHash signatures.
+
+    A signature is split into `bands` bands; messages sharing any whole band
+    become candidates, and a candidate is a near-duplicate when the fraction of
+    equal signature values (the Jaccard estimate) reaches min_similarity. With
+    16 bands of 4 rows, pairs at similarity 0.75 are found with probability
+    > 0.99 (0.6: ~0.89) and pairs at 0.3 are compared only ~12% of the time.
+    Entries are LRU+TTL bounded like DetectionCache; expired ones are purged
+    before each lookup, record and stats read. Every fingerprinted message
+    joins the campaign of its most similar neighbour (or founds one); only
+    confident scam verdicts the detector itself produced for a message without
+    conversation context are kept for reuse, and only such messages reuse them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CAMPAIGN_INDEX_CONFIG["max_entries"],
+        ttl_seconds: float = CAMPAIGN_INDEX_CONFIG["ttl_seconds"],
+        num_perm: int = CAMPAIGN_INDEX_CONFIG["num_perm"],
+        bands: int = CAMPAIGN_INDEX_CONFIG["bands"],
+        min_similarity: float = CAMPAIGN_INDEX_CONFIG["min_similarity"],
+        min_tokens: int = CAMPAIGN_INDEX_CONFIG["min_tokens"],
+        reuse_min_confidence: float = CAMPAIGN_INDEX_CONFIG["reuse_min_confidence"],
+        enabled: bool = CAMPAIGN_INDEX_CONFIG["enabled"]
+    ):
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_similarity = min_similarity
+        self.min_tokens = min_tokens
+        self.reuse_min_confidence = reuse_min_confidence
+        self.enabled = enabled and max_entries > 0
+
+        self._entries: "OrderedDict[bytes, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[bytes]] = {}
+        # campaign id -> [indexed entries, messages seen, scam type]
+        self._campaigns: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.near_duplicates = 0
+        self.verdict_reuses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def signature(self, text: MessageText) -> Optional[np.ndarray]:
+        """MinHash of the masked tokens, or None for messages under min_tokens"""
+        tokens = mask_tokens(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        return self.hasher.signature(tokens)
+
+    def _most_similar(self, signature: np.ndarray) -> Optional[_Entry]:
+        """Most similar entry at or above min_similarity (caller holds the lock and has purged)"""
+        candidates: Set[bytes] = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best, best_similarity = None, self.min_similarity
+        for key in candidates:
+            entry = self._entries[key]
+            similarity = float(np.mean(entry.signature == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        return best
+
+    def lookup(self, text: MessageText, context: Optional[Sequence[str]] = None) -> CampaignMatch:
+        """
+        Most similar indexed campaign for a message, with its verdict if that can be
+        reused: stored verdicts ignore conversation context, so a message with
+        context gets none. Call record_reuse() when the verdict is actually used.
+        """
+        if not self.enabled:
+            return CampaignMatch(None, None, None)
+        signature = self.signature(text)
+        if signature is None:
+            return CampaignMatch(None, None, None)
+
+        with self._lock:
+            self._purge_expired()
+            self.lookups += 1
+            entry = self._most_similar(signature)
+            if entry is None:
+                return CampaignMatch(signature, None, None)
+            self.near_duplicates += 1
+            verdict = None
+            if entry.verdict is not None and not context:
+                verdict = copy_result(entry.verdict)
+            return CampaignMatch(signature, entry.campaign_id, verdict)
+
+    def record_reuse(self) -> None:
+        """Count a lookup() verdict the caller actually served"""
+        with self._lock:
+            self.verdict_reuses += 1
+
+    def record(self, match: CampaignMatch, result: Tuple, reusable: bool = True) -> Optional[str]:
+        """
+        Index a classified message and return its campaign id
+        result is the detect() tuple; it is kept for reuse only when reusable
+        (the detector produced it, without conversation context) and for scams at
+        or above reuse_min_confidence. A reused verdict must not be stored again,
+        or verdicts would chain from one near-duplicate to the next.
+        """
+        if not self.enabled or match.signature is None:
+            return None
+
+        key = match.signature.tobytes()
+        is_scam, confidence, scam_type = result[0], result[1], result[2]
+        verdict = None
+        if reusable and is_scam and confidence >= self.reuse_min_confidence:
+            verdict = copy_result(result)
+
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(key)
+            if entry is not None:
+                campaign_id = entry.campaign_id
+            else:
+                campaign_id = match.campaign_id or f"cmp-{hashlib.blake2b(key, digest_size=6).hexdigest()}"
+            campaign = self._campaigns.setdefault(campaign_id, [0, 0, scam_type])
+            campaign[1] += 1
+            if is_scam:
+                campaign[2] = scam_type
+
+            if entry is not None:
+                # Same signature seen again: refresh it rather than storing a copy
+                entry.stored_at = time.monotonic()
+                entry.verdict = verdict or entry.verdict
+                self._entries.move_to_end(key)
+                return campaign_id
+
+            self._entries[key] = _Entry(match.signature, campaign_id, verdict)
+            campaign[0] += 1
+            for band_key in self._band_keys(match.signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove_oldest()
+                self.evictions += 1
+            return campaign_id
+
+    def _purge_expired(self) -> None:
+        """Drop entries past their TTL (caller holds the lock)"""
+        # Entries are ordered by stored_at: record() refreshes and moves them to the end
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries and next(iter(self._entries.values())).stored_at < cutoff:
+            self._remove_oldest()
+            self.expirations += 1
+
+    def _remove_oldest(self) -> None:
+        key, entry = self._entries.popitem(last=False)
+        for band_key in self._band_keys(entry.signature):
+            bucket = self._buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[band_key]
+        campaign = self._campaigns[entry.campaign_id]
+        campaign[0] -= 1
+        if campaign[0] <= 0:
+            del self._campaigns[entry.campaign_id]
+
+    def invalidate_verdicts(self) -> None:
+        """Forget reusable verdicts (e.g. after the model is retrained); campaigns are kept"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry.verdict = None
+        logger.info("Campaign index verdicts invalidated")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self, top: int = 5) -> Dict[str, Any]:
+        """Counters and the largest campaigns for the stats endpoint"""
+        with self._lock:
+            self._purge_expired()
+            largest = sorted(self._campaigns.items(), key=lambda item: -item[1][1])[:top]
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "campaigns": len(self._campaigns),
+                "lookups": self.lookups,
+                "nearDuplicates": self.near_duplicates,
+                "verdictReuses": self.verdict_reuses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "topCampaigns": [
+                    {"campaignId": campaign_id, "messages": messages, "scamType": scam_type}
+                    for campaign_id, (_, messages, scam_type) in largest
+                ],
+            }
+
+
+# Global instance
+campaign_index = CampaignIndex()
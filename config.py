@@ -113,6 +113,12 @@ if os.getenv("DISABLE_RESPONSE_DELAY", "false").lower() == "true":
 # ============== Model Configuration ==============
 MODEL_PATH = "models/scam_detector.joblib"
 VECTORIZER_PATH = "models/tfidf_vectorizer.joblib"
+COMPILED_MODEL_PATH = "models/scam_detector_trees.joblib"
+
+# joblib mmap_mode for saved models: NumPy arrays (IDF vector, SGD weights, compiled
+# tree arrays) are mapped from the page cache and shared by every worker process.
+# Set MODEL_MMAP_MODE="" to load private copies instead.
+MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
 
 # Model training parameters
 MODEL_PARAMS = {
@@ -127,6 +133,30 @@ MODEL_PARAMS = {
     "random_state": 42,
 }
 
+# Out-of-core training (streaming_trainer.py): chunked CSV reads, hashed features,
+# SGD partial_fit. Peak memory is bounded by chunk_size instead of dataset size.
+STREAMING_TRAINING_CONFIG = {
+    "enabled": os.getenv("TRAINING_MODE", "batch").lower() == "streaming",
+    "chunk_size": int(os.getenv("TRAINING_CHUNK_SIZE", "20000")),
+    "n_features": 2 ** 20,          # Hashed feature space
+    "epochs": 2,
+    "alpha": 1e-6,                  # SGD L2 regularization
+    "dedupe": True,                 # Drop repeated messages (fixed-size Bloom filter of message digests)
+    "dedupe_bits": 2 ** 27,         # Bloom filter size: 16MB whatever the dataset size
+}
+
+# Startup never trains in the API process. Without a saved model artifact the API
+# serves rules-only ("degraded") while a child process trains; the new model is
+# then hot-swapped in (background_trainer.py). POST /api/train starts the same job.
+BACKGROUND_TRAINING_CONFIG = {
+    "train_on_startup": os.getenv("TRAIN_ON_STARTUP", "true").lower() == "true",
+    "start_method": os.getenv("TRAINING_START_METHOD", "spawn"),
+    "poll_interval_seconds": 1.0,
+    "max_jobs_kept": 20,            # Finished jobs still visible at GET /api/train/{id}
+    # How often each worker checks for a model saved by another worker or trainer
+    "artifact_poll_seconds": float(os.getenv("MODEL_RELOAD_POLL_SECONDS", "5")),
+}
+
 # ============== Session Configuration ==============
 SESSION_TIMEOUT_MINUTES = 30
 SESSION_CLEANUP_INTERVAL_SECONDS = 300
@@ -167,6 +197,88 @@ RATE_LIMIT_CONFIG = {
     "requests_per_ip_per_minute": 100,
 }
 
+# ============== Detection Cache ==============
+# LRU+TTL cache of detection verdicts for repeated campaign templates
+DETECTION_CACHE_CONFIG = {
+    "enabled": os.getenv("DETECTION_CACHE_ENABLED", "true").lower() == "true",
+    "max_entries": int(os.getenv("DETECTION_CACHE_MAX_ENTRIES", "10000")),
+    "ttl_seconds": int(os.getenv("DETECTION_CACHE_TTL_SECONDS", "600")),
+}
+
+# ============== Campaign Index ==============
+# MinHash signatures (digits, URLs and identifiers masked) in a banded LSH index;
+# a near-duplicate of a high-confidence scam reuses its verdict without ML or LLM
+CAMPAIGN_INDEX_CONFIG = {
+    "enabled": os.getenv("CAMPAIGN_INDEX_ENABLED", "true").lower() == "true",
+    "max_entries": int(os.getenv("CAMPAIGN_INDEX_MAX_ENTRIES", "20000")),
+    "ttl_seconds": int(os.getenv("CAMPAIGN_INDEX_TTL_SECONDS", "3600")),
+    "num_perm": 64,                 # MinHash signature length
+    "bands": 16,                    # LSH bands of num_perm / bands rows each
+    "min_similarity": 0.6,          # Estimated Jaccard similarity for a near-duplicate
+    "min_tokens": 6,                # Shorter messages are not fingerprinted
+    "reuse_min_confidence": 0.85,   # Only verdicts this confident are reused
+}
+
+# ============== URL Reputation ==============
+# Link hosts are matched by domain suffix against the built-in lists in url_analyzer.py
+# plus these files: one domain or URL per line, '#' comments, defanged forms allowed
+URL_REPUTATION_CONFIG = {
+    "allowlist_path": os.getenv("URL_ALLOWLIST_PATH", ""),
+    "blocklist_path": os.getenv("URL_BLOCKLIST_PATH", ""),
+    "cache_size": int(os.getenv("URL_CACHE_SIZE", "10000")),   # Per-URL verdicts kept (LRU)
+}
+
+# ============== Detection Cascade ==============
+# ScamDetector skips the ML model only for kill switches and for messages the cheap
+# stages already call a scam at a threat level ML cannot change (those report the
+# rules-only confidence); main.py asks the LLM only for non-scam verdicts whose
+# confidence falls in llm_band
+DETECTION_CASCADE_CONFIG = {
+    "enabled": os.getenv("DETECTION_CASCADE_ENABLED", "true").lower() == "true",
+    "early_exit_margin": 0.0,       # Extra distance from the threshold required to skip ML
+    "llm_band": (0.20, 0.60),       # [low, high] confidence range sent to the LLM check
+    "llm_min_chars": 20,            # Shorter messages never reach the LLM
+}
+
+# ============== Detector Service ==============
+# Process pool that keeps CPU-bound detection off the event loop.
+# workers=0 runs detection in-process (previous behaviour).
+DETECTOR_SERVICE_CONFIG = {
+    "workers": int(os.getenv("DETECTOR_WORKERS", "0")),
+    "start_method": os.getenv("DETECTOR_START_METHOD", "spawn"),
+    "max_batch_size": int(os.getenv("DETECTOR_MAX_BATCH_SIZE", "16")),
+    "batch_wait_ms": float(os.getenv("DETECTOR_BATCH_WAIT_MS", "2")),
+    "inline_max_chars": 500,        # Messages up to this size run in-process when the pool is busy
+}
+
+# ============== Stage Latency Metrics ==============
+# Per-stage spans aggregated into histograms served at /api/metrics (stage_metrics.py).
+# With timings_in_notes, each /api/message reply's agentNotes carries its own breakdown.
+STAGE_METRICS_CONFIG = {
+    "enabled": os.getenv("STAGE_METRICS_ENABLED", "true").lower() == "true",
+    "timings_in_notes": os.getenv("STAGE_TIMINGS_IN_NOTES", "false").lower() == "true",
+}
+
+# ============== Import Time Budget ==============
+# Cumulative `python -X importtime -c "import main"` budget (tests/test_import_time.py).
+# Training-only libraries are imported lazily and singletons are built on first use,
+# so this covers only what serving a request needs to import.
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "1.0"))
+# Must not be imported by `import main`
+IMPORT_TIME_FORBIDDEN_MODULES = ["pandas", "sklearn", "scipy", "joblib"]
+
+# ============== Untrusted Input Scanning ==============
+# Message bodies come from adversaries. Each regex stage scans at most max_scan_chars
+# at a time (longer text is scanned in overlapping windows, see regex_guard.py), and
+# optional stages are skipped once a message has used analysis_budget_ms.
+REGEX_SCAN_CONFIG = {
+    "max_scan_chars": int(os.getenv("MAX_SCAN_CHARS", "2000")),
+    "window_overlap_chars": 256,    # Longest match found across a window boundary (progression patterns need ~220)
+    "max_message_chars": int(os.getenv("MAX_MESSAGE_CHARS", "20000")),  # Beyond this, text is truncated
+    "analysis_budget_ms": float(os.getenv("ANALYSIS_BUDGET_MS", "250")),
+    "pattern_budget_ms": 10.0,      # regex_audit.py: worst case allowed per pattern at max_scan_chars
+}
+
 # ============== Sentiment Analysis Patterns ==============
 SENTIMENT_PATTERNS = {
     "urgency_phrases": [
@@ -265,6 +377,185 @@ SCAM_PROGRESSION_PATTERNS = {
     ],
 }
 
+# ============== Kill Switch Rules ==============
+# Declarative kill-switch table, compiled by ScamDetector into bitmasks at startup.
+# A rule fires when every derived signal is set, at least one term of every
+# "require" group occurs in the message, and no term of any "exclude" group occurs.
+# Terms are plain lowercase substrings. Rules are evaluated in order; a rule with
+# "only_if_untriggered" fires only when no earlier rule has fired.
+# Derived signals: suspicious_link, urgency (link-phishing urgency cues),
+# payment_intent, financial_request, threat_keyword, multi_stage.
+KILL_SWITCH_RULES = [
+    {"name": "phishing_combo", "signals": ["suspicious_link", "urgency"],
+     "require": [], "score": 1.0, "tag": "CRITICAL_PHISHING_COMBO",
+     "log": "Phishing link with urgency/threat detected"},
+    {"name": "digital_arrest",
+     "require": [["skype", "video call", "digital arrest"],
+                 ["cbi", "police", "customs", "ncb", "sharma"]],
+     "score": 1.0, "tag": "CRITICAL_DIGITAL_ARREST",
+     "log": "Digital arrest pattern detected"},
+    # Exclude honeytrap wording - that's a different, more specific category
+    {"name": "sextortion",
+     "require": [["recorded", "video", "recording"],
+                 ["contacts", "friends", "facebook", "leaked"],
+                 ["pay", "money", "delete", "rupees"]],
+     "exclude": [["video call", "whatsapp call", "intimate", "nude"]],
+     "score": 1.0, "tag": "CRITICAL_SEXTORTION_COMBO",
+     "log": "Sextortion pattern detected"},
+    # Require explicit payment intent to avoid misclassifying OTP phishing
+    {"name": "extortion", "signals": ["payment_intent", "financial_request", "threat_keyword"],
+     "require": [],
+     "exclude": [["airtel", "jio", "vi", "bsnl", "challan", "rto", "customer care", "agent id"]],
+     "score": 0.95, "tag": "CRITICAL_EXTORTION_COMBO",
+     "log": "Financial request with threat detected"},
+    {"name": "courier_handover",
+     "require": [["fedex", "dhl", "parcel", "courier"],
+                 ["drugs", "illegal", "contraband", "passport"],
+                 ["cbi", "customs", "police"]],
+     "score": 0.95, "tag": "CRITICAL_COURIER_HANDOVER",
+     "log": "Courier illegal item handover pattern detected"},
+    {"name": "multi_stage", "signals": ["multi_stage"],
+     "require": [], "score": 0.85, "tag": "CRITICAL_MULTI_STAGE",
+     "log": "Multi-stage scam pattern detected"},
+    # Suspicious link alone (even without urgency) is very high risk
+    {"name": "suspicious_link", "signals": ["suspicious_link"],
+     "require": [], "score": 0.75, "tag": None, "only_if_untriggered": True,
+     "log": "Suspicious link detected"},
+    {"name": "lic_scam",
+     "require": [["congratulations", "badhai", "mubarak"],
+                 ["lic", "policy", "insurance", "bonus", "approve", "maturity"]],
+     "score": 0.95, "tag": "CRITICAL_LIC_SCAM",
+     "log": "LIC/Insurance prize scam detected"},
+    {"name": "scheme_scam",
+     "require": [["scheme", "relief", "subsidy", "government"],
+                 ["expire", "hours", "today", "immediate", "last chance"]],
+     "score": 0.90, "tag": "CRITICAL_SCHEME_SCAM",
+     "log": "Government scheme urgency scam detected"},
+    {"name": "task_job_scam",
+     "require": [["like youtube", "google maps review", "task", "subscribe"],
+                 ["daily income", "earn", "salary", "bonus", "rs", "inr"]],
+     "score": 0.95, "tag": "CRITICAL_TASK_JOB_SCAM",
+     "log": "YouTube/Task job scam detected"},
+    {"name": "challan_scam",
+     "require": [["challan", "rto", "traffic fine", "vehicle number", "dl block"],
+                 ["pending", "unpaid", "immediately", "pay now"]],
+     "score": 0.95, "tag": "CRITICAL_CHALLAN_SCAM",
+     "log": "RTO/Challan scam detected"},
+    {"name": "sim_swap_scam",
+     "require": [["airtel", "jio", "vi", "bsnl", "voda", "sim", "esim", "5g"],
+                 ["blocked", "verification", "update", "share", "scan", "deactivate", "activate", "upgrade"]],
+     "score": 0.95, "tag": "CRITICAL_SIM_SWAP_SCAM",
+     "log": "SIM/eSIM upgrade scam detected"},
+    {"name": "qr_scam",
+     "require": [["olx", "quikr", "marketplace", "sofa", "furnitur", "interested"],
+                 ["qr", "scan", "receive", "amount", "barcode"]],
+     "score": 0.98, "tag": "CRITICAL_QR_SCAM",
+     "log": "Marketplace QR code scam detected"},
+    {"name": "loan_scam",
+     "require": [["instant loan", "no documents", "fast credit", "loan approve"],
+                 ["emergency", "pan card", "aadhaar card", "contacts access"]],
+     "score": 0.90, "tag": "CRITICAL_LOAN_SCAM",
+     "log": "Predatory loan app scam detected"},
+    # --- V4.0: Advanced kill switches (2024-2025 research) ---
+    {"name": "pig_butcher",
+     "require": [["i love you", "trust me", "lonely", "widower", "overseas"],
+                 ["investment", "crypto", "trading", "withdraw", "platform", "returns"]],
+     "score": 1.0, "tag": "CRITICAL_PIG_BUTCHER",
+     "log": "Pig Butchering (romance + investment) scam detected"},
+    {"name": "honeytrap",
+     "require": [["video call", "whatsapp call", "nude", "intimate", "recorded you"],
+                 ["your contacts", "will viral", "pay or else", "facebook leak", "share with friends"]],
+     "score": 1.0, "tag": "CRITICAL_HONEYTRAP",
+     "log": "Honeytrap video call sextortion detected"},
+    {"name": "voice_clone",
+     "require": [["mom help", "dad i need", "son in trouble", "accident", "hospital urgent", "kidnapped", "bail money"],
+                 ["send immediately", "don't tell anyone", "urgent transfer", "police custody"]],
+     "score": 1.0, "tag": "CRITICAL_VOICE_CLONE",
+     "log": "AI Voice Cloning / Deepfake emergency scam detected"},
+    {"name": "ceo_fraud",
+     "require": [["this is your ceo", "boss here", "i am in a meeting", "confidential transaction"],
+                 ["urgent wire", "vendor payment", "do not discuss", "handle personally", "reply to personal email"]],
+     "score": 0.98, "tag": "CRITICAL_CEO_FRAUD",
+     "log": "CEO/Business Email Compromise fraud detected"},
+    {"name": "viral_link",
+     "require": [["7 minute viral", "shocking video", "your video is trending", "you are in this video", "click to see who"]],
+     "score": 0.90, "tag": "CRITICAL_VIRAL_LINK",
+     "log": "Viral video link malware scam detected"},
+    {"name": "trai_scam",
+     "require": [["trai", "telecom", "dnd", "regulatory compliance", "telecom department"],
+                 ["disconnected", "deactivated", "press 1", "press 2", "within 24 hours"]],
+     "score": 0.90, "tag": "CRITICAL_TRAI_SCAM",
+     "log": "TRAI/DND deactivation scam detected"},
+    # --- V5.0: Extended Indian kill switches ---
+    {"name": "stock_trading",
+     "require": [["ipo", "stock market", "trading expert", "trading signal", "sebi", "investment group"],
+                 ["guaranteed", "withdrawal tax", "processing fee", "high profit", "whatsapp group"]],
+     "score": 0.98, "tag": "CRITICAL_STOCK_TRADING",
+     "log": "Fake stock market trading group detected"},
+    {"name": "welfare_fraud",
+     "require": [["pm kisan", "ayushman bharat", "govt scheme", "sarkari yojana", "samman nidhi", "subsidy"],
+                 ["kitsch", "bonus", "claim", "registration fee", "click to register"]],
+     "score": 0.95, "tag": "CRITICAL_WELFARE_FRAUD",
+     "log": "Government welfare scheme fraud detected"},
+    {"name": "rent_scam",
+     "require": [["rent", "property", "flat", "house", "olx", "magicbricks"],
+                 ["token amount", "security deposit", "gate pass", "before visit", "block property"]],
+     "score": 0.95, "tag": "CRITICAL_RENT_SCAM",
+     "log": "Online rental property fraud detected"},
+    {"name": "recharge_scam",
+     "require": [["free recharge", "free data", "balance", "recharge link"],
+                 ["jio", "airtel", "vi", "offer", "congratulations", "won"]],
+     "score": 0.90, "tag": "CRITICAL_RECHARGE_SCAM",
+     "log": "Free recharge/data balance scam detected"},
+    {"name": "election_scam",
+     "require": [["voter id", "election card", "voter list"],
+                 ["update", "mandatory", "verify", "click to update"]],
+     "score": 0.85, "tag": "CRITICAL_ELECTION_SCAM",
+     "log": "Election/Voter ID fraud detected"},
+    # --- V5.1: New Indian scam categories ---
+    {"name": "credit_rewards",
+     "require": [["reward points", "credit card points", "redeem points"],
+                 ["expire today", "expiring", "redeem now", "cash value", "click link"]],
+     "score": 0.95, "tag": "CRITICAL_CREDIT_REWARDS",
+     "log": "Credit card reward points scam detected"},
+    {"name": "fastag_scam",
+     "require": [["fastag", "toll tag", "nhai", "vehicle tag"],
+                 ["kyc pending", "deactivated", "blocked", "update immediately", "wallet expired"]],
+     "score": 0.95, "tag": "CRITICAL_FASTAG_SCAM",
+     "log": "FASTag KYC update scam detected"},
+    {"name": "it_refund",
+     "require": [["income tax", "tax refund", "it dept", "refund issued", "it department"],
+                 ["click to claim", "verify account", "refund pending", "approved", "update bank", "claim", "incorrect"]],
+     "score": 0.98, "tag": "CRITICAL_IT_REFUND",
+     "log": "Income Tax refund phishing detected"},
+    {"name": "religious_scam",
+     "require": [["ram mandir", "ayodhya", "temple trust", "darshan", "jai shri ram"],
+                 ["vip pass", "vip entry", "vip darshan", "prasad", "prasad delivery", "donation qr", "book now", "skip the queue"]],
+     "score": 0.90, "tag": "CRITICAL_RELIGIOUS_SCAM",
+     "log": "Religious/VIP Darshan scam detected"},
+    # --- V5.2: Advanced Indian identity scams ---
+    {"name": "hi_mom_scam",
+     "require": [["hi mom", "hi mum", "hi dad", "this is your son", "this is your daughter", "new number"],
+                 ["lost my phone", "broken phone", "can't access bank", "urgent help", "need money", "emergency", "don't tell"]],
+     "score": 0.98, "tag": "CRITICAL_HI_MOM_SCAM",
+     "log": "Hi Mom/Family Emergency WhatsApp scam detected"},
+    {"name": "aadhaar_scam",
+     "require": [["aadhaar", "uidai", "biometric", "aeps", "e-aadhaar"],
+                 ["update", "expired", "verification", "link expired", "click to update", "mandatory update"]],
+     "score": 0.95, "tag": "CRITICAL_AADHAAR_SCAM",
+     "log": "Aadhaar/UIDAI update scam detected"},
+    {"name": "yono_scam",
+     "require": [["yono", "sbi yono", "netbanking", "mobile banking"],
+                 ["blocked", "suspended", "will be blocked", "update pan", "download apk", "click to activate"]],
+     "score": 0.95, "tag": "CRITICAL_YONO_SCAM",
+     "log": "SBI YONO/Bank App blocked scam detected"},
+    {"name": "epf_scam",
+     "require": [["epf", "pf withdrawal", "provident fund", "uan", "epfo"],
+                 ["claim", "frozen", "settlement", "processing fee", "faster withdrawal", "click to claim"]],
+     "score": 0.90, "tag": "CRITICAL_EPF_SCAM",
+     "log": "EPF/PF withdrawal scam detected"},
+]
+
 # ============== Geographic Indicators ==============
 INDIAN_CITY_CODES = {
     "011": "Delhi",
@@ -301,3 +592,10 @@ CRYPTO_PLATFORMS = [
     "binance", "coinbase", "wazirx", "trust wallet", "metamask",
     "kucoin", "kraken", "bybit", "okx", "coindcx", "zebpay",
 ]
+
+# ============== Gazetteer ==============
+# The dictionaries above plus every <category>.txt in data_dir (one `phrase` or
+# `phrase|value` per line), matched on token boundaries in one pass (gazetteer.py)
+GAZETTEER_CONFIG = {
+    "data_dir": os.getenv("GAZETTEER_DATA_DIR", "data/gazetteer"),
+}
@@ -0,0 +1,132 @@
+"""
+Detection Result Cache
+Bounded LRU+TTL cache of detection verdicts so repeated campaign templates skip the full pipeline
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import DETECTION_CACHE_CONFIG
+from logging_config import get_logger
+
+logger = get_logger("honeypot.detection_cache")
+
+
+def copy_result(result: Tuple) -> Tuple:
+    """Copy the mutable parts of a detect() tuple (keywords list, classification)"""
+    is_scam, confidence, scam_type, keywords, classification, threat_level = result
+    return (
+        is_scam,
+        confidence,
+        scam_type,
+        list(keywords),
+        classification.model_copy(deep=True),
+        threat_level,
+    )
+
+
+class DetectionCache:
+    """
+    LRU cache with per-entry TTL for ScamDetector verdicts.
+
+    Keys hash the normalized message plus the normalized conversation context
+    (the ML stage sees the last 2 messages, context analysis sees all of them).
+    Every detection stage is case-insensitive, so lowercasing and trimming the
+    text does not change the verdict.
+    Values are copied on the way in and out so callers can mutate them freely.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DETECTION_CACHE_CONFIG["max_entries"],
+        ttl_seconds: float = DETECTION_CACHE_CONFIG["ttl_seconds"],
+        enabled: bool = DETECTION_CACHE_CONFIG["enabled"]
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_entries > 0
+        self._entries: "OrderedDict[str, Tuple[float, Tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return str(text).strip().lower()
+
+    def make_key(self, text: str, context: Optional[List[str]] = None) -> str:
+        """Build a cache key from the message and its conversation context"""
+        parts = [self._normalize(m) for m in (context or [])]
+        parts.append(self._normalize(text))
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple]:
+        """Return a copy of the cached verdict, or None on miss/expiry"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy_result(result)
+
+    def put(self, key: str, result: Tuple) -> None:
+        """Store a copy of a detect() verdict, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy_result(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached verdict (e.g. after the model is retrained)"""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            self.invalidations += 1
+        logger.info(f"Detection cache invalidated ({dropped} entries dropped)")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for the stats endpoint"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global instance
+detection_cache = DetectionCache()
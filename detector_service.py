@@ -0,0 +1,202 @@
+"""
+Detector Execution Service
+Runs CPU-bound scam detection in a process pool so it does not block the event loop
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import DETECTOR_SERVICE_CONFIG
+from models import DetectionState
+from scam_detector import detector, DetectionResult
+from text_normalizer import MessageText
+from lazy_singleton import unwrap
+from logging_config import get_logger
+
+logger = get_logger("honeypot.detector_service")
+
+# Detector owned by each worker process (set by _init_worker)
+_worker_detector = None
+
+
+def _init_worker() -> None:
+    """Pool initializer: load the model once per worker process"""
+    global _worker_detector
+    from scam_detector import detector as worker_detector
+    _worker_detector = unwrap(worker_detector)
+
+
+def _detect_in_worker(
+    texts: List[MessageText],
+    contexts: List[List[str]],
+    states: List[Optional[DetectionState]]
+) -> Tuple[List[DetectionResult], List[Optional[DetectionState]]]:
+    """Score a batch in a worker; states are returned because the worker only sees copies"""
+    results = _worker_detector.detect_batch(texts, contexts, states)
+    return results, states
+
+
+def _sync_state(target: DetectionState, source: DetectionState) -> None:
+    """Copy a worker's updated detection state into the session's own object"""
+    for name in type(target).model_fields:
+        setattr(target, name, getattr(source, name))
+
+
+class DetectorService:
+    """
+    Async front end for ScamDetector.
+
+    With workers > 0, messages are collected into micro-batches (up to
+    max_batch_size, or whatever arrived within batch_wait_ms) and each batch
+    is scored with one detect_batch call in a worker process. Workers load the
+    model once at startup. When every worker is busy, short messages are
+    scored in-process rather than queued behind long batches.
+    With workers == 0 everything runs in-process, as before.
+    """
+
+    def __init__(
+        self,
+        workers: int = DETECTOR_SERVICE_CONFIG["workers"],
+        max_batch_size: int = DETECTOR_SERVICE_CONFIG["max_batch_size"],
+        batch_wait_ms: float = DETECTOR_SERVICE_CONFIG["batch_wait_ms"],
+        inline_max_chars: int = DETECTOR_SERVICE_CONFIG["inline_max_chars"],
+        start_method: str = DETECTOR_SERVICE_CONFIG["start_method"]
+    ):
+        self.workers = max(0, workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_wait_ms = batch_wait_ms
+        self.inline_max_chars = inline_max_chars
+        self.start_method = start_method
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[MessageText, List[str], Optional[DetectionState], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+
+        self.inline_calls = 0
+        self.saturated_fallbacks = 0
+        self.pool_batches = 0
+        self.pool_messages = 0
+        self.pool_errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> None:
+        """Start the worker pool (no-op when workers == 0)"""
+        if self.workers == 0 or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+        )
+        logger.info(f"Detector service started with {self.workers} worker processes")
+
+    def shutdown(self, cancel_queued: bool = True) -> None:
+        """
+        Stop the worker pool; batches it had not started fall back to in-process
+        detection, or with cancel_queued=False still run in the old workers
+        """
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        pool.shutdown(wait=False, cancel_futures=cancel_queued)
+        logger.info("Detector service stopped")
+
+    def restart(self) -> None:
+        """Recycle workers so they pick up a newly trained model"""
+        if self._pool is not None:
+            # Batches already handed to the old pool finish there on the previous model
+            self.shutdown(cancel_queued=False)
+            self.start()
+
+    async def detect(
+        self,
+        text: MessageText,
+        context: Optional[List[str]] = None,
+        detection_state: Optional[DetectionState] = None
+    ) -> DetectionResult:
+        """Same contract as ScamDetector.detect(); detection_state is updated in place"""
+        if self._pool is None:
+            self.inline_calls += 1
+            return detector.detect(text, context=context, detection_state=detection_state)
+
+        if self._in_flight >= self.workers and len(text) <= self.inline_max_chars:
+            self.saturated_fallbacks += 1
+            return detector.detect(text, context=context, detection_state=detection_state)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, list(context or []), detection_state, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Send everything queued so far as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[MessageText, List[str], Optional[DetectionState], asyncio.Future]]) -> None:
+        texts = [item[0] for item in batch]
+        contexts = [item[1] for item in batch]
+        states = [item[2] for item in batch]
+
+        self._in_flight += 1
+        try:
+            if self._pool is None:
+                raise RuntimeError("detector service is not running")
+            loop = asyncio.get_running_loop()
+            results, worker_states = await loop.run_in_executor(
+                self._pool, _detect_in_worker, texts, contexts, states
+            )
+            for state, worker_state in zip(states, worker_states):
+                if state is not None and worker_state is not None:
+                    _sync_state(state, worker_state)
+            self.pool_batches += 1
+            self.pool_messages += len(batch)
+        except (Exception, asyncio.CancelledError) as e:
+            # Worker crashed or pool shut down (a cancelled executor future raises the
+            # BaseException CancelledError): states were never touched, so score in-process
+            self.pool_errors += 1
+            logger.warning(f"Detector pool batch failed, scoring in-process: {e!r}")
+            try:
+                results = detector.detect_batch(texts, contexts, states)
+            except Exception as inner:
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(inner)
+                return
+        finally:
+            self._in_flight -= 1
+
+        for (_, _, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for the stats endpoint"""
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "inFlightBatches": self._in_flight,
+            "inlineCalls": self.inline_calls,
+            "saturatedFallbacks": self.saturated_fallbacks,
+            "poolBatches": self.pool_batches,
+            "poolMessages": self.pool_messages,
+            "poolErrors": self.pool_errors,
+            "avgBatchSize": round(self.pool_messages / self.pool_batches, 2) if self.pool_batches else 0.0,
+        }
+
+
+# Global instance
+detector_service = DetectorService()
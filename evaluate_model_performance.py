@@ -5,8 +5,8 @@ from sklearn.model_selection import train_test_split
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
-import os
+from config import MODEL_PATH, VECTORIZER_PATH
+from model_artifacts import save_artifacts
 import time
 
 def evaluate():
@@ -70,10 +70,7 @@ def evaluate():
 
     # Also save this model to the system paths so the API uses this high-accuracy one
     print("\nSaving robust model to disk...")
-    if not os.path.exists("models"):
-        os.makedirs("models")
-    joblib.dump(clf, "models/scam_detector.joblib")
-    joblib.dump(vectorizer, "models/tfidf_vectorizer.joblib")
+    save_artifacts(clf, vectorizer, MODEL_PATH, VECTORIZER_PATH, accuracy=acc)
     print("Model saved successfully.")
 
 if __name__ == "__main__":
@@ -50,6 +50,30 @@ class ModelPredictionError(ScamDetectionError):
     error_code = "MODEL_PREDICTION_ERROR"
 
 
+class TrainingJobNotFoundError(ScamDetectionError):
+    """Training job ID not found"""
+    error_code = "TRAINING_JOB_NOT_FOUND"
+    status_code = 404
+    
+    def __init__(self, job_id: str):
+        super().__init__(
+            message=f"Training job not found: {job_id}",
+            details={"job_id": job_id}
+        )
+
+
+class TrainingInProgressError(ScamDetectionError):
+    """A training job is already running"""
+    error_code = "TRAINING_IN_PROGRESS"
+    status_code = 409
+    
+    def __init__(self, job_id: str):
+        super().__init__(
+            message=f"Training job {job_id} is already running",
+            details={"job_id": job_id}
+        )
+
+
 class IntelligenceExtractionError(HoneypotException):
     """Errors during intelligence extraction"""
     error_code = "INTELLIGENCE_EXTRACTION_ERROR"
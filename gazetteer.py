@@ -0,0 +1,205 @@
+"""
+Gazetteer
+Categorized entity dictionaries (cities, STD codes, payment platforms, suspicious
+keywords, and anything added from data files) matched on token boundaries in one
+scan of a literal trie, so lookups cost O(message length) whatever the dictionary size
+"""
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import GAZETTEER_CONFIG, INDIAN_CITIES, INDIAN_CITY_CODES, PAYMENT_PLATFORMS
+from logging_config import get_logger
+from pattern_registry import pattern_registry
+
+logger = get_logger("honeypot.gazetteer")
+
+# Categories filled from config.py
+CITY = "city"
+AREA_CODE = "area_code"
+PAYMENT_PLATFORM = "payment_platform"
+SUSPICIOUS_KEYWORD = "suspicious_keyword"
+
+# What may follow an entry that ends in a word character
+WORD = "word"               # Nothing: whole tokens only ("pan" is not in "company")
+INFLECTED = "inflected"     # An English inflection ("blocked", "immediately") or nothing
+PREFIX = "prefix"           # Anything: the entry starts a token (STD code of a number)
+
+INFLECTIONS = ("s", "es", "d", "ed", "ing", "er", "ers", "ly")
+
+CATEGORY_POLICIES = {
+    CITY: WORD,
+    AREA_CODE: PREFIX,
+    PAYMENT_PLATFORM: WORD,
+    SUSPICIOUS_KEYWORD: INFLECTED,
+}
+
+
+def literal_trie(literals: Iterable[str]) -> str:
+    """Regex alternation of literals factored into a trie, preferring the longest match"""
+    trie: Dict = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+
+    return emit(trie)
+
+
+def _is_word_char(char: str) -> bool:
+    # Combining marks count as word characters so Devanagari matras do not split words
+    if char.isascii():
+        return char.isalnum() or char == "_"
+    return char.isalnum() or unicodedata.category(char)[0] == "M"
+
+
+class Gazetteer:
+    """
+    Phrase -> (category, value) dictionary matched in lowercased text.
+
+    One regex scan of a trie of every phrase reports the longest phrase starting
+    at each position; the phrases that are its prefixes (precomputed) are the
+    only other candidates there. A candidate counts like a regex \\b...\\b match:
+    a phrase that starts (ends) with a word character must not be preceded
+    (followed) by one, except where its category's policy allows an inflection
+    or a longer token. The scan costs O(text length), not O(dictionary size).
+    """
+
+    def __init__(self, policies: Optional[Dict[str, str]] = None):
+        self.policies = dict(CATEGORY_POLICIES if policies is None else policies)
+        self._entries: Dict[str, List[Tuple[str, str]]] = {}
+        # Longest phrase -> (phrase, length, starts with a word char, ends with one) of its phrase prefixes
+        self._prefixes: Optional[Dict[str, List[Tuple[str, int, bool, bool]]]] = {}
+        self._scanner = None
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def build(self) -> None:
+        """Compile the scanner now rather than on the first lookup after a change"""
+        phrases = set(self._entries)
+        self._prefixes = {
+            phrase: [
+                (phrase[:k], k, _is_word_char(phrase[0]), _is_word_char(phrase[k - 1]))
+                for k in range(1, len(phrase) + 1) if phrase[:k] in phrases
+            ]
+            for phrase in phrases
+        }
+        # Only try the trie where a phrase can start: not inside a word, unless at a non-word character
+        self._scanner = pattern_registry.compile(
+            "gazetteer.scan", rf"(?:(?<!\w)|(?=\W))(?=({literal_trie(phrases)})).", re.DOTALL
+        ) if phrases else None
+
+    def add(self, category: str, phrase: str, value: Optional[str] = None) -> None:
+        """Add a phrase; value (default: the phrase) is what find() reports for it"""
+        phrase = phrase.strip().lower()
+        if not phrase:
+            return
+        entry = (category, value if value is not None else phrase)
+        entries = self._entries.setdefault(phrase, [])
+        if entry not in entries:
+            entries.append(entry)
+            self._prefixes = None
+
+    def add_all(self, category: str, phrases: Iterable[str]) -> None:
+        for phrase in phrases:
+            self.add(category, phrase)
+
+    def load_file(self, path: str, category: Optional[str] = None) -> int:
+        """
+        Add a data file: one `phrase` or `phrase|value` per line, '#' comments.
+        The category defaults to the file name ("bank.txt" -> "bank").
+        """
+        category = category or os.path.splitext(os.path.basename(path))[0]
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                phrase, _, value = line.partition("|")
+                self.add(category, phrase, value.strip() or None)
+                count += 1
+        return count
+
+    def load_dir(self, data_dir: str) -> int:
+        """Add every *.txt file in data_dir (missing directory: nothing to add)"""
+        if not data_dir or not os.path.isdir(data_dir):
+            return 0
+        count = 0
+        for name in sorted(os.listdir(data_dir)):
+            if name.endswith(".txt"):
+                count += self.load_file(os.path.join(data_dir, name))
+        return count
+
+    def _follows_ok(self, lower: str, end: int, policy: str) -> bool:
+        """A word character follows the phrase at end; does the policy allow what follows?"""
+        if policy == PREFIX:
+            return True
+        if policy == INFLECTED:
+            for suffix in INFLECTIONS:
+                after = end + len(suffix)
+                if lower.startswith(suffix, end) and (after == len(lower) or not _is_word_char(lower[after])):
+                    return True
+        return False
+
+    def matches(self, lower: str) -> List[Tuple[int, int, str, str]]:
+        """(start, end, category, value) of every boundary-respecting match, in text order"""
+        if self._prefixes is None:
+            self.build()
+        if self._scanner is None:
+            return []
+        found = []
+        length = len(lower)
+        for match in self._scanner.finditer(lower):
+            start = match.start()
+            # The regex uses \w, which leaves out combining marks
+            preceded = start > 0 and _is_word_char(lower[start - 1])
+            for phrase, size, starts_word, ends_word in self._prefixes[match.group(1)]:
+                if preceded and starts_word:
+                    continue
+                end = start + size
+                followed = ends_word and end < length and _is_word_char(lower[end])
+                for category, value in self._entries[phrase]:
+                    if followed and not self._follows_ok(lower, end, self.policies.get(category, WORD)):
+                        continue
+                    found.append((start, end, category, value))
+        return found
+
+    def find(self, lower: str) -> Dict[str, Set[str]]:
+        """Category -> values found in lowercased text"""
+        found: Dict[str, Set[str]] = {}
+        for _, _, category, value in self.matches(lower):
+            found.setdefault(category, set()).add(value)
+        return found
+
+
+def build_gazetteer(
+    extra: Optional[Dict[str, Iterable[str]]] = None,
+    data_dir: str = GAZETTEER_CONFIG["data_dir"]
+) -> Gazetteer:
+    """Gazetteer of the config.py dictionaries, the given extra phrases and data_dir's files"""
+    gazetteer = Gazetteer()
+    for city in INDIAN_CITIES:
+        gazetteer.add(CITY, city, city.title())
+    for code, city in INDIAN_CITY_CODES.items():
+        gazetteer.add(AREA_CODE, code, f"{city} ({code})")
+    for platform in PAYMENT_PLATFORMS:
+        gazetteer.add(PAYMENT_PLATFORM, platform, platform)
+    for category, phrases in (extra or {}).items():
+        gazetteer.add_all(category, phrases)
+
+    loaded = gazetteer.load_dir(data_dir)
+    if loaded:
+        logger.info(f"Gazetteer: {loaded} entries loaded from {data_dir}")
+    gazetteer.build()
+    return gazetteer
@@ -1,3 +1,4 @@
+import gc
 import os
 
 # Gunicorn Configuration Strategey
@@ -16,10 +17,38 @@ bind = f"0.0.0.0:{port}"
 
 # Worker Processes
 # 1 worker is usually sufficient for free tier to save memory
-workers = 1
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Shared model memory (opt-in, GUNICORN_PRELOAD=true)
+# The master imports the app and builds its singletons, model artifact included,
+# once (when_ready); workers are forked from it and share those pages copy-on-write. gc.freeze() before each fork
+# moves every object loaded so far into a permanent generation that the workers'
+# collector never walks, so collections don't dirty (and un-share) inherited pages.
+# Measure with: python measure_worker_memory.py
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() == "true"
+
+if preload_app:
+    # No collections while the app loads; freezing just before fork covers it all
+    gc.disable()
+
+    def when_ready(server):
+        # Importing the app only creates lazy singletons; build them in the master
+        # (model included) so workers inherit them instead of each loading its own
+        import main
+        main.build_singletons()
+        server.log.info("Built detector and other singletons in the master before fork")
+
+    def pre_fork(server, worker):
+        from scam_detector import detector
+        if not detector._built:
+            server.log.warning("Preloaded app has no detector built before fork; workers will load private copies")
+        gc.freeze()
+
+    def post_fork(server, worker):
+        gc.enable()
 
 # Timeout
-# Increase timeout to handle ML model loading/training on startup
+# Increase timeout to handle ML model loading on startup (training runs in a background process)
 timeout = 120
 
 # Logging
@@ -3,14 +3,54 @@ Enhanced Intelligence Extractor Module
 Extracts actionable intelligence with NER, context awareness, and confidence scoring
 """
 import re
-from typing import List, Set, Dict, Tuple, Optional
-from models import ExtractedIntelligence, Message, IntelligenceConfidence
-from config import PAYMENT_PLATFORMS, INDIAN_CITIES, INDIAN_CITY_CODES
+from typing import List, NamedTuple, Set, Dict, Tuple, Optional
+from models import ExtractedIntelligence, Message, IntelligenceConfidence, IntelligenceState
+from gazetteer import AREA_CODE, CITY, PAYMENT_PLATFORM, SUSPICIOUS_KEYWORD, build_gazetteer, literal_trie
 from logging_config import get_logger, log_with_context
+from text_normalizer import MessageText, NormalizedMessage, normalize
+from lazy_singleton import LazySingleton
+from pattern_registry import pattern_registry
+from regex_guard import AnalysisBudget
+from url_analyzer import url_analyzer
+import regex_guard
 import logging
 
 logger = get_logger("honeypot.intelligence_extractor")
 
+# Cue standing for "any digit" in pattern_cues (every other cue is an ASCII literal)
+DIGIT_CUE = r"\d"
+
+# Cues are matched case-sensitively against this fold of the text: IGNORECASE lets an
+# ASCII letter match these four non-ASCII characters too, and lower() alone misses them
+# ("İ" even lowercases to two characters)
+_CUE_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+# Characters allowed between the runs of a number written in groups ("98765 43210", "+1 (555) 123-4567")
+_GROUP_SEPARATOR_CHARS = frozenset(" -()")
+# Longest run that can be one group of such a number; a 10-digit run is never joined to its neighbours
+_MAX_GROUP_RUN = 5
+# How far before a digit span an account label ("A/C No:", "account number") is looked for
+_LABEL_WINDOW = 24
+
+
+class DigitSpan(NamedTuple):
+    """One number in a message: a maximal digit run, or the runs of a grouped number"""
+    start: int              # Offset of the first character (the '+' for international numbers)
+    end: int
+    digits: str             # Every digit, country code included
+    country_code: str       # Digits of a separated "+CC " prefix, '' if none
+    international: bool     # Written with a leading '+'
+    grouped: bool           # Written in separated groups
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _is_group_separator(separator: str) -> bool:
+    return 0 < len(separator) <= 2 and all(char in _GROUP_SEPARATOR_CHARS for char in separator)
+
 
 class IntelligenceExtractor:
     """
@@ -26,22 +66,19 @@ class IntelligenceExtractor:
     - Confidence scoring for each piece
     """
     
-    def __init__(self):
+    def __init__(self, cue_scan: bool = True):
         # Regex patterns for extraction
         self.patterns = {
-            'phone_numbers': [
-                r'(?:\+91[\s-]?)?[6-9]\d{9}',  # Standard Indian mobile
-                r'\b[6-9]\d{9}\b',             # 10-digit Indian mobile format
-                r'(?:\+\d{1,3}[\s-]?)?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{4}',  # International
-            ],
+            # Phone and account numbers are classified from digit spans (_classify_digit_spans)
+            'phone_numbers': [],
             'upi_ids': [
-                r'[a-zA-Z0-9._-]+@(?:upi|paytm|oksbi|okaxis|okicici|okhdfcbank|ybl|ibl|axl|sbi|hdfc|icici|kotak|axis|barodampay|apl|rbl|citi|dbs|federal|indus|idbi|pnb|bob|canara|jio|phonepe|gpay|amazonpay)',
-                r'[a-zA-Z0-9._-]+@[a-zA-Z]{2,}(?:upi|bank)',
+                # (?<!...) starts the match at the beginning of a run, so a long run without
+                # a valid handle fails once instead of once per character (ReDoS)
+                r'(?<![a-zA-Z0-9._-])[a-zA-Z0-9._-]+@(?:upi|paytm|oksbi|okaxis|okicici|okhdfcbank|ybl|ibl|axl|sbi|hdfc|icici|kotak|axis|barodampay|apl|rbl|citi|dbs|federal|indus|idbi|pnb|bob|canara|jio|phonepe|gpay|amazonpay)',
+                r'(?<![a-zA-Z0-9._-])[a-zA-Z0-9._-]+@[a-zA-Z]{2,}(?:upi|bank)',
             ],
             'bank_accounts': [
-                r'\b\d{9,18}\b',  # Bank account number pattern
                 r'[A-Z]{4}0[A-Z0-9]{6}',  # IFSC code pattern
-                r'A/C(?:\s+)?(?:No\.?|Number)?(?:\s+)?:?(?:\s+)?\d{9,18}',
             ],
             'phishing_links': [
                 r'https?://[^\s<>"{}|\\^`\[\]]+',
@@ -52,7 +89,7 @@ class IntelligenceExtractor:
                 r'is\.gd/[a-zA-Z0-9]+',
             ],
             'email_addresses': [
-                r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+                r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
             ],
             'social_handles': [
                 r'@[a-zA-Z0-9_]{3,30}',  # Twitter/Instagram handle
@@ -133,24 +170,137 @@ class IntelligenceExtractor:
         
         # Organization patterns
         self.org_patterns = [
-            r'(?:from|at|of)\s+([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)*)(?:\s+bank|\s+company|\s+ltd|\s+pvt|\s+inc)',
+            # At most six words of up to 30 letters before the suffix (unbounded, "of of of ..." backtracks)
+            r'(?:from|at|of)\s+([A-Z][a-zA-Z]{0,29}(?:\s+[A-Z][a-zA-Z]{0,29}){0,5})(?:\s+bank|\s+company|\s+ltd|\s+pvt|\s+inc)',
             r'(?:customer\s+(?:care|service|support)\s+of)\s+([A-Z][a-zA-Z]+)',
             r'(State\s+Bank|HDFC|ICICI|Axis|Kotak|Punjab\s+National|Bank\s+of\s+[A-Za-z]+)',
         ]
         
-        # Legitimate domains to filter
-        self.legitimate_domains = [
-            'google.com', 'facebook.com', 'twitter.com', 'linkedin.com',
-            'github.com', 'microsoft.com', 'apple.com', 'amazon.in',
-            'flipkart.com', 'sbi.co.in', 'hdfcbank.com', 'icicibank.com',
-            'onlinesbi.com', 'netbanking.hdfcbank.com',
-        ]
+        # Cues for the single-pass candidate scan, one entry per pattern above (same
+        # order), keyed like the registry families. Every match of a pattern contains
+        # one of its cues (case-insensitively), so a pattern whose cues are absent
+        # cannot match and is skipped; None means the pattern always runs.
+        digit = (DIGIT_CUE,)
+        self.pattern_cues = {
+            'phone_numbers': [],
+            'upi_ids': [('@',), ('@',)],
+            'bank_accounts': [digit],
+            'phishing_links': [('http',), ('www.',), ('bit.ly/',), ('tinyurl.com/',), ('rb.gy/',), ('is.gd/',)],
+            'email_addresses': [('@',)],
+            'social_handles': [('@',), ('instagram.com/', 'twitter.com/', 'facebook.com/'), ('t.me/',)],
+            'reference_numbers': [('ref', 'case', 'ticket', 'complaint'), digit],
+            # TRC20 addresses need not contain a digit
+            'crypto_wallets': [digit, digit, digit, None],
+            'person_names': [('name', 'holder', 'beneficiary', 'agent', 'officer')],
+            'vehicle_numbers': [digit],
+            'employee_ids': [('employee', 'agent', 'id', 'badge')],
+            'phone_context': [('my', 'our', 'this'), ('call', 'contact', 'reach'), ('whatsapp', 'telegram')],
+            'upi_context': [('my', 'our'), ('send', 'transfer'), ('pay',)],
+            'account_context': [('account', 'a/c'), ('transfer', 'send')],
+            'person_name': [('am', 'this', 'name'), ('mr', 'ms', 'shri', 'smt'), ('officer', 'manager', 'executive', 'agent')],
+            'organization': [
+                ('from', 'at', 'of'),
+                ('customer',),
+                ('state', 'hdfc', 'icici', 'axis', 'kotak', 'punjab', 'bank'),
+            ],
+        }
+        self.pattern_cues['social_handles_cs'] = self.pattern_cues['social_handles']
+        # False runs every pattern on every message (the reference behaviour)
+        self.cue_scan = cue_scan
+
+        # Fields the API reports as core intelligence are always extracted; these are
+        # skipped once a message has used its analysis budget
+        self.optional_fields = {
+            'social_handles', 'reference_numbers', 'person_names', 'vehicle_numbers', 'employee_ids',
+        }
+
+        self._compile_patterns()
+        # Cities, STD codes, payment platforms and the keywords above, matched on token boundaries
+        self.gazetteer = build_gazetteer({SUSPICIOUS_KEYWORD: self.suspicious_keywords})
+
+    def _compile_patterns(self):
+        """Compile every extraction pattern once through the shared registry"""
+        self.compiled_patterns = {
+            field: pattern_registry.compile_all(f"extractor.{field}", patterns, re.IGNORECASE)
+            for field, patterns in self.patterns.items()
+        }
+        # Handles are matched case-sensitively, unlike the generic field pass
+        self.compiled_social_handles = pattern_registry.compile_all(
+            "extractor.social_handles_cs", self.patterns['social_handles']
+        )
+        self.compiled_context = {
+            category: pattern_registry.compile_all(f"extractor.{category}", patterns, re.IGNORECASE)
+            for category, patterns in self.context_indicators.items()
+        }
+        self.compiled_name_patterns = pattern_registry.compile_all(
+            "extractor.person_name", self.name_patterns, re.IGNORECASE
+        )
+        self.compiled_org_patterns = pattern_registry.compile_all(
+            "extractor.organization", self.org_patterns, re.IGNORECASE
+        )
+        self._indian_mobile_pattern = pattern_registry.compile("extractor.indian_mobile", r'^[6-9]\d{9}$')
+        self._digit_run_pattern = pattern_registry.compile("extractor.digit_run", r'\d+')
+        self._non_digit_pattern = pattern_registry.compile("extractor.non_digit", r'\D')
+        self._account_label_pattern = pattern_registry.compile("extractor.account_label", r'a/c|account|bank')
+        self._compile_cue_scanner()
+
+    def _compile_cue_scanner(self):
+        """
+        One alternation over every cue: a digit-run group and a trie of the
+        literals inside a lookahead that consumes a single character, so
+        overlapping literals are all seen in one left-to-right scan. At each
+        position the trie reports the longest literal; shorter ones matching
+        there are its prefixes, which _cue_keys folds in.
+        """
+        literal_keys: Dict[str, Set[Tuple[str, int]]] = {}
+        self._digit_keys: Set[Tuple[str, int]] = set()
+        self._always_keys: Set[Tuple[str, int]] = set()
+        for family, cue_lists in self.pattern_cues.items():
+            for index, cues in enumerate(cue_lists):
+                key = (family, index)
+                if cues is None:
+                    self._always_keys.add(key)
+                    continue
+                for cue in cues:
+                    if cue == DIGIT_CUE:
+                        self._digit_keys.add(key)
+                    elif not cue.isascii():
+                        raise ValueError(f"Cue {cue!r} must be ASCII (see _CUE_FOLD)")
+                    else:
+                        literal_keys.setdefault(cue.lower(), set()).add(key)
+        literals = set(literal_keys)
+        self._cue_keys: Dict[str, Set[Tuple[str, int]]] = {}
+        for literal in literals:
+            prefixes = [other for other in literals if literal.startswith(other)]
+            self._cue_keys[literal] = set().union(*(literal_keys[other] for other in prefixes))
+        self._cue_scanner = pattern_registry.compile(
+            "extractor.cue_scan", rf"(?P<digits>\d+)|(?=(?P<cue>{literal_trie(literals)})).", re.DOTALL
+        )
+
+    def _scan_cues(self, message: NormalizedMessage) -> Set[Tuple[str, int]]:
+        """From a single scan, (family, index) of every pattern that can match the message"""
+        found = set(self._always_keys)
+        digits_seen = False
+        for match in self._cue_scanner.finditer(message.raw.translate(_CUE_FOLD).lower()):
+            cue = match.group("cue")
+            if cue is not None:
+                found |= self._cue_keys[cue]
+            elif not digits_seen:
+                found |= self._digit_keys
+                digits_seen = True
+        return found
+
+    def _runnable(self, family: str, patterns: List, cues: Optional[Set[Tuple[str, int]]]) -> List:
+        """The family's patterns whose cues occurred (all of them when cues is None)"""
+        if cues is None:
+            return patterns
+        return [pattern for index, pattern in enumerate(patterns) if (family, index) in cues]
     
-    def _has_context(self, text: str, pattern_category: str) -> bool:
+    def _has_context(self, text: str, pattern_category: str, cues=None, windows=None) -> bool:
         """Check if extraction has contextual support"""
-        patterns = self.context_indicators.get(pattern_category, [])
+        patterns = self._runnable(pattern_category, self.compiled_context.get(pattern_category, []), cues)
         for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+            if regex_guard.search(pattern, text, windows):
                 return True
         return False
     
@@ -171,7 +321,7 @@ class IntelligenceExtractor:
         # Type-specific adjustments
         if item_type == 'phone':
             # Indian mobile numbers starting with 6-9 are more reliable
-            if re.match(r'^[6-9]\d{9}$', item.replace('+91', '').replace(' ', '').replace('-', '')):
+            if self._indian_mobile_pattern.match(item.replace('+91', '').replace(' ', '').replace('-', '')):
                 base_confidence += 0.15
         
         elif item_type == 'upi':
@@ -181,16 +331,23 @@ class IntelligenceExtractor:
                 base_confidence += 0.20
         
         elif item_type == 'link':
-            # Short URLs are more suspicious
-            if any(s in item.lower() for s in ['bit.ly', 'tinyurl', 'rb.gy', 't.co']):
-                base_confidence += 0.20
-            # IP addresses in URLs are highly suspicious
-            if re.search(r'\d+\.\d+\.\d+\.\d+', item):
-                base_confidence += 0.30
+            verdict = url_analyzer.analyze(item)
+            if verdict is not None:
+                # Short URLs are more suspicious
+                if verdict.shortener:
+                    base_confidence += 0.20
+                # IP addresses in URLs are highly suspicious
+                if verdict.url.is_ip:
+                    base_confidence += 0.30
+                # Known-bad domains and internationalized (homograph-prone) hosts
+                if verdict.blocked:
+                    base_confidence += 0.30
+                elif verdict.url.is_idn:
+                    base_confidence += 0.10
         
         elif item_type == 'account':
             # Longer account numbers are more likely genuine
-            digits = re.sub(r'\D', '', item)
+            digits = self._non_digit_pattern.sub('', item)
             if 11 <= len(digits) <= 16:
                 base_confidence += 0.15
         
@@ -201,11 +358,11 @@ class IntelligenceExtractor:
         
         return min(base_confidence, 1.0)
     
-    def _extract_person_names(self, text: str) -> List[Tuple[str, float]]:
+    def _extract_person_names(self, text: str, cues=None, windows=None) -> List[Tuple[str, float]]:
         """Extract person names with confidence scores"""
         names = []
-        for pattern in self.name_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self._runnable('person_name', self.compiled_name_patterns, cues):
+            matches = regex_guard.findall(pattern, text, windows)
             for match in matches:
                 if len(match) >= 3 and not any(c.isdigit() for c in match):
                     # Filter out common false positives
@@ -214,11 +371,11 @@ class IntelligenceExtractor:
                         names.append((match.strip(), confidence))
         return names
     
-    def _extract_organization_names(self, text: str) -> List[Tuple[str, float]]:
+    def _extract_organization_names(self, text: str, cues=None, windows=None) -> List[Tuple[str, float]]:
         """Extract organization names with confidence"""
         orgs = []
-        for pattern in self.org_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self._runnable('organization', self.compiled_org_patterns, cues):
+            matches = regex_guard.findall(pattern, text, windows)
             for match in matches:
                 if len(match) >= 3:
                     # Known banks have higher confidence
@@ -227,52 +384,123 @@ class IntelligenceExtractor:
                     orgs.append((match.strip(), confidence))
         return orgs
     
-    def _extract_payment_platforms(self, text: str) -> List[str]:
-        """Extract payment platform mentions"""
-        text_lower = text.lower()
-        found = []
-        for platform in PAYMENT_PLATFORMS:
-            if platform.lower() in text_lower:
-                found.append(platform)
-        return list(set(found))
+    def _extract_payment_platforms(self, text: MessageText, entities=None) -> List[str]:
+        """Extract payment platform mentions (entities: a gazetteer.find() result to reuse)"""
+        if entities is None:
+            entities = self.gazetteer.find(normalize(text).lower)
+        return list(entities.get(PAYMENT_PLATFORM, ()))
     
-    def _extract_geographic_indicators(self, text: str) -> List[str]:
-        """Extract geographic indicators (cities, area codes)"""
-        indicators = []
-        text_lower = text.lower()
-        
-        # Check for city names
-        for city in INDIAN_CITIES:
-            if city in text_lower:
-                indicators.append(city.title())
-        
-        # Check for area codes in phone numbers
-        for code, city in INDIAN_CITY_CODES.items():
-            if code in text:
-                indicators.append(f"{city} ({code})")
-        
-        return list(set(indicators))
+    def _extract_geographic_indicators(self, text: MessageText, entities=None) -> List[str]:
+        """Extract geographic indicators (cities, area codes at the start of a number)"""
+        if entities is None:
+            entities = self.gazetteer.find(normalize(text).lower)
+        return list(entities.get(CITY, set()) | entities.get(AREA_CODE, set()))
     
-    def _extract_social_handles(self, text: str) -> List[str]:
+    def _extract_social_handles(self, text: str, cues=None, windows=None) -> List[str]:
         """Extract social media handles"""
         handles = []
-        for pattern in self.patterns['social_handles']:
-            matches = re.findall(pattern, text)
+        for pattern in self._runnable('social_handles_cs', self.compiled_social_handles, cues):
+            matches = regex_guard.findall(pattern, text, windows)
             handles.extend(matches if isinstance(matches[0] if matches else '', str) else [m[0] for m in matches])
         return list(set(handles))
     
-    def _extract_reference_numbers(self, text: str) -> List[str]:
+    def _extract_reference_numbers(self, text: str, cues=None, windows=None) -> List[str]:
         """Extract reference/case numbers"""
         refs = []
-        for pattern in self.patterns['reference_numbers']:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self._runnable('reference_numbers', self.compiled_patterns['reference_numbers'], cues):
+            matches = regex_guard.findall(pattern, text, windows)
             for match in matches:
                 if len(match) >= 6:
                     refs.append(match.upper())
         return list(set(refs))
     
-    def extract_from_text(self, text: str) -> Dict:
+    def _digit_spans(self, text: str) -> List[DigitSpan]:
+        """
+        Every number in the text from one scan of its digit runs. A "+CC" prefix and
+        runs written as a phone-style group are folded into one span; runs glued to
+        letters belong to codes (IFSC, references, vehicle numbers) and are skipped.
+        """
+        runs = [match.span() for match in self._digit_run_pattern.finditer(text)]
+        spans = []
+        i = 0
+        while i < len(runs):
+            start, end = runs[i]
+            i += 1
+            if start and _is_word_char(text[start - 1]):
+                continue
+            international = start > 0 and text[start - 1] == '+'
+            span_start = start - 1 if international else start
+            country_code = ''
+            if international and end - start <= 3 and i < len(runs) and _is_group_separator(text[end:runs[i][0]]):
+                country_code = text[start:end]
+                start, end = runs[i]
+                i += 1
+
+            parts = [text[start:end]]
+            if end - start <= _MAX_GROUP_RUN:
+                j, group_end, total = i, end, end - start
+                while (j < len(runs) and _is_group_separator(text[group_end:runs[j][0]])
+                       and 2 <= runs[j][1] - runs[j][0] <= _MAX_GROUP_RUN
+                       and total + runs[j][1] - runs[j][0] <= 15):
+                    parts.append(text[runs[j][0]:runs[j][1]])
+                    group_end, total = runs[j][1], total + runs[j][1] - runs[j][0]
+                    j += 1
+                if len(parts) > 1 and total >= 10:
+                    i, end = j, group_end
+                else:
+                    parts = parts[:1]
+
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            spans.append(DigitSpan(
+                span_start, end, country_code + ''.join(parts), country_code, international, len(parts) > 1
+            ))
+        return spans
+
+    def _classify_digit_spans(
+        self,
+        text: str,
+        phone_context: bool,
+        account_context: bool
+    ) -> Tuple[Set[str], Set[str], Dict[str, float]]:
+        """
+        Decide phone, bank account or neither once per digit span.
+        Returns (phones, accounts, confidence scores); Indian mobiles are reported
+        as their 10 national digits, other international numbers as written.
+        """
+        phones, accounts, scores = set(), set(), {}
+        for span in self._digit_spans(text):
+            digits = span.digits
+            national = digits[len(span.country_code):]
+            if span.international and not span.country_code and len(digits) == 12 and digits.startswith('91'):
+                national = digits[2:]
+            is_mobile = bool(self._indian_mobile_pattern.match(national)) and span.country_code in ('', '91')
+
+            if not span.international and not span.grouped and 9 <= len(digits) <= 18:
+                # A labelled run is an account even when it looks like a mobile number
+                label = text[max(0, span.start - _LABEL_WINDOW):span.start].lower()
+                labelled = bool(self._account_label_pattern.search(label))
+                if labelled or account_context or not is_mobile:
+                    accounts.add(digits)
+                    scores[f'account:{digits}'] = self._calculate_confidence(
+                        digits, 'account', text, account_context or labelled
+                    )
+                    continue
+
+            if is_mobile:
+                phone = national
+            elif span.international and len(digits) > 10:
+                phone = text[span.start:span.end]
+            else:
+                continue
+            phones.add(phone)
+            scores[f'phone:{phone}'] = self._calculate_confidence(phone, 'phone', text, phone_context)
+        return phones, accounts, scores
+
+    def extract_from_text(self, text: MessageText) -> Dict:
         """Extract all intelligence from a single text with confidence scores"""
+        message = normalize(text)
+        text = message.raw
         extracted = {
             'phone_numbers': set(),
             'upi_ids': set(),
@@ -292,187 +520,96 @@ class IntelligenceExtractor:
             'confidence_scores': {},
         }
         
+        budget = AnalysisBudget()
+        # One scan finds which patterns have a candidate; only those run, over
+        # windows computed once for the message
+        cues = self._scan_cues(message) if self.cue_scan else None
+        windows = regex_guard.scan_windows(text)
+
         # Extract using regex patterns
-        for field, patterns in self.patterns.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
+        for field, patterns in self.compiled_patterns.items():
+            if field in self.optional_fields and not budget.allows(field):
+                continue
+            for pattern in self._runnable(field, patterns, cues):
+                matches = regex_guard.findall(pattern, text, windows)
                 for match in matches:
                     if isinstance(match, tuple):
                         match = match[0]
                     extracted[field].add(match)
         
         # Calculate confidence for key items
-        phone_context = self._has_context(text, 'phone_context')
-        upi_context = self._has_context(text, 'upi_context')
-        account_context = self._has_context(text, 'account_context')
-        
-        for phone in extracted['phone_numbers']:
-            conf = self._calculate_confidence(phone, 'phone', text, phone_context)
-            extracted['confidence_scores'][f'phone:{phone}'] = conf
+        phone_context = self._has_context(text, 'phone_context', cues, windows)
+        upi_context = self._has_context(text, 'upi_context', cues, windows)
+        account_context = self._has_context(text, 'account_context', cues, windows)
         
         for upi in extracted['upi_ids']:
             conf = self._calculate_confidence(upi, 'upi', text, upi_context)
             extracted['confidence_scores'][f'upi:{upi}'] = conf
         
-        for link in extracted['phishing_links']:
-            conf = self._calculate_confidence(link, 'link', text, False)
-            extracted['confidence_scores'][f'link:{link}'] = conf
-        
         for wallet in extracted['crypto_wallets']:
             conf = self._calculate_confidence(wallet, 'crypto', text, False)
             extracted['confidence_scores'][f'wallet:{wallet}'] = conf
         
-        # Extract suspicious keywords
-        text_lower = text.lower()
-        for keyword in self.suspicious_keywords:
-            if keyword.lower() in text_lower:
-                extracted['suspicious_keywords'].add(keyword.lower())
+        # Extract suspicious keywords, platforms and places in one gazetteer pass
+        entities = self.gazetteer.find(message.lower)
+        extracted['suspicious_keywords'] = entities.get(SUSPICIOUS_KEYWORD, set())
         
         # Extract person names
-        for name, conf in self._extract_person_names(text):
-            extracted['person_names'].add(name)
-            extracted['confidence_scores'][f'name:{name}'] = conf
+        if budget.allows('person_name_patterns'):
+            for name, conf in self._extract_person_names(text, cues, windows):
+                extracted['person_names'].add(name)
+                extracted['confidence_scores'][f'name:{name}'] = conf
         
         # Extract organization names
-        for org, conf in self._extract_organization_names(text):
-            extracted['organization_names'].add(org)
-            extracted['confidence_scores'][f'org:{org}'] = conf
+        if budget.allows('organization_names'):
+            for org, conf in self._extract_organization_names(text, cues, windows):
+                extracted['organization_names'].add(org)
+                extracted['confidence_scores'][f'org:{org}'] = conf
         
         # Extract payment platforms
-        extracted['payment_platforms'] = set(self._extract_payment_platforms(text))
+        extracted['payment_platforms'] = set(self._extract_payment_platforms(message, entities))
         
         # Extract geographic indicators
-        extracted['geographic_indicators'] = set(self._extract_geographic_indicators(text))
+        extracted['geographic_indicators'] = set(self._extract_geographic_indicators(message, entities))
         
         # Extract social handles
-        extracted['social_handles'] = set(self._extract_social_handles(text))
+        if budget.allows('social_handles'):
+            extracted['social_handles'] = set(self._extract_social_handles(text, cues, windows))
         
         # Extract reference numbers
-        extracted['reference_numbers'] = set(self._extract_reference_numbers(text))
+        if budget.allows('reference_numbers'):
+            extracted['reference_numbers'] = set(self._extract_reference_numbers(text, cues, windows))
+        budget.report("Intelligence extraction")
         
-        # Clean up phishing links
+        # Clean up phishing links (host matched by domain suffix, not substring)
         filtered_links = set()
         for link in extracted['phishing_links']:
-            is_legitimate = any(domain in link.lower() for domain in self.legitimate_domains)
+            is_legitimate = url_analyzer.is_legitimate(link)
             # Keep links that look suspicious or aren't from known legitimate sources
             if not is_legitimate or any(sus in link.lower() for sus in ['verify', 'secure', 'login', 'confirm', 'update']):
                 filtered_links.add(link)
+                conf = self._calculate_confidence(link, 'link', text, False)
+                extracted['confidence_scores'][f'link:{link}'] = conf
         extracted['phishing_links'] = filtered_links
         
-        # 🚨 CROSS-VERIFICATION: Resolve overlaps between Phone and Bank Account
-        final_phones = set()
-        final_accounts = set()
-
-        # Step 1: Identify "strong" account matches (context + long length)
-        for acc in extracted['bank_accounts']:
-            digits = re.sub(r'\D', '', acc)
-            if 9 <= len(digits) <= 18:
-                # If it has "A/C" prefix, it's almost certainly an account
-                if re.search(r'a/c|account|bank', acc.lower()) or account_context:
-                    final_accounts.add(acc)
-                    conf = self._calculate_confidence(acc, 'account', text, account_context)
-                    extracted['confidence_scores'][f'account:{acc}'] = conf
-                else:
-                    # Generic digits - check if it looks like a phone
-                    if not re.match(r'^[6-9]\d{9}$', digits):
-                        final_accounts.add(acc)
-                        conf = self._calculate_confidence(acc, 'account', text, account_context)
-                        extracted['confidence_scores'][f'account:{acc}'] = conf
-
-        # Step 2: Filter phones (must not be in the finalized accounts)
-        for phone in extracted['phone_numbers']:
-            digits = re.sub(r'\D', '', phone).replace('91', '', 1) if '91' in phone else re.sub(r'\D', '', phone)
-            
-            # If this exact digit sequence is already confirmed as an account, skip phone extraction
-            is_captured_as_acc = any(digits in re.sub(r'\D', '', a) for a in final_accounts)
-            
-            if not is_captured_as_acc:
-                # Basic validation for Indian phone (must start with 6-9 if 10 digits)
-                if len(digits) == 10 and re.match(r'^[6-9]', digits):
-                    final_phones.add(phone)
-                    conf = self._calculate_confidence(phone, 'phone', text, phone_context)
-                    extracted['confidence_scores'][f'phone:{phone}'] = conf
-                elif len(digits) > 10: # International or prefix
-                    final_phones.add(phone)
-                    conf = self._calculate_confidence(phone, 'phone', text, phone_context)
-                    extracted['confidence_scores'][f'phone:{phone}'] = conf
-
-        extracted['phone_numbers'] = final_phones
-        extracted['bank_accounts'] = final_accounts
+        # 🚨 CROSS-VERIFICATION: one phone/account decision per digit span
+        phones, accounts, scores = self._classify_digit_spans(text, phone_context, account_context)
+        extracted['phone_numbers'] = phones
+        # Whatever the account pass matched is an IFSC code
+        extracted['bank_accounts'] = {code.upper() for code in extracted['bank_accounts']} | accounts
+        extracted['confidence_scores'].update(scores)
+        # Optional fields were skipped: absent items may still be in the message
+        extracted['degraded'] = budget.degraded
         
         return extracted
     
     def extract_from_conversation(self, messages: List[Message]) -> ExtractedIntelligence:
         """Extract intelligence from entire conversation history"""
-        all_extracted = {
-            'phone_numbers': set(),
-            'upi_ids': set(),
-            'bank_accounts': set(),
-            'phishing_links': set(),
-            'email_addresses': set(),
-            'suspicious_keywords': set(),
-            'person_names': set(),
-            'organization_names': set(),
-            'payment_platforms': set(),
-            'social_handles': set(),
-            'geographic_indicators': set(),
-            'reference_numbers': set(),
-            'crypto_wallets': set(),
-            'vehicle_numbers': set(),
-            'employee_ids': set(),
-        }
-        
-        all_confidence = {}
-        
+        state = IntelligenceState()
         for message in messages:
-            extracted = self.extract_from_text(message.text)
-            for field in all_extracted:
-                all_extracted[field].update(extracted.get(field, set()))
-            
-            # Merge confidence scores (keep highest)
-            for key, conf in extracted.get('confidence_scores', {}).items():
-                if key not in all_confidence or conf > all_confidence[key]:
-                    all_confidence[key] = conf
-        
-        # Build confidence object
-        phone_conf = {k.split(':')[1]: v for k, v in all_confidence.items() if k.startswith('phone:')}
-        upi_conf = {k.split(':')[1]: v for k, v in all_confidence.items() if k.startswith('upi:')}
-        account_conf = {k.split(':')[1]: v for k, v in all_confidence.items() if k.startswith('account:')}
-        link_conf = {k.split(':')[1]: v for k, v in all_confidence.items() if k.startswith('link:')}
-        wallet_conf = {k.split(':')[1]: v for k, v in all_confidence.items() if k.startswith('wallet:')}
-        
-        # Calculate overall quality score
-        total_items = sum(len(v) for v in all_extracted.values())
-        high_conf_items = sum(1 for v in all_confidence.values() if v >= 0.7)
-        overall_score = min(1.0, (high_conf_items * 0.2) + (min(total_items, 10) * 0.08))
-        
-        confidence = IntelligenceConfidence(
-            phoneNumbers=phone_conf,
-            upiIds=upi_conf,
-            bankAccounts=account_conf,
-            phishingLinks=link_conf,
-            cryptoWallets=wallet_conf,
-            overallScore=round(overall_score, 2)
-        )
-        
-        result = ExtractedIntelligence(
-            bankAccounts=list(all_extracted['bank_accounts']),
-            upiIds=list(all_extracted['upi_ids']),
-            phishingLinks=list(all_extracted['phishing_links']),
-            phoneNumbers=list(all_extracted['phone_numbers']),
-            suspiciousKeywords=list(all_extracted['suspicious_keywords']),
-            emailAddresses=list(all_extracted['email_addresses']),
-            personNames=list(all_extracted['person_names']),
-            organizationNames=list(all_extracted['organization_names']),
-            paymentPlatforms=list(all_extracted['payment_platforms']),
-            socialMediaHandles=list(all_extracted['social_handles']),
-            geographicIndicators=list(all_extracted['geographic_indicators']),
-            referenceNumbers=list(all_extracted['reference_numbers']),
-            vehicleNumbers=list(all_extracted.get('vehicle_numbers', set())),
-            employeeIds=list(all_extracted.get('employee_ids', set())),
-            cryptoWallets=list(all_extracted['crypto_wallets']),
-            confidenceScores=confidence
-        )
+            state.add(self.extract_from_text(message.text))
+        result = state.materialize()
+        overall_score = result.confidenceScores.overallScore
         
         log_with_context(
             logger, logging.DEBUG,
@@ -490,24 +627,27 @@ class IntelligenceExtractor:
         existing: ExtractedIntelligence,
         new: ExtractedIntelligence
     ) -> ExtractedIntelligence:
-        """Merge new intelligence with existing"""
+        """
+        Merge new intelligence with existing (order-preserving)
+        Sessions accumulate per message with IntelligenceState.add instead.
+        """
         # Merge basic lists
         merged = ExtractedIntelligence(
-            bankAccounts=list(set(existing.bankAccounts + new.bankAccounts)),
-            upiIds=list(set(existing.upiIds + new.upiIds)),
-            phishingLinks=list(set(existing.phishingLinks + new.phishingLinks)),
-            phoneNumbers=list(set(existing.phoneNumbers + new.phoneNumbers)),
-            suspiciousKeywords=list(set(existing.suspiciousKeywords + new.suspiciousKeywords)),
-            emailAddresses=list(set(existing.emailAddresses + new.emailAddresses)),
-            personNames=list(set(existing.personNames + new.personNames)),
-            organizationNames=list(set(existing.organizationNames + new.organizationNames)),
-            paymentPlatforms=list(set(existing.paymentPlatforms + new.paymentPlatforms)),
-            socialMediaHandles=list(set(existing.socialMediaHandles + new.socialMediaHandles)),
-            geographicIndicators=list(set(existing.geographicIndicators + new.geographicIndicators)),
-            referenceNumbers=list(set(existing.referenceNumbers + new.referenceNumbers)),
-            cryptoWallets=list(set(existing.cryptoWallets + new.cryptoWallets)),
-            vehicleNumbers=list(set(existing.vehicleNumbers + new.vehicleNumbers)),
-            employeeIds=list(set(existing.employeeIds + new.employeeIds)),
+            bankAccounts=list(dict.fromkeys(existing.bankAccounts + new.bankAccounts)),
+            upiIds=list(dict.fromkeys(existing.upiIds + new.upiIds)),
+            phishingLinks=list(dict.fromkeys(existing.phishingLinks + new.phishingLinks)),
+            phoneNumbers=list(dict.fromkeys(existing.phoneNumbers + new.phoneNumbers)),
+            suspiciousKeywords=list(dict.fromkeys(existing.suspiciousKeywords + new.suspiciousKeywords)),
+            emailAddresses=list(dict.fromkeys(existing.emailAddresses + new.emailAddresses)),
+            personNames=list(dict.fromkeys(existing.personNames + new.personNames)),
+            organizationNames=list(dict.fromkeys(existing.organizationNames + new.organizationNames)),
+            paymentPlatforms=list(dict.fromkeys(existing.paymentPlatforms + new.paymentPlatforms)),
+            socialMediaHandles=list(dict.fromkeys(existing.socialMediaHandles + new.socialMediaHandles)),
+            geographicIndicators=list(dict.fromkeys(existing.geographicIndicators + new.geographicIndicators)),
+            referenceNumbers=list(dict.fromkeys(existing.referenceNumbers + new.referenceNumbers)),
+            cryptoWallets=list(dict.fromkeys(existing.cryptoWallets + new.cryptoWallets)),
+            vehicleNumbers=list(dict.fromkeys(existing.vehicleNumbers + new.vehicleNumbers)),
+            employeeIds=list(dict.fromkeys(existing.employeeIds + new.employeeIds)),
         )
         
         # Merge confidence scores (keep highest)
@@ -584,5 +724,5 @@ class IntelligenceExtractor:
         return min(score, 1.0)
 
 
-# Global instance
-extractor = IntelligenceExtractor()
+# Global instance (built on first use)
+extractor = LazySingleton(IntelligenceExtractor)
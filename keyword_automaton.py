@@ -0,0 +1,123 @@
+"""
+Multi-Pattern Keyword Automaton
+Aho-Corasick matcher used to scan a message for every keyword family in one pass
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of keyword entries.
+
+    Each entry is a (pattern, payload) pair. The same pattern may be added
+    several times with different payloads (e.g. "block" is both an urgency
+    and a threat keyword); every entry gets its own id, assigned in insertion
+    order, so callers can replay hits in the order the entries were declared.
+    Matching is plain substring semantics (`pattern in text`), overlaps included.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Any]] = ()):
+        self.patterns: List[str] = []
+        self.payloads: List[Any] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[Tuple[int, ...]] = [()]
+        self._built = False
+
+        for pattern, payload in entries:
+            self.add(pattern, payload)
+        if self.patterns:
+            self.build()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def add(self, pattern: str, payload: Any = None) -> int:
+        """Add a keyword entry and return its entry id"""
+        if not pattern:
+            raise ValueError("KeywordAutomaton patterns must be non-empty")
+
+        entry_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self.payloads.append(payload)
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._outputs.append(())
+            state = nxt
+        self._outputs[state] = self._outputs[state] + (entry_id,)
+        self._built = False
+        return entry_id
+
+    def build(self) -> None:
+        """Compute failure links and merge outputs along them (BFS order)"""
+        fail = [0] * len(self._goto)
+        queue = deque()
+
+        for child in self._goto[0].values():
+            fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                f = fail[state]
+                while f and ch not in self._goto[f]:
+                    f = fail[f]
+                fail[child] = self._goto[f].get(ch, 0)
+                if self._outputs[fail[child]]:
+                    self._outputs[child] = self._outputs[child] + self._outputs[fail[child]]
+
+        self._fail = fail
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield (end_index, entry_id) for every occurrence of every entry
+        End index is exclusive, so the match is text[end - len(pattern):end]
+        """
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                for entry_id in outputs[state]:
+                    yield i + 1, entry_id
+
+    def matched_ids(self, text: str) -> Set[int]:
+        """Return the ids of every entry that occurs at least once in text"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        state = 0
+        found: Set[int] = set()
+
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+
+        return found
+
+    def hits(self, text: str) -> List[Tuple[str, Any]]:
+        """Return (pattern, payload) for every matched entry, in declaration order"""
+        return [(self.patterns[i], self.payloads[i]) for i in sorted(self.matched_ids(text))]
@@ -0,0 +1,55 @@
+"""
+Lazy Module Singletons
+Stand-ins for module-level global instances that are only built on first use,
+so `import main` does not pay for model loading or pattern compilation
+"""
+import threading
+from typing import Any, Callable
+
+
+class LazySingleton:
+    """
+    Proxy for a global instance, built by factory() on first attribute access.
+
+    `from module import instance` stays cheap; every attribute read or write is
+    forwarded to the real object, which is built exactly once even if several
+    threads touch it at the same time.
+    """
+
+    __slots__ = ("__factory", "__instance", "__lock")
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_LazySingleton__factory", factory)
+        object.__setattr__(self, "_LazySingleton__instance", None)
+        object.__setattr__(self, "_LazySingleton__lock", threading.Lock())
+
+    def _resolve(self) -> Any:
+        instance = self.__instance
+        if instance is None:
+            with self.__lock:
+                instance = self.__instance
+                if instance is None:
+                    instance = self.__factory()
+                    object.__setattr__(self, "_LazySingleton__instance", instance)
+        return instance
+
+    @property
+    def _built(self) -> bool:
+        return self.__instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self.__factory.__name__}: {'built' if self._built else 'not built'}>"
+
+
+def unwrap(obj: Any) -> Any:
+    """The real object behind a LazySingleton (building it if needed), or obj itself"""
+    return obj._resolve() if isinstance(obj, LazySingleton) else obj
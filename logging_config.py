@@ -313,6 +313,7 @@ class APILogger:
         confidence: float,
         scam_type: str,
         keywords: list,
+        campaign_id: str = None,
     ):
         """Log scam detection results"""
         log_with_context(
@@ -324,6 +325,7 @@ class APILogger:
             confidence=round(confidence, 4),
             scam_type=scam_type,
             keywords_count=len(keywords),
+            campaign_id=campaign_id,
         )
     
     def log_intelligence_extraction(
@@ -23,6 +23,9 @@ from config import (
     RATE_LIMIT_CONFIG,
     SESSION_CLEANUP_INTERVAL_SECONDS,
     GUVI_CALLBACK_URL,
+    DETECTION_CASCADE_CONFIG,
+    BACKGROUND_TRAINING_CONFIG,
+    STAGE_METRICS_CONFIG,
 )
 from models import (
     IncomingRequest,
@@ -34,14 +37,27 @@ from models import (
     APIStats,
 )
 from scam_detector import detector
+from detection_cache import detection_cache
+from campaign_index import CampaignMatch, campaign_index
+from url_analyzer import url_analyzer
+from detector_service import detector_service
+from background_trainer import background_trainer
+from text_normalizer import normalize
 from ai_agent import reasoning_agent as agent
 from session_manager import session_manager
+from intelligence_extractor import extractor
+from scammer_profiler import profiler
+from lazy_singleton import unwrap
+from pattern_registry import pattern_registry
+from stage_metrics import stage_metrics
 from exceptions import (
     HoneypotException,
     SessionNotFoundError,
     InvalidAPIKeyError,
     RateLimitError,
     ValidationError,
+    TrainingJobNotFoundError,
+    TrainingInProgressError,
 )
 from logging_config import (
     setup_logging,
@@ -153,24 +169,62 @@ async def send_guvi_callback(session_id: str, session):
 
 # ============== Lifespan ==============
 
+def _on_model_swap():
+    """Cached verdicts and worker processes came from the previous model"""
+    detection_cache.clear()
+    campaign_index.invalidate_verdicts()
+    detector_service.restart()
+
+
+background_trainer.add_swap_listener(_on_model_swap)
+
+
+def build_singletons() -> None:
+    """
+    Build the lazy global instances now. Called by the lifespan of a long-running
+    server, and by the gunicorn master before it forks workers when the app is
+    preloaded, so the workers share one copy of the model (see gunicorn.conf.py)
+    """
+    for instance in (detector, agent, session_manager, extractor, profiler):
+        unwrap(instance)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("Starting Honey-Pot API...")
     
-    # Train model if needed
-    if not detector.is_trained:
-        logger.info("Training scam detection model...")
-        detector.train_model()
+    # Singletons are built on first use; a long-running server builds them now
+    # so the first request doesn't pay for it (no-op when the gunicorn master already did)
+    build_singletons()
+    pattern_registry.log_report()
+    
+    # Never train in-process: serve rules-only until a background run hot-swaps a model in
+    if detector.is_trained:
+        logger.info(f"Loaded model artifact {detector.model_version}")
+    elif BACKGROUND_TRAINING_CONFIG["train_on_startup"]:
+        logger.warning("No model artifact found; running rules-only while the model trains in the background")
+        if background_trainer.start() is None:
+            logger.info("Another worker is training; its model is loaded once saved")
+    else:
+        logger.warning("No model artifact found; running rules-only")
+    
+    # Worker processes load the saved model artifact
+    detector_service.start()
     
     # Start background cleanup task
     cleanup_task = asyncio.create_task(periodic_cleanup())
+    # Pick up models saved by other workers' training jobs or offline trainers
+    artifact_task = asyncio.create_task(background_trainer.watch_artifacts())
     
     logger.info("Honey-Pot API is ready!")
     yield
     
     # Cleanup on shutdown
     cleanup_task.cancel()
+    artifact_task.cancel()
+    background_trainer.shutdown()
+    detector_service.shutdown()
     logger.info("Honey-Pot API shutting down...")
 
 
@@ -303,14 +357,18 @@ async def health_check():
     
     Returns system status including:
     - API health status
-    - Model training status
+    - Readiness: "ready" with an ML model, "degraded" while running rules-only
+    - Model version and background training state
     - Gemini AI configuration status
     - Active session count
     """
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
+        "readiness": "ready" if detector.is_trained else "degraded",
         "model_trained": detector.is_trained,
+        "model_version": detector.model_version,
+        "training": background_trainer.get_status(),
         "gemini_configured": agent.configured,
         "active_sessions": len(session_manager.sessions),
         "version": "2.0.0"
@@ -336,6 +394,7 @@ async def process_message(
     Accepts various body formats for maximum compatibility.
     """
     start_time = time.time()
+    trace = stage_metrics.start_trace() if STAGE_METRICS_CONFIG["timings_in_notes"] else None
     
     # 1. READ RAW BODY
     raw_body_text = ""
@@ -420,28 +479,76 @@ async def process_message(
     try:
         # Detect scam with enhanced analysis (Rule-based first)
         message = message_obj 
+        # Normalized once and shared by detection, analytics, persona emotion and extraction
+        normalized = normalize(message.text)
         
-        # Get conversation context (heuristic)
-        context = [] 
-        if isinstance(raw_json, dict) and "conversationHistory" in raw_json:
-             pass 
-
-        is_scam, confidence, scam_type, keywords, classification, threat_level = detector.detect(
-            message.text, context=context
-        )
-        
-        # 🧠 HYBRID UPGRADE: If Rule-based missed it, check Semantic Intent with LLM
-        if not is_scam and len(message.text) > 20 and agent.configured:
-            llm_is_scam, llm_conf, llm_reason = await agent.analyze_scam_intent(message.text)
+        # Get conversation context: earlier scammer messages of this session.
+        # The session's detection state lets context analysis and the ML stage reuse earlier work.
+        context = []
+        detection_state = None
+        existing_session = session_manager.sessions.get(session_id)
+        if existing_session is not None:
+            context = [m.text for m in existing_session.conversation_history if m.sender != "user"]
+            detection_state = existing_session.detection_state
+
+        # Repeated campaign templates are served from the verdict cache
+        cache_key = detection_cache.make_key(message.text, context)
+        cached = detection_cache.get(cache_key)
+        campaign = CampaignMatch(None, None, None)
+        if cached is None:
+            # Near-duplicates (new UPI, amount or name) of a confident scam reuse its verdict
+            with stage_metrics.span("api.campaign_lookup"):
+                campaign = campaign_index.lookup(normalized, context)
+        if cached is not None:
+            is_scam, confidence, scam_type, keywords, classification, threat_level = cached
+        elif campaign.verdict is not None:
+            is_scam, confidence, scam_type, keywords, classification, threat_level = campaign.verdict
+            campaign_index.record_reuse()
+            detector.record_cascade_exit("campaign")
+        else:
+            with stage_metrics.span("api.detect"):
+                is_scam, confidence, scam_type, keywords, classification, threat_level = await detector_service.detect(
+                    normalized, context=context, detection_state=detection_state
+                )
             
-            if llm_is_scam and llm_conf > 0.4:
-                logger.warning(f"Semantic Override: LLM detected scam where Rules failed. Reason: {llm_reason}")
-                is_scam = True
-                confidence = max(confidence, llm_conf)
-                scam_type = "Sophisticated_Scam" # Generic type for LLM catch
-                keywords.append("AI_SEMANTIC_DETECTION")
-                classification.scamType = scam_type
-                classification.confidence = llm_conf
+            # 🧠 HYBRID UPGRADE: If Rule-based missed it, check Semantic Intent with LLM
+            # Only borderline verdicts are worth an LLM round trip
+            llm_low, llm_high = DETECTION_CASCADE_CONFIG["llm_band"]
+            in_llm_band = (
+                not is_scam
+                and len(message.text) > DETECTION_CASCADE_CONFIG["llm_min_chars"]
+                and llm_low <= confidence <= llm_high
+            )
+            if not is_scam and not in_llm_band:
+                detector.record_cascade_exit("llm_skipped")
+            if in_llm_band and agent.configured:
+                detector.record_cascade_exit("llm")
+                with stage_metrics.span("api.llm_check"):
+                    llm_is_scam, llm_conf, llm_reason = await agent.analyze_scam_intent(message.text)
+                
+                if llm_is_scam and llm_conf > 0.4:
+                    logger.warning(f"Semantic Override: LLM detected scam where Rules failed. Reason: {llm_reason}")
+                    is_scam = True
+                    confidence = max(confidence, llm_conf)
+                    scam_type = "Sophisticated_Scam" # Generic type for LLM catch
+                    keywords.append("AI_SEMANTIC_DETECTION")
+                    classification.scamType = scam_type
+                    classification.confidence = llm_conf
+            
+            # A verdict that skipped stages to stay within the analysis budget depends
+            # on load, so it is neither cached nor indexed
+            if not classification.degraded:
+                detection_cache.put(
+                    cache_key,
+                    (is_scam, confidence, scam_type, keywords, classification, threat_level)
+                )
+        campaign_id = None
+        if not classification.degraded:
+            # Only the detector's own context-free verdicts may be reused by later near-duplicates
+            campaign_id = campaign_index.record(
+                campaign, (is_scam, confidence, scam_type, keywords, classification, threat_level),
+                reusable=campaign.verdict is None and not context
+            )
         
         # Log detection result
         api_logger.log_scam_detection(
@@ -449,7 +556,8 @@ async def process_message(
             is_scam=is_scam,
             confidence=confidence,
             scam_type=scam_type,
-            keywords=keywords
+            keywords=keywords,
+            campaign_id=campaign_id
         )
         
         # Update session
@@ -457,16 +565,18 @@ async def process_message(
         if isinstance(raw_json, dict) and raw_json.get("metadata"):
              forced_persona = raw_json["metadata"].get("forcedPersona")
 
-        session = await session_manager.update_session(
-            session_id=session_id,
-            message=message,
-            is_scam=is_scam,
-            confidence=confidence,
-            scam_type=scam_type,
-            keywords=keywords,
-            threat_level=threat_level,
-            forced_persona=forced_persona
-        )
+        with stage_metrics.span("api.session_update"):
+            session = await session_manager.update_session(
+                session_id=session_id,
+                message=message,
+                is_scam=is_scam,
+                confidence=confidence,
+                scam_type=scam_type,
+                keywords=keywords,
+                threat_level=threat_level,
+                forced_persona=forced_persona,
+                normalized=normalized
+            )
         
         # Build response
         response = APIResponse(
@@ -487,10 +597,12 @@ async def process_message(
         # Generate agent response for EVERY message
         if (is_scam or session.scam_detected) and not session.engagement_complete:
             try:
-                agent_response, agent_notes, delay_ms = await agent.generate_response(session, message.text)
+                with stage_metrics.span("api.agent"):
+                    agent_response, agent_notes, delay_ms = await agent.generate_response(session, message.text)
                 
                 # Apply delay to simulate human typing
-                await asyncio.sleep(delay_ms / 1000.0)
+                with stage_metrics.span("api.delay"):
+                    await asyncio.sleep(delay_ms / 1000.0)
                 
                 await session_manager.add_agent_response(session_id, agent_response, agent_notes)
                 response.reply = agent_response
@@ -516,6 +628,9 @@ async def process_message(
         
         # Log response
         duration_ms = (time.time() - start_time) * 1000
+        stage_metrics.record("api.total", int(duration_ms * 1e6))
+        if trace is not None:
+            response.agentNotes = f"{response.agentNotes or ''} [timings: {stage_metrics.format_trace(trace)}]".strip()
         api_logger.log_response(
             status_code=200,
             duration_ms=duration_ms,
@@ -626,28 +741,36 @@ async def complete_engagement(
         raise
 
 
-@app.post("/api/train", tags=["ML Model"])
+@app.post("/api/train", status_code=202, tags=["ML Model"])
 async def train_model(api_key: str = Depends(verify_api_key)):
     """
-    Retrain the ML model on the dataset
+    Start a background job that retrains the ML model
     
     This will:
-    1. Load the scam dataset
-    2. Train a new Gradient Boosting model
-    3. Save the model for future use
+    1. Train a new model on the datasets in a child process
+    2. Save it as a new versioned model artifact
+    3. Hot-swap it into the live detector and clear cached verdicts
+    
+    Poll GET /api/train/{job_id} for progress and metrics.
     """
-    try:
-        accuracy = detector.train_model()
-        if accuracy:
-            return {
-                "status": "success",
-                "accuracy": f"{accuracy:.2%}",
-                "message": "Model trained successfully"
-            }
-        raise HTTPException(status_code=500, detail="Training failed")
-    except Exception as e:
-        logger.exception(f"Training error: {e}")
-        raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
+    job = background_trainer.start()
+    if job is None:
+        # Running here or in another worker
+        raise TrainingInProgressError(background_trainer.active_job_id() or "unknown")
+    return {
+        "status": "accepted",
+        "jobId": job.id,
+        "statusUrl": f"/api/train/{job.id}",
+    }
+
+
+@app.get("/api/train/{job_id}", tags=["ML Model"])
+async def training_job_status(job_id: str, api_key: str = Depends(verify_api_key)):
+    """Get the state, phase and (once finished) metrics of a training job"""
+    job = background_trainer.get_job(job_id)
+    if job is None:
+        raise TrainingJobNotFoundError(job_id)
+    return job.to_dict()
 
 
 @app.get("/api/stats", response_model_exclude_none=True, tags=["Analytics"])
@@ -667,9 +790,27 @@ async def get_stats(api_key: str = Depends(verify_api_key)):
         **analytics,
         "modelTrained": detector.is_trained,
         "geminiEnabled": agent.configured,
+        "detectionCache": detection_cache.get_stats(),
+        "detectorService": detector_service.get_stats(),
+        "detectionCascade": detector.get_cascade_stats(),
+        "patternRegistry": pattern_registry.get_stats(),
+        "campaigns": campaign_index.get_stats(),
+        "urls": url_analyzer.get_stats(),
     }
 
 
+@app.get("/api/metrics", tags=["Analytics"])
+async def get_metrics(api_key: str = Depends(verify_api_key)):
+    """
+    Per-stage latency percentiles (p50/p95/p99, mean, max in ms)
+    
+    Stages: detector.* (rules, sentiment, social, context, kill_switch,
+    scam_type, ml), api.* (campaign_lookup, detect, llm_check, session_update, agent, delay,
+    total) and session.extraction. Histograms cover this process since startup.
+    """
+    return stage_metrics.get_stats()
+
+
 @app.get("/api/scammer-profiles", tags=["Analytics"])
 async def get_scammer_profiles(
     limit: int = 15,
@@ -678,7 +819,6 @@ async def get_scammer_profiles(
     """
     Get known scammer profiles from persistent cross-session analysis
     """
-    from scammer_profiler import profiler
     all_profiles = []
     
     # Flatten categories from persistent DB
@@ -0,0 +1,141 @@
+"""
+PER-WORKER MEMORY REPORT
+Starts gunicorn with N workers, once with private model copies and once with
+GUNICORN_PRELOAD=true (model loaded in the master, pages shared after fork,
+gc.freeze), and reports each worker's unique (USS), proportional (PSS) and
+resident (RSS) memory from /proc/<pid>/smaps_rollup. Linux only.
+
+Usage: python measure_worker_memory.py [workers]          (default 4)
+       python measure_worker_memory.py --pid <master pid>  (report a running gunicorn)
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+# --- CONFIGURATION ---
+DEFAULT_WORKERS = 4
+STARTUP_TIMEOUT_SECONDS = 120
+SETTLE_SECONDS = 3
+WARMUP_REQUESTS = 20
+
+
+def memory_of(pid: int) -> Dict[str, float]:
+    """RSS, PSS and USS of a process in MB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "uss": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def children_of(pid: int) -> List[int]:
+    """Direct child PIDs (gunicorn workers of a master)"""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Fields after the parenthesised command name: state, ppid, ...
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def report(master_pid: int, label: str) -> Dict[str, float]:
+    workers = children_of(master_pid)
+    print(f"\n{label} (master {master_pid}, {len(workers)} workers)")
+    print(f"{'PID':>8s} {'USS':>9s} {'PSS':>9s} {'RSS':>9s}")
+    totals = {"uss": 0.0, "pss": 0.0, "rss": 0.0}
+    for pid in [master_pid] + workers:
+        stats = memory_of(pid)
+        name = "master" if pid == master_pid else str(pid)
+        print(f"{name:>8s} {stats['uss']:7.1f}MB {stats['pss']:7.1f}MB {stats['rss']:7.1f}MB")
+        for key in totals:
+            totals[key] += stats[key]
+    print(f"{'total':>8s} {totals['uss']:7.1f}MB {totals['pss']:7.1f}MB {'':>9s}")
+    if workers:
+        per_worker = sum(memory_of(pid)["uss"] for pid in workers) / len(workers)
+        print(f"Mean worker USS: {per_worker:.1f}MB")
+    return totals
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_serving(port: int, master: subprocess.Popen, workers: int) -> None:
+    deadline = time.time() + STARTUP_TIMEOUT_SECONDS
+    while time.time() < deadline:
+        if master.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {master.returncode}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=2).read()
+            if len(children_of(master.pid)) >= workers:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("gunicorn did not start in time")
+
+
+def measure(workers: int, preload: bool) -> Dict[str, float]:
+    """Start gunicorn, warm it up, report worker memory and stop it"""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_PRELOAD="true" if preload else "false",
+        TRAIN_ON_STARTUP="false",
+        DETECTOR_WORKERS="0",
+    )
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_serving(port, master, workers)
+        for _ in range(WARMUP_REQUESTS):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=5).read()
+        time.sleep(SETTLE_SECONDS)
+        return report(master.pid, f"preload={'on' if preload else 'off'}")
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            master.kill()
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--pid":
+        report(int(sys.argv[2]), "gunicorn")
+        return
+
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_WORKERS
+    private = measure(workers, preload=False)
+    shared = measure(workers, preload=True)
+    print(f"\nTotal PSS with {workers} workers: {private['pss']:.1f}MB without preload, "
+          f"{shared['pss']:.1f}MB with preload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Versioned Model Artifacts
+Saves the model and vectorizer with a manifest (version, trainer, accuracy, file hashes)
+and loads them back only when the files on disk match that manifest.
+joblib and sklearn are imported on use to keep them off the API's import path.
+"""
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger("honeypot.model_artifacts")
+
+# Bump when the on-disk layout changes
+ARTIFACT_FORMAT = 1
+UNVERSIONED = "unversioned"
+
+
+def manifest_path(model_path: str) -> str:
+    """Manifest sits next to the model: models/scam_detector.joblib -> models/scam_detector.manifest.json"""
+    return os.path.splitext(model_path)[0] + ".manifest.json"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def temp_path(path: str) -> str:
+    """Temp file name next to path, unique per writer (several processes may save at once)"""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+
+
+def _atomic_dump(obj: Any, path: str) -> None:
+    """Write to a temp file and rename, so readers never see a half-written file"""
+    import joblib
+
+    tmp_path = temp_path(path)
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_artifacts(
+    model: Any,
+    vectorizer: Any,
+    model_path: str,
+    vectorizer_path: str,
+    accuracy: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Save model + vectorizer and then their manifest
+    The manifest is written last, so a crash mid-save leaves hashes that no longer
+    match and load_artifacts() refuses the mixed pair.
+    """
+    import sklearn
+
+    os.makedirs(os.path.dirname(model_path) or "models", exist_ok=True)
+    _atomic_dump(model, model_path)
+    _atomic_dump(vectorizer, vectorizer_path)
+
+    model_hash = _sha256(model_path)
+    created_at = datetime.now(timezone.utc)
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": f"{created_at.strftime('%Y%m%d%H%M%S')}-{model_hash[:8]}",
+        "created_at": created_at.isoformat(),
+        "trainer": type(model).__name__,
+        "vectorizer": type(vectorizer).__name__,
+        "accuracy": accuracy,
+        "sklearn_version": sklearn.__version__,
+        "files": {
+            "model": {"path": os.path.basename(model_path), "sha256": model_hash},
+            "vectorizer": {"path": os.path.basename(vectorizer_path), "sha256": _sha256(vectorizer_path)},
+        },
+    }
+    write_json(manifest, manifest_path(model_path))
+    logger.info(f"Model artifact {manifest['version']} saved to {model_path}")
+    return manifest
+
+
+def write_json(data: Dict[str, Any], path: str) -> None:
+    """Atomically replace a small JSON file"""
+    tmp_path = temp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(model_path: str) -> Optional[Dict[str, Any]]:
+    """Manifest for a model path, or None if there is none"""
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_artifacts(
+    model_path: str,
+    vectorizer_path: str,
+    mmap_mode: Optional[str] = None
+) -> Optional[Tuple[Any, Any, Dict[str, Any]]]:
+    """
+    Load (model, vectorizer, manifest), or None if no artifact exists
+    Raises ValueError when the files do not match their manifest. Artifacts saved
+    before manifests existed still load, with version "unversioned".
+    With mmap_mode ("r"), NumPy arrays inside the pickles are memory-mapped rather
+    than copied; save_artifacts() replaces files by rename, so a mapped file is
+    never overwritten underneath a running process.
+    """
+    import joblib
+    import sklearn
+
+    if not (os.path.exists(model_path) and os.path.exists(vectorizer_path)):
+        return None
+
+    manifest = read_manifest(model_path)
+    if manifest is None:
+        manifest = {"format": 0, "version": UNVERSIONED}
+    else:
+        files = manifest.get("files", {})
+        for name, path in (("model", model_path), ("vectorizer", vectorizer_path)):
+            if files.get(name, {}).get("sha256") != _sha256(path):
+                raise ValueError(f"{name} file {path} does not match manifest {manifest.get('version')}")
+        if manifest.get("sklearn_version") != sklearn.__version__:
+            logger.warning(
+                f"Model artifact {manifest['version']} was built with scikit-learn "
+                f"{manifest.get('sklearn_version')}, running {sklearn.__version__}"
+            )
+
+    return (
+        joblib.load(model_path, mmap_mode=mmap_mode),
+        joblib.load(vectorizer_path, mmap_mode=mmap_mode),
+        manifest,
+    )
@@ -2,7 +2,7 @@
 Pydantic Models for API Request/Response
 Enhanced with engagement phases, threat levels, and confidence scoring
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
@@ -123,6 +123,7 @@ class ScamClassification(BaseModel):
     confidence: float = Field(default=0.0)
     alternativeTypes: List[Dict[str, float]] = Field(default=[], description="Alternative classifications")
     tacticsIdentified: List[str] = Field(default=[])
+    degraded: bool = Field(default=False, description="Optional stages were skipped to stay within the analysis budget")
 
 
 class APIResponse(BaseModel):
@@ -195,6 +196,116 @@ class ResponseQuality(BaseModel):
     hinglish_ratio: float = Field(default=0.0, description="0-1 ratio of Hinglish usage")
 
 
+class MessageFeatures(BaseModel):
+    """Cached ML term counts for one message (see ScamDetector._message_features)"""
+    counts: Dict[int, int] = Field(default_factory=dict, description="Vocabulary index -> n-gram count")
+    edge_tokens: List[Optional[str]] = Field(default_factory=list, description="Leading/trailing tokens for boundary n-grams")
+
+
+class DetectionState(BaseModel):
+    """Incremental per-session detection state carried across turns by ScamDetector"""
+    messages_seen: int = Field(default=0, description="Scammer messages folded into this state")
+    last_message: str = Field(default="", description="Last folded message, used to validate the state")
+    matched_stages: Dict[str, List[int]] = Field(default_factory=dict, description="Progression type -> matched stage indices")
+    urgency_counts: List[int] = Field(default_factory=list, description="Urgency keyword counts of the last 4 messages")
+    courier_seen: bool = Field(default=False)
+    authority_seen: bool = Field(default=False)
+    tail: str = Field(default="", description="Carry-over window of the lowercased conversation")
+    long_runs: bool = Field(default=False, description="Conversation has runs too long for windowed matching")
+    ml_features: Dict[str, MessageFeatures] = Field(default_factory=dict, description="Message text -> cached term counts")
+    ml_vocabulary: str = Field(default="", description="ModelBundle.vocabulary the cached counts belong to")
+
+
+# extract_from_text() keys -> ExtractedIntelligence fields
+INTELLIGENCE_FIELDS = {
+    'bank_accounts': 'bankAccounts',
+    'upi_ids': 'upiIds',
+    'phishing_links': 'phishingLinks',
+    'phone_numbers': 'phoneNumbers',
+    'crypto_wallets': 'cryptoWallets',
+    'suspicious_keywords': 'suspiciousKeywords',
+    'email_addresses': 'emailAddresses',
+    'person_names': 'personNames',
+    'organization_names': 'organizationNames',
+    'payment_platforms': 'paymentPlatforms',
+    'social_handles': 'socialMediaHandles',
+    'geographic_indicators': 'geographicIndicators',
+    'reference_numbers': 'referenceNumbers',
+    'vehicle_numbers': 'vehicleNumbers',
+    'employee_ids': 'employeeIds',
+}
+
+# confidence_scores key prefix -> IntelligenceConfidence field
+CONFIDENCE_FIELDS = {
+    'phone': 'phoneNumbers',
+    'upi': 'upiIds',
+    'account': 'bankAccounts',
+    'link': 'phishingLinks',
+    'wallet': 'cryptoWallets',
+}
+
+
+class IntelligenceState(BaseModel):
+    """
+    Per-session intelligence accumulated in place, one message at a time.
+    Each field is an insertion-ordered set (dict keys) and confidences keep the
+    highest score seen, so a turn costs O(new items); the ExtractedIntelligence
+    model is only built when read, and reused until something new arrives.
+    """
+    items: Dict[str, Dict[str, None]] = Field(default_factory=dict, description="ExtractedIntelligence field -> ordered set of items")
+    confidence: Dict[str, Dict[str, float]] = Field(default_factory=dict, description="Confidence key prefix ('phone', 'upi', ...) -> item -> highest confidence")
+    high_confidence_items: int = Field(default=0, description="Confidences at or above 0.7")
+    _materialized: Optional[ExtractedIntelligence] = PrivateAttr(default=None)
+
+    def add(self, extracted: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Fold in one extract_from_text() result; returns the items not seen before, per field"""
+        added: Dict[str, List[str]] = {}
+        for key, field in INTELLIGENCE_FIELDS.items():
+            values = extracted.get(key)
+            if not values:
+                continue
+            seen = self.items.setdefault(field, {})
+            # Sorted so items from the same message land in a stable order
+            new = sorted(value for value in values if value not in seen)
+            if new:
+                seen.update(dict.fromkeys(new))
+                added[field] = new
+
+        changed = bool(added)
+        for key, conf in extracted.get('confidence_scores', {}).items():
+            prefix, _, item = key.partition(':')
+            scores = self.confidence.setdefault(prefix, {})
+            previous = scores.get(item)
+            if previous is None or conf > previous:
+                scores[item] = conf
+                if conf >= 0.7 and (previous is None or previous < 0.7):
+                    self.high_confidence_items += 1
+                changed = True
+        if changed:
+            self._materialized = None
+        return added
+
+    def count(self, field: str) -> int:
+        """Number of items in an ExtractedIntelligence field, without materializing"""
+        return len(self.items.get(field, ()))
+
+    def materialize(self) -> ExtractedIntelligence:
+        """ExtractedIntelligence view of the state (cached and shares the score dicts; treat as read-only)"""
+        if self._materialized is None:
+            total_items = sum(len(items) for items in self.items.values())
+            overall_score = min(1.0, (self.high_confidence_items * 0.2) + (min(total_items, 10) * 0.08))
+            # Everything here was validated on the way in, so skip re-validating it per read
+            confidence = IntelligenceConfidence.model_construct(
+                **{field: self.confidence.get(prefix, {}) for prefix, field in CONFIDENCE_FIELDS.items()},
+                overallScore=round(overall_score, 2)
+            )
+            self._materialized = ExtractedIntelligence.model_construct(
+                **{field: list(self.items.get(field, ())) for field in INTELLIGENCE_FIELDS.values()},
+                confidenceScores=confidence
+            )
+        return self._materialized
+
+
 class SessionState(BaseModel):
     """Internal state for tracking a conversation session"""
     session_id: str
@@ -204,7 +315,7 @@ class SessionState(BaseModel):
     start_time: datetime = Field(default_factory=datetime.now)
     last_activity: datetime = Field(default_factory=datetime.now)
     conversation_history: List[Message] = Field(default_factory=list)
-    extracted_intelligence: ExtractedIntelligence = Field(default_factory=ExtractedIntelligence)
+    intelligence: IntelligenceState = Field(default_factory=IntelligenceState)
     scam_type: Optional[str] = None
     persona: str = "naive_victim"
     agent_notes: List[str] = Field(default_factory=list)
@@ -221,6 +332,12 @@ class SessionState(BaseModel):
     callback_attempts: int = Field(default=0)
     response_quality: ResponseQuality = Field(default_factory=ResponseQuality)
     scammer_profile: ScammerProfile = Field(default_factory=ScammerProfile)
+    detection_state: DetectionState = Field(default_factory=DetectionState)
+
+    @property
+    def extracted_intelligence(self) -> ExtractedIntelligence:
+        """Accumulated intelligence as the API model (built lazily from self.intelligence)"""
+        return self.intelligence.materialize()
 
 
 class GUVICallbackPayload(BaseModel):
@@ -0,0 +1,81 @@
+"""
+Central Regex Pattern Registry
+Every module compiles its regexes here once, at construction, and keeps the
+returned handles; nothing on the request path goes through re's module cache
+"""
+import re
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Pattern, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger("honeypot.pattern_registry")
+
+
+class PatternRegistry:
+    """
+    Named, compiled regex handles shared across modules.
+
+    Names are dotted, "<module>.<purpose>" (e.g. "extractor.upi_ids.0"); the
+    first component is used to group the startup report. Identical
+    (pattern, flags) pairs are compiled once and shared between names.
+    Re-registering a name (a second ScamDetector, a reloaded config) replaces
+    the handle.
+    """
+
+    def __init__(self):
+        self._by_name: Dict[str, Pattern] = {}
+        self._by_source: Dict[Tuple[str, int], Pattern] = {}
+        self.compile_seconds = 0.0
+
+    def compile(self, name: str, pattern: str, flags: int = 0) -> Pattern:
+        """Compile (or reuse) pattern and register it under name"""
+        key = (pattern, flags)
+        compiled = self._by_source.get(key)
+        if compiled is None:
+            start = time.perf_counter()
+            compiled = re.compile(pattern, flags)
+            self.compile_seconds += time.perf_counter() - start
+            self._by_source[key] = compiled
+        self._by_name[name] = compiled
+        return compiled
+
+    def compile_all(self, name: str, patterns: Iterable[str], flags: int = 0) -> List[Pattern]:
+        """Compile a pattern list as name.0, name.1, ... and return the handles in order"""
+        return [self.compile(f"{name}.{i}", p, flags) for i, p in enumerate(patterns)]
+
+    def get(self, name: str) -> Pattern:
+        """Registered handle; KeyError if the name was never compiled"""
+        return self._by_name[name]
+
+    def names(self) -> List[str]:
+        return list(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._by_name
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def get_stats(self) -> Dict:
+        """Pattern counts per module and total compile time"""
+        return {
+            "handles": len(self._by_name),
+            "compiled": len(self._by_source),
+            "byModule": dict(sorted(Counter(n.split(".", 1)[0] for n in self._by_name).items())),
+            "compileMs": round(self.compile_seconds * 1000, 2),
+        }
+
+    def log_report(self) -> None:
+        """Startup report: handles per module, distinct compiled patterns and compile time"""
+        stats = self.get_stats()
+        modules = ", ".join(f"{m}={n}" for m, n in stats["byModule"].items())
+        logger.info(
+            f"Pattern registry: {stats['handles']} handles ({modules}), "
+            f"{stats['compiled']} compiled in {stats['compileMs']}ms"
+        )
+
+
+# Global instance
+pattern_registry = PatternRegistry()
@@ -0,0 +1,159 @@
+"""
+REGEX WORST-CASE AUDIT
+Times every pattern in the registry against generated adversarial inputs
+(repeated literals and character-class members of the pattern itself, with and
+without separators) at N and SCALE*N chars, and flags patterns whose cost grows
+faster than linearly - the signature of catastrophic backtracking. The lengths are
+far apart so a linear and a quadratic pattern differ by SCALE times, well beyond
+timing noise.
+
+Usage: python regex_audit.py [length]        (default: REGEX_SCAN_CONFIG max_scan_chars)
+"""
+import sys
+import time
+from typing import Dict, Iterator, List, Pattern, Set, Tuple
+
+from config import REGEX_SCAN_CONFIG
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# --- CONFIGURATION ---
+GENERIC_SEEDS = ["a", "1", " ", "a1", "a@", "a.", "1.", "-1", "@a", "/a", "(", "http://", "www."]
+TERMINATORS = ["", "!"]
+# An 8x longer input costs ~8x for a linear pattern and ~64x for a quadratic one
+SCALE = 8
+GROWTH_LIMIT = 24.0
+REPEATS = 5
+TOP = 25
+
+
+def _collect_seeds(tokens, seeds: Set[str]) -> None:
+    """Literal runs and one member of each character class, from a parsed pattern"""
+    run = []
+    for op, arg in tokens:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        if run:
+            seeds.add("".join(run))
+            run = []
+        if op is sre_parse.IN:
+            for item_op, item in arg:
+                if item_op is sre_parse.LITERAL:
+                    seeds.add(chr(item))
+                elif item_op is sre_parse.RANGE:
+                    seeds.add(chr(item[0]))
+                elif item_op is sre_parse.CATEGORY:
+                    seeds.add({"CATEGORY_DIGIT": "1", "CATEGORY_SPACE": " "}.get(str(item), "a"))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            _collect_seeds(arg[2], seeds)
+        elif op is sre_parse.SUBPATTERN:
+            _collect_seeds(arg[-1], seeds)
+        elif op is sre_parse.BRANCH:
+            for branch in arg[1]:
+                _collect_seeds(branch, seeds)
+    if run:
+        seeds.add("".join(run))
+
+
+def adversarial_inputs(pattern: Pattern) -> Iterator[Tuple[str, str]]:
+    """(unit, terminator) pairs; build(unit, terminator, n) repeats the unit to n chars"""
+    seeds = set(GENERIC_SEEDS)
+    try:
+        _collect_seeds(sre_parse.parse(pattern.pattern, pattern.flags), seeds)
+    except Exception:
+        pass
+    for seed in sorted(seeds):
+        for unit in (seed, seed + " "):
+            for end in TERMINATORS:
+                yield unit, end
+
+
+def build(unit: str, end: str, length: int) -> str:
+    return (unit * (length // len(unit) + 1))[:length] + end
+
+
+def _time_findall(pattern: Pattern, text: str, repeats: int = 1) -> float:
+    """CPU time of this thread only, so other processes competing for the CPU do not count"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.thread_time()
+        pattern.findall(text)
+        best = min(best, time.thread_time() - start)
+    return best
+
+
+def _time_growth(pattern: Pattern, short: str, long: str) -> Tuple[float, float]:
+    """Best times for both inputs, interleaved so a load spike hits both alike"""
+    best_short = best_long = float("inf")
+    for _ in range(REPEATS):
+        best_short = min(best_short, _time_findall(pattern, short))
+        best_long = min(best_long, _time_findall(pattern, long))
+    return best_short, best_long
+
+
+def audit_pattern(pattern: Pattern, length: int) -> Dict:
+    """Worst adversarial input for one pattern, its time, and the growth when the input is SCALE times longer"""
+    worst_input, worst = ("a", ""), -1.0
+    for unit, end in adversarial_inputs(pattern):
+        elapsed = _time_findall(pattern, build(unit, end, length))
+        if elapsed > worst:
+            worst_input, worst = (unit, end), elapsed
+    worst, scaled = _time_growth(pattern, build(*worst_input, length), build(*worst_input, SCALE * length))
+    return {
+        "pattern": pattern.pattern,
+        "worstMs": round(worst * 1000, 3),
+        "growth": round(scaled / worst, 2) if worst > 1e-5 else float(SCALE),
+        "sample": worst_input[0] + worst_input[1],
+    }
+
+
+def audit(registry, length: int) -> Dict[str, Dict]:
+    """Audit every named handle (identical patterns are timed once)"""
+    results: Dict[str, Dict] = {}
+    by_pattern: Dict[int, Dict] = {}
+    for name in sorted(registry.names()):
+        pattern = registry.get(name)
+        if id(pattern) not in by_pattern:
+            by_pattern[id(pattern)] = audit_pattern(pattern, length)
+        results[name] = by_pattern[id(pattern)]
+    return results
+
+
+def flagged(results: Dict[str, Dict], budget_ms: float) -> List[str]:
+    """Handles that grow superlinearly and are slow on the long input, or exceed the time budget"""
+    return [
+        name for name, r in results.items()
+        if r["worstMs"] > budget_ms or (r["growth"] > GROWTH_LIMIT and r["worstMs"] * r["growth"] > SCALE)
+    ]
+
+
+def main():
+    from lazy_singleton import unwrap
+    from pattern_registry import pattern_registry
+    from scam_detector import detector
+    from intelligence_extractor import extractor
+    from ai_agent import reasoning_agent
+    from session_manager import session_manager
+
+    for instance in (detector, extractor, reasoning_agent, session_manager):
+        unwrap(instance)
+
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else REGEX_SCAN_CONFIG["max_scan_chars"]
+    results = audit(pattern_registry, length)
+    print(f"{'HANDLE':45s} {'WORST':>10s} {f'x{SCALE}':>6s}  REPEATED UNIT")
+    for name, r in sorted(results.items(), key=lambda item: -item[1]["worstMs"])[:TOP]:
+        print(f"{name:45s} {r['worstMs']:8.3f}ms {r['growth']:6.2f}  {r['sample']!r}")
+
+    bad = flagged(results, REGEX_SCAN_CONFIG["pattern_budget_ms"])
+    print(f"\n{len(results)} handles audited at {length} chars, {len(bad)} flagged")
+    for name in bad:
+        print(f"  {name}: {results[name]['pattern']}")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Bounded Regex Scanning for Untrusted Input
+Message bodies are written by adversaries: regex stages scan them in windows of
+at most max_scan_chars (so no single pattern call sees more than that), and a
+per-message AnalysisBudget lets optional stages be skipped instead of stalling
+a worker. regex_audit.py checks the patterns themselves for backtracking.
+"""
+import time
+from typing import Any, List, Optional, Pattern, Tuple
+
+from config import REGEX_SCAN_CONFIG
+from logging_config import get_logger
+
+logger = get_logger("honeypot.regex_guard")
+
+
+def scan_windows(
+    text: str,
+    max_chars: int = REGEX_SCAN_CONFIG["max_scan_chars"],
+    overlap: int = REGEX_SCAN_CONFIG["window_overlap_chars"]
+) -> List[Tuple[int, str, int]]:
+    """
+    Split text into (offset, window, owned_chars) triples
+    Windows hold at most max_chars and consecutive windows share at least
+    `overlap` chars; boundaries fall on whitespace where possible. A window owns
+    the matches that start in its first owned_chars chars, so a match up to
+    `overlap` chars long is reported exactly once. Text beyond max_message_chars
+    is not scanned.
+    """
+    text = text[:REGEX_SCAN_CONFIG["max_message_chars"]]
+    if len(text) <= max_chars:
+        return [(0, text, len(text))]
+
+    overlap = min(overlap, max_chars // 4)
+    windows = []
+    start = 0
+    while True:
+        end = start + max_chars
+        if end >= len(text):
+            windows.append((start, text[start:], len(text) - start))
+            return windows
+        # Start the next window just after a space, keeping at least `overlap` shared
+        next_start = end - overlap
+        space = text.rfind(" ", next_start - overlap // 2, next_start)
+        if space != -1:
+            next_start = space + 1
+        windows.append((start, text[start:end], next_start - start))
+        start = next_start
+
+
+def search(pattern: Pattern, text: str, windows: Optional[List[Tuple[int, str, int]]] = None) -> bool:
+    """
+    Whether pattern matches anywhere in text, scanning window by window
+    Callers running many patterns over one message can pass scan_windows(text) once.
+    """
+    if windows is None:
+        windows = scan_windows(text)
+    return any(pattern.search(window) for _, window, _ in windows)
+
+
+def findall(pattern: Pattern, text: str, windows: Optional[List[Tuple[int, str, int]]] = None) -> List[Any]:
+    """pattern.findall(text), scanned window by window without duplicating overlap matches"""
+    if windows is None:
+        windows = scan_windows(text)
+    if len(windows) == 1:
+        return pattern.findall(windows[0][1])
+
+    results = []
+    # Resume each window where the previous accepted match ended, as one scan would
+    last_end = 0
+    for offset, window, owned in windows:
+        for match in pattern.finditer(window, max(0, last_end - offset)):
+            if match.start() >= owned:
+                break
+            last_end = offset + match.end()
+            if pattern.groups == 0:
+                results.append(match.group())
+            elif pattern.groups == 1:
+                results.append(match.group(1) or "")
+            else:
+                results.append(tuple(g or "" for g in match.groups()))
+    return results
+
+
+class AnalysisBudget:
+    """
+    Wall-clock budget for analysing one message.
+    Essential stages always run; optional ones ask allows(stage) first and are
+    skipped (and recorded) once the budget is spent, so a pathological message
+    degrades the analysis instead of holding the worker.
+    """
+
+    def __init__(self, budget_ms: float = REGEX_SCAN_CONFIG["analysis_budget_ms"]):
+        self.deadline = time.perf_counter() + budget_ms / 1000
+        self.skipped: List[str] = []
+
+    @property
+    def expired(self) -> bool:
+        return time.perf_counter() > self.deadline
+
+    @property
+    def degraded(self) -> bool:
+        """True once any stage was skipped: the result is partial and must not be reused"""
+        return bool(self.skipped)
+
+    def allows(self, stage: str) -> bool:
+        """True while time remains; otherwise records stage as skipped"""
+        if self.expired:
+            self.skipped.append(stage)
+            return False
+        return True
+
+    def report(self, source: str) -> None:
+        """Log the skipped stages, if any"""
+        if self.skipped:
+            logger.warning(f"{source}: analysis budget spent, skipped {', '.join(dict.fromkeys(self.skipped))}")
@@ -0,0 +1,52 @@
+"""
+Offline dataset rescoring using ScamDetector.detect_batch
+
+Usage: python rescore_dataset.py <input.csv> <output.csv> [text_column] [batch_size]
+"""
+import logging
+import sys
+import time
+
+import pandas as pd
+
+from scam_detector import ScamDetector
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    input_path, output_path = sys.argv[1], sys.argv[2]
+    text_column = sys.argv[3] if len(sys.argv) > 3 else "message_text"
+    batch_size = int(sys.argv[4]) if len(sys.argv) > 4 else 1000
+
+    detector = ScamDetector()
+    start_time = time.time()
+    total = 0
+    first_chunk = True
+
+    for chunk in pd.read_csv(input_path, chunksize=batch_size):
+        texts = chunk[text_column].astype(str).fillna('').tolist()
+        results = detector.detect_batch(texts)
+
+        chunk["predicted_scam"] = [r[0] for r in results]
+        chunk["confidence"] = [round(r[1], 4) for r in results]
+        chunk["predicted_type"] = [r[2] for r in results]
+        chunk.to_csv(output_path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
+
+        first_chunk = False
+        total += len(texts)
+        print(f"Scored {total} messages...")
+
+    duration = time.time() - start_time
+    print(f"✅ Rescored {total} messages in {duration:.1f}s ({total / max(duration, 1e-9):.0f} msg/s)")
+
+
+if __name__ == "__main__":
+    main()
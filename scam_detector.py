@@ -5,13 +5,10 @@ Uses ML model + rule-based patterns + contextual analysis + sentiment detection
 import re
 import os
 import json
+import uuid
 from datetime import datetime
-import joblib
-import pandas as pd
-from typing import Tuple, List, Optional, Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.model_selection import train_test_split
+import numpy as np
+from typing import TYPE_CHECKING, Any, NamedTuple, Tuple, List, Optional, Dict
 
 from config import (
     SCAM_CONFIDENCE_THRESHOLD,
@@ -20,20 +17,220 @@ from config import (
     KEYWORD_WEIGHTS,
     MODEL_PATH,
     VECTORIZER_PATH,
+    COMPILED_MODEL_PATH,
+    MODEL_MMAP_MODE,
     MODEL_PARAMS,
     SENTIMENT_PATTERNS,
     SCAM_PROGRESSION_PATTERNS,
     NOVEL_SAMPLE_LOG_ENABLED,
     NOVEL_SAMPLE_LOG_PATH,
     NOVEL_SAMPLE_MAX_LEN,
+    KILL_SWITCH_RULES,
+    DETECTION_CASCADE_CONFIG,
+    STREAMING_TRAINING_CONFIG,
 )
-from models import Message, ThreatLevel, ScamClassification
-from exceptions import ModelNotTrainedError, ModelPredictionError
+from models import Message, ThreatLevel, ScamClassification, DetectionState, MessageFeatures
+from exceptions import ModelNotTrainedError, ModelPredictionError, ConfigurationError
 from logging_config import get_logger, log_with_context
+from keyword_automaton import KeywordAutomaton
+from text_normalizer import MessageText, normalize
+from model_artifacts import load_artifacts, save_artifacts
+from lazy_singleton import LazySingleton
+from pattern_registry import pattern_registry
+from regex_guard import AnalysisBudget
+from stage_metrics import stage_metrics
+import regex_guard
 import logging
 
+# pandas, scipy and sklearn are imported where they are used: training needs all of
+# them, serving only once a model is loaded, and neither should slow `import main`
+if TYPE_CHECKING:
+    from tree_evaluator import CompiledTreeEnsemble
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
 logger = get_logger("honeypot.scam_detector")
 
+# Derived signals available to KILL_SWITCH_RULES (bit i of the feature bitset)
+KILL_SWITCH_SIGNALS = (
+    "suspicious_link",
+    "urgency",
+    "payment_intent",
+    "financial_request",
+    "threat_keyword",
+    "multi_stage",
+)
+
+# Datasets used by train_model() when none are given
+DEFAULT_TRAINING_DATASETS = [
+    # Large datasets (preferred)
+    "massive_200k_ultra_diverse_dataset.csv",
+    "massive_200k_ultra_diverse_dataset_clean.csv",
+    "additional_data.csv",
+    # Smaller curated sets (fallback/extra coverage)
+    "massive_20k_scam_dataset.csv",
+    "massive_5k_scam_dataset.csv"
+]
+
+# Scam types every message is scored against, in tie-break order
+SCAM_TYPE_BASE_SCORES = (
+    ("UPI_Banking_Fraud", 0.0),
+    ("Prize_Lottery_Scam", 0.0),
+    ("Government_Phishing", 0.0),
+    ("Loan_Fraud", 0.0),
+    ("Phishing", 0.0),
+    ("Subscription_Fraud", 0.0),
+    ("Malware_Scam", 0.0),
+    ("Social_Media_Phishing", 0.0),
+    ("Link_Phishing", 0.0),
+    ("Digital_Arrest_Scam", 0.0),
+    ("Utility_Bill_Scam", 0.0),
+    ("General_Scam", 0.1),  # Base score
+)
+
+# Kill-switch tag -> forced scam type score, applied in order (later entries win)
+SCAM_TYPE_OVERRIDES = (
+    ("CRITICAL_DIGITAL_ARREST", "Digital_Arrest_Scam", 1.0),
+    ("CRITICAL_SEXTORTION_COMBO", "Sextortion_Blackmail", 1.0),
+    ("CRITICAL_EXTORTION_COMBO", "Sextortion_Blackmail", 0.95),
+    ("CRITICAL_COURIER_HANDOVER", "Digital_Arrest_Scam", 0.95),
+    ("CRITICAL_LIC_SCAM", "Prize_Lottery_Scam", 0.95),
+    ("CRITICAL_SCHEME_SCAM", "Government_Phishing", 0.95),
+    ("CRITICAL_TASK_JOB_SCAM", "Job_Task_Scam", 0.95),
+    ("CRITICAL_CHALLAN_SCAM", "Utility_Bill_Scam", 0.95),
+    ("CRITICAL_SIM_SWAP_SCAM", "General_Scam", 0.95),
+    ("CRITICAL_QR_SCAM", "Marketplace_Fraud", 1.0),
+    ("CRITICAL_LOAN_SCAM", "Loan_Fraud", 0.95),
+    # V4.0 Priority Overrides
+    ("CRITICAL_PIG_BUTCHER", "Pig_Butchering_Scam", 1.0),
+    ("CRITICAL_HONEYTRAP", "Honeytrap_Video_Sextortion", 1.0),
+    ("CRITICAL_VOICE_CLONE", "Voice_Cloning_Deepfake", 1.0),
+    ("CRITICAL_CEO_FRAUD", "CEO_BEC_Fraud", 1.0),
+    ("CRITICAL_VIRAL_LINK", "Viral_Link_Malware", 1.0),
+    ("CRITICAL_TRAI_SCAM", "TRAI_DND_Scam", 1.0),
+    # V5.0 Priority Overrides
+    ("CRITICAL_STOCK_TRADING", "Stock_Market_Fraud", 1.0),
+    ("CRITICAL_WELFARE_FRAUD", "Welfare_Scheme_Fraud", 1.0),
+    ("CRITICAL_RENT_SCAM", "Rent_Property_Fraud", 1.0),
+    ("CRITICAL_RECHARGE_SCAM", "Free_Recharge_Fraud", 1.0),
+    ("CRITICAL_ELECTION_SCAM", "Election_Voter_Fraud", 1.0),
+    # V5.1 Priority Overrides
+    ("CRITICAL_CREDIT_REWARDS", "Credit_Card_Rewards_Scam", 1.0),
+    ("CRITICAL_FASTAG_SCAM", "FASTag_KYC_Fraud", 1.0),
+    ("CRITICAL_IT_REFUND", "Income_Tax_Refund_Scam", 1.0),
+    ("CRITICAL_RELIGIOUS_SCAM", "Religious_Donation_Scam", 1.0),
+)
+
+# Likely legitimate transactional/personal messages get their score halved
+LEGIT_MESSAGE_PATTERNS = pattern_registry.compile_all(
+    "detector.legit", (
+        r"otp is \d{4,6}",          # "OTP is 123456"
+        r"code is \d{4,6}",          # "Code is 123456"
+        r"sent you ₹\d+",            # "Sent you ₹500" (payment receipts)
+        r"sent you rs\.?\s*\d+",     # "Sent you Rs 500"
+        r"received ₹\d+",            # Transaction confirmations
+        r"received rs\.?\s*\d+",
+        r"credited to your",         # Bank credit messages
+        r"debited from your",        # Bank debit messages
+        r"your order #\w+",          # Order confirmations
+        r"meeting.{0,100}rescheduled",  # Business meetings
+        r"office.{0,100}meeting",    # Office context
+        r"happy birthday",           # Greetings
+        r"dinner",                   # Personal plans
+        r"lunch",                    # Personal plans
+        r"love you",                 # Personal affection
+        r"miss you",                 # Personal affection
+    ), re.IGNORECASE
+)
+
+# Longest \w or \s run assumed when sizing the progression carry-over window;
+# conversations with longer runs fall back to a full rescan
+PROGRESSION_RUN_CAP = 64
+
+# Terms whose co-occurrence in a conversation signals a courier -> digital arrest pivot
+PIVOT_COURIER_TERMS = ['parcel', 'fedex', 'dhl']
+PIVOT_AUTHORITY_TERMS = ['digital arrest', 'skype', 'police']
+
+
+def _max_match_width(subpattern, run_cap: int) -> Optional[int]:
+    """
+    Upper bound on the length of any match of a parsed regex, assuming unbounded
+    whitespace, word or digit repeats never run longer than run_cap characters.
+    Returns None for constructs that are unsafe to match over a window
+    (anchors, word boundaries, lookarounds, backreferences, other unbounded repeats).
+    """
+    total = 0
+    for op, av in subpattern:
+        if op in (sre_parse.LITERAL, sre_parse.NOT_LITERAL, sre_parse.ANY, sre_parse.IN):
+            total += 1
+        elif op is sre_parse.SUBPATTERN:
+            width = _max_match_width(av[-1], run_cap)
+            if width is None:
+                return None
+            total += width
+        elif op is sre_parse.BRANCH:
+            widths = [_max_match_width(branch, run_cap) for branch in av[1]]
+            if any(w is None for w in widths):
+                return None
+            total += max(widths)
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            _, hi, item = av
+            if hi is sre_parse.MAXREPEAT:
+                items = list(item)
+                if not (
+                    len(items) == 1 and items[0][0] is sre_parse.IN and
+                    items[0][1] in (
+                        [(sre_parse.CATEGORY, sre_parse.CATEGORY_SPACE)],
+                        [(sre_parse.CATEGORY, sre_parse.CATEGORY_WORD)],
+                        [(sre_parse.CATEGORY, sre_parse.CATEGORY_DIGIT)],
+                    )
+                ):
+                    return None
+                total += run_cap
+            else:
+                width = _max_match_width(item, run_cap)
+                if width is None:
+                    return None
+                total += hi * width
+        else:
+            return None
+    return total
+
+
+# (is_scam, confidence, scam_type, detected_keywords, classification, threat_level)
+DetectionResult = Tuple[bool, float, str, List[str], ScamClassification, ThreatLevel]
+
+
+class ModelBundle(NamedTuple):
+    """
+    One consistent ML snapshot. ScamDetector swaps it with a single reference
+    assignment and every detection reads it once, so a retrain can never pair
+    the new vectorizer with the old model.
+    """
+    model: Any = None
+    vectorizer: Any = None
+    # Flattened copy of model for low-latency single-message scoring
+    compiled: Optional["CompiledTreeEnsemble"] = None
+    # Manifest of the saved artifact (see model_artifacts.py)
+    manifest: Optional[Dict[str, Any]] = None
+    # Incremented on every install_model()
+    generation: int = 0
+    # Identity of the vocabulary, keying the term counts sessions cache (see vocabulary_key)
+    vocabulary: str = ""
+
+
+def vocabulary_key(manifest: Optional[Dict[str, Any]]) -> str:
+    """
+    Identity of a model's vocabulary that holds across processes: session state
+    travels between detector workers, which each count generations from 1. The
+    saved vectorizer's sha256 when there is one, else a fresh random token.
+    """
+    digest = ((manifest or {}).get("files", {}).get("vectorizer") or {}).get("sha256")
+    return digest or uuid.uuid4().hex
+
 
 class ScamDetector:
     """
@@ -47,9 +244,10 @@ class ScamDetector:
     """
     
     def __init__(self):
-        self.model = None
-        self.vectorizer = None
+        self.live_model = ModelBundle()
         self.is_trained = False
+        # How often each detection cascade stage decided a message
+        self.cascade_counts: Dict[str, int] = {}
         
         # Urgency keywords indicating scam intent
         self.urgency_keywords = [
@@ -280,11 +478,12 @@ class ScamDetector:
         ]
         
         # Suspicious link patterns
+        # URL spans are bounded: "http://http://..." made [^\s]+ rescan the token from every "http"
         self.suspicious_link_patterns = [
-            r'http[s]?://[^\s]+(?:verify|secure|login|confirm|update|claim)',
+            r'http[s]?://[^\s]{1,200}(?:verify|secure|login|confirm|update|claim)',
             r'http[s]?://(?:bit\.ly|tinyurl|goo\.gl|t\.co|rb\.gy|is\.gd)\S+',
-            r'http[s]?://[^\s]*(?:bank|upi|paytm|gpay|amazon|flipkart)[^\s]*\.(?:com|in|net)',
-            r'www\.[^\s]+(?:verify|secure|confirm)',
+            r'http[s]?://[^\s]{0,200}(?:bank|upi|paytm|gpay|amazon|flipkart)[^\s]{0,200}\.(?:com|in|net)',
+            r'www\.[^\s]{1,200}(?:verify|secure|confirm)',
             r'http[s]?://\d+\.\d+\.\d+\.\d+',  # IP-based URLs
         ]
 
@@ -338,6 +537,16 @@ class ScamDetector:
         self._compile_sentiment_patterns()
         # Compile social engineering patterns
         self._compile_social_engineering_patterns()
+        # Compile link/phone/UPI/redaction patterns
+        self._compile_rule_patterns()
+        # Build the multi-pattern keyword matcher
+        self._build_keyword_automaton()
+        # Compile the kill-switch decision table
+        self._compile_kill_switches()
+        # Build the scam-type weight matrix
+        self._build_scam_type_matrix()
+        # Compile multi-stage progression patterns
+        self._compile_progression_patterns()
         
         # Load trained model if available
         self._load_model()
@@ -346,23 +555,399 @@ class ScamDetector:
         """Pre-compile regex patterns for sentiment analysis"""
         self.compiled_sentiment = {}
         for category, patterns in SENTIMENT_PATTERNS.items():
-            self.compiled_sentiment[category] = [
-                re.compile(p, re.IGNORECASE) for p in patterns
-            ]
+            self.compiled_sentiment[category] = pattern_registry.compile_all(
+                f"detector.sentiment.{category}", patterns, re.IGNORECASE
+            )
 
     def _compile_social_engineering_patterns(self):
         """Pre-compile regex patterns for social engineering detection"""
         self.compiled_social = {}
         for category, patterns in self.social_engineering_patterns.items():
-            self.compiled_social[category] = [
-                re.compile(p, re.IGNORECASE) for p in patterns
-            ]
+            self.compiled_social[category] = pattern_registry.compile_all(
+                f"detector.social.{category}", patterns, re.IGNORECASE
+            )
+        self._action_verb_pattern = pattern_registry.compile(
+            "detector.social.action_verbs",
+            r"\b(send|share|click|download|install|transfer|pay|verify|update|call|reply|submit|open)\b"
+        )
+        self._money_amount_pattern = pattern_registry.compile(
+            "detector.social.money_amount", r"(₹|rs\.?|inr|usd|\$)\s*\d{2,}", re.IGNORECASE
+        )
+
+    def _compile_rule_patterns(self):
+        """Pre-compile the link, phone and UPI checks of _rule_based_score and the log redaction patterns"""
+        self.compiled_link_patterns = pattern_registry.compile_all(
+            "detector.suspicious_link", self.suspicious_link_patterns, re.IGNORECASE
+        )
+        self._phone_pattern = pattern_registry.compile("detector.phone", r'(?:\+91)?[\s-]?[6-9]\d{9}')
+        self._upi_pattern = pattern_registry.compile("detector.upi", r'(?<![a-zA-Z0-9._-])[a-zA-Z0-9._-]+@[a-zA-Z]+')
+        self._redaction_patterns = [
+            (pattern_registry.compile(f"detector.redact.{tag}", pattern), f"[{tag}]")
+            for tag, pattern in (
+                ("link", r'https?://\S+'),
+                ("email", r'(?<![a-zA-Z0-9._%+-])[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Za-z]{2,}'),
+                ("number", r'\b\d{6,}\b'),
+            )
+        ]
+
+    def _keyword_families(self) -> List[Tuple[List[str], float, str]]:
+        """
+        Keyword families scored by _rule_based_score as (keywords, weight, tag prefix)
+        Order matters: it is the order in which weights are summed
+        """
+        return [
+            (self.urgency_keywords, KEYWORD_WEIGHTS["urgency"], ""),
+            (self.threat_keywords, KEYWORD_WEIGHTS["threat"], ""),
+            (self.action_keywords, KEYWORD_WEIGHTS["action"], ""),
+            (self.prize_keywords, KEYWORD_WEIGHTS["prize"], ""),
+            (self.financial_keywords, KEYWORD_WEIGHTS["financial"], ""),
+            (self.job_keywords, 0.15, ""),  # Default weight for job scam
+            (self.crypto_keywords, 0.2, ""),  # Default weight for crypto
+            (self.blackmail_keywords, 0.2, ""),
+            (self.utility_keywords, 0.25, ""),  # Higher weight for bill disconnection threats
+            # V4.0
+            (self.pig_butchering_keywords, 0.3, "pigbutcher_"),
+            (self.honeytrap_keywords, 0.35, "honeytrap_"),
+            (self.voice_cloning_keywords, 0.35, "voiceclone_"),
+            (self.ceo_fraud_keywords, 0.3, "bec_"),
+            (self.viral_link_keywords, 0.3, "virallink_"),
+            # V5.1
+            (self.credit_rewards_keywords, 0.25, "credit_reward_"),
+            (self.fastag_scam_keywords, 0.25, "fastag_"),
+            (self.it_refund_keywords, 0.3, "it_refund_"),
+            (self.religious_scam_keywords, 0.25, "religious_"),
+            # V5.2
+            (self.hi_mom_keywords, 0.35, "hi_mom_"),
+            (self.aadhaar_scam_keywords, 0.3, "aadhaar_"),
+            (self.yono_scam_keywords, 0.3, "yono_"),
+            (self.epf_scam_keywords, 0.25, "epf_"),
+            # V4.0: TRAI/DND
+            (self.trai_keywords, 0.25, "trai_"),
+        ]
+
+    def _build_keyword_automaton(self):
+        """Compile all rule-scoring keyword families into one Aho-Corasick automaton"""
+        self.keyword_automaton = KeywordAutomaton()
+        for keywords, weight, prefix in self._keyword_families():
+            for keyword in keywords:
+                self.keyword_automaton.add(keyword.lower(), (weight, f"{prefix}{keyword}"))
+        self.keyword_automaton.build()
+
+    def _scam_type_rules(self) -> List[Tuple[str, float, List[List[str]]]]:
+        """
+        Keyword rules for scam-type inference as (scam_type, score, keyword_groups)
+        A rule fires when the text contains a keyword from every group
+        """
+        return [
+            ("UPI_Banking_Fraud", 0.8, [['bank', 'upi', 'account block', 'खाता', 'neft', 'rtgs']]),
+            ("Prize_Lottery_Scam", 0.8, [['won', 'prize', 'lottery', 'gift', 'जीत', 'इनाम', 'lucky']]),
+            ("Government_Phishing", 0.8, [['aadhaar', 'pan', 'kyc', 'आधार', 'income tax', 'refund']]),
+            ("Loan_Fraud", 0.8, [['loan', 'interest', 'emi', 'ऋण', 'pre-approved', 'instant loan']]),
+            ("Phishing", 0.6, [['otp', 'password', 'verify', 'सत्यापित', 'login', 'credentials']]),
+            ("Subscription_Fraud", 0.8, [['amazon', 'flipkart', 'subscription', 'prime', 'netflix']]),
+            ("Malware_Scam", 0.8, [['malware', 'virus', 'infected', 'download', 'trojan']]),
+            ("Social_Media_Phishing", 0.7, [['instagram', 'facebook', 'whatsapp', 'telegram']]),
+            ("Job_Task_Scam", 0.95, [self.job_keywords]),
+            ("Crypto_Investment_Scam", 0.9, [self.crypto_keywords]),
+            ("Sextortion_Blackmail", 0.98, [
+                ['leak', 'nude', 'shame', 'blackmail', 'compromised'],
+                ['video', 'recorded', 'recording'],
+            ]),
+            ("Matrimonial_Fraud", 0.8, [['shaadi', 'matrimony', 'partner', 'marriage', 'gift stuck']]),
+            ("Digital_Arrest_Scam", 0.95, [['digital arrest', 'ncb', 'cbi', 'arrest warrant', 'skype call']]),
+            ("Utility_Bill_Scam", 0.9, [self.utility_keywords]),
+            ("Marketplace_Fraud", 0.8, [['olx', 'quikr', 'marketplace', 'carwale', 'bikewale', 'sofa set', 'iphone 99']]),
+            # V4.0: New Advanced Scam Categories
+            ("Pig_Butchering_Scam", 0.9, [self.pig_butchering_keywords]),
+            ("Honeytrap_Video_Sextortion", 0.95, [self.honeytrap_keywords]),
+            ("Voice_Cloning_Deepfake", 0.95, [self.voice_cloning_keywords]),
+            ("CEO_BEC_Fraud", 0.9, [self.ceo_fraud_keywords]),
+            ("Viral_Link_Malware", 0.85, [self.viral_link_keywords]),
+            ("TRAI_DND_Scam", 0.85, [self.trai_keywords]),
+            # V5.0: Extended Indian Scam Categories
+            ("Stock_Market_Fraud", 0.95, [self.stock_trading_keywords]),
+            ("Welfare_Scheme_Fraud", 0.9, [self.welfare_scheme_keywords]),
+            ("Rent_Property_Fraud", 0.95, [self.rent_scam_keywords]),
+            ("Free_Recharge_Fraud", 0.85, [self.recharge_scam_keywords]),
+            ("Election_Voter_Fraud", 0.85, [self.election_scam_keywords]),
+            # V5.1: New Indian Scam Types
+            ("Credit_Card_Rewards_Scam", 0.95, [self.credit_rewards_keywords]),
+            ("FASTag_KYC_Fraud", 0.95, [self.fastag_scam_keywords]),
+            ("Income_Tax_Refund_Scam", 0.98, [self.it_refund_keywords]),
+            ("Religious_Donation_Scam", 0.90, [self.religious_scam_keywords]),
+        ]
+
+    def _build_scam_type_matrix(self):
+        """
+        Compile scam-type inference into a keyword-group automaton plus dense
+        rule/type weight matrices (see _scam_type_scores)
+        """
+        rules = self._scam_type_rules()
+        types = [name for name, _ in SCAM_TYPE_BASE_SCORES]
+        for name in [r[0] for r in rules] + [o[1] for o in SCAM_TYPE_OVERRIDES]:
+            if name not in types:
+                types.append(name)
+        column = {name: i for i, name in enumerate(types)}
+
+        self.scam_type_automaton = KeywordAutomaton()
+        n_groups = sum(len(groups) for _, _, groups in rules)
+        rule_groups = np.zeros((len(rules), n_groups))
+        rule_weights = np.zeros((len(types), len(rules)))
+        rule_types = np.zeros((len(types), len(rules)))
+        rule_ranks = np.full(len(types), np.inf)
+        base_scores = np.zeros(len(types))
+        for name, score in SCAM_TYPE_BASE_SCORES:
+            base_scores[column[name]] = score
+
+        group = 0
+        for r, (name, score, groups) in enumerate(rules):
+            if base_scores[column[name]] != 0.0 or rule_types[column[name]].any():
+                raise ConfigurationError(f"Scam type {name} must have a zero base score and one keyword rule")
+            for keywords in groups:
+                for keyword in keywords:
+                    # Keywords with capitals can never occur in the lowercased text
+                    if keyword == keyword.lower():
+                        self.scam_type_automaton.add(keyword, group)
+                rule_groups[r, group] = 1.0
+                group += 1
+            rule_weights[column[name], r] = score
+            rule_types[column[name], r] = 1.0
+            rule_ranks[column[name]] = len(SCAM_TYPE_BASE_SCORES) + r
+        self.scam_type_automaton.build()
+
+        self.scam_type_matrix = {
+            "types": types,
+            "base_scores": base_scores,
+            "base_columns": np.arange(len(SCAM_TYPE_BASE_SCORES)),
+            "rule_groups": rule_groups,
+            "rule_group_counts": rule_groups.sum(axis=1),
+            "rule_weights": rule_weights,
+            "rule_types": rule_types,
+            "rule_ranks": rule_ranks,
+            "link_column": column["Link_Phishing"],
+            "override_columns": [column[name] for _, name, _ in SCAM_TYPE_OVERRIDES],
+            "override_ids": {},
+            "override_rank_offset": len(SCAM_TYPE_BASE_SCORES) + len(rules),
+        }
+        for i, (tag, _, _) in enumerate(SCAM_TYPE_OVERRIDES):
+            self.scam_type_matrix["override_ids"].setdefault(tag, []).append(i)
+
+    def _compile_kill_switches(self):
+        """
+        Compile KILL_SWITCH_RULES into (require_mask, exclude_mask) bitmasks.
+        The low bits are the derived signals; every term group gets its own bit,
+        and each distinct term maps to the OR of the groups it belongs to.
+        """
+        self.kill_switch_signal_bits = {name: 1 << i for i, name in enumerate(KILL_SWITCH_SIGNALS)}
+        next_bit = len(KILL_SWITCH_SIGNALS)
+        term_masks: Dict[str, int] = {}
+        self.kill_switch_rules = []
+
+        for rule in KILL_SWITCH_RULES:
+            require_mask = 0
+            for signal in rule.get("signals", []):
+                if signal not in self.kill_switch_signal_bits:
+                    raise ConfigurationError(
+                        f"Unknown kill switch signal '{signal}' in rule '{rule['name']}'"
+                    )
+                require_mask |= self.kill_switch_signal_bits[signal]
+
+            group_masks = []
+            for key in ("require", "exclude"):
+                mask = 0
+                for group in rule.get(key, []):
+                    bit = 1 << next_bit
+                    next_bit += 1
+                    for term in group:
+                        term_masks[term.lower()] = term_masks.get(term.lower(), 0) | bit
+                    mask |= bit
+                group_masks.append(mask)
+
+            require_mask |= group_masks[0]
+            if not require_mask:
+                raise ConfigurationError(f"Kill switch rule '{rule['name']}' has no conditions")
+
+            self.kill_switch_rules.append((
+                require_mask,
+                group_masks[1],
+                rule["score"],
+                rule.get("tag"),
+                rule.get("only_if_untriggered", False),
+                rule.get("log", rule["name"]),
+            ))
+
+        self.kill_switch_terms = KeywordAutomaton(term_masks.items())
+        self._urgency_signal_keywords = frozenset(["urgency_phrase", "fear_tactic"] + self.urgency_keywords)
+        self._financial_keyword_set = frozenset(self.financial_keywords)
+        self._threat_keyword_set = frozenset(self.threat_keywords)
+        self._payment_intent_pattern = pattern_registry.compile(
+            "detector.payment_intent",
+            r"\b(pay|payment|transfer|send|deposit|money|amount|rs\.?|inr|₹|upi)\b"
+        )
+
+    def _kill_switch_features(
+        self,
+        text_lower: str,
+        detected_keywords: List[str],
+        sentiment_score: float
+    ) -> int:
+        """Scan the message once and build the kill-switch feature bitset"""
+        features = 0
+        payloads = self.kill_switch_terms.payloads
+        for entry_id in self.kill_switch_terms.matched_ids(text_lower):
+            features |= payloads[entry_id]
+
+        bits = self.kill_switch_signal_bits
+        keyword_set = set(detected_keywords)
+        if 'suspicious_link' in keyword_set:
+            features |= bits["suspicious_link"]
+        if sentiment_score > 0.1 or not keyword_set.isdisjoint(self._urgency_signal_keywords):
+            features |= bits["urgency"]
+        if regex_guard.search(self._payment_intent_pattern, text_lower):
+            features |= bits["payment_intent"]
+        if 'upi_id_request' in keyword_set or not keyword_set.isdisjoint(self._financial_keyword_set):
+            features |= bits["financial_request"]
+        if not keyword_set.isdisjoint(self._threat_keyword_set):
+            features |= bits["threat_keyword"]
+        if any('multi_stage' in p for p in keyword_set):
+            features |= bits["multi_stage"]
+        return features
+
+    def _evaluate_kill_switches(
+        self,
+        text: MessageText,
+        detected_keywords: List[str],
+        sentiment_score: float
+    ) -> Tuple[float, bool, List[str]]:
+        """
+        Evaluate the compiled kill-switch table
+        Returns (kill_switch_score, triggered, critical_tags)
+        """
+        features = self._kill_switch_features(normalize(text).lower, detected_keywords, sentiment_score)
+        score = 0.0
+        triggered = False
+        tags = []
+
+        for require_mask, exclude_mask, rule_score, tag, only_if_untriggered, log_message in self.kill_switch_rules:
+            if features & require_mask != require_mask or features & exclude_mask:
+                continue
+            if only_if_untriggered and triggered:
+                continue
+            score = max(score, rule_score)
+            triggered = True
+            if tag:
+                tags.append(tag)
+            logger.info(f"Kill switch: {log_message}")
+
+        return score, triggered, tags
+
+    def _compile_progression_patterns(self):
+        """
+        Pre-compile SCAM_PROGRESSION_PATTERNS and size the carry-over window used
+        to match them incrementally (None disables incremental matching)
+        """
+        self.compiled_progression = {
+            scam_type: pattern_registry.compile_all(
+                f"detector.progression.{scam_type}", [pattern for _, pattern in stages], re.IGNORECASE
+            )
+            for scam_type, stages in SCAM_PROGRESSION_PATTERNS.items()
+        }
+        self.isolation_pattern = pattern_registry.compile(
+            "detector.isolation", r"(?:don't|do\s+not)\s+(?:tell|inform|share|disconnect)"
+        )
+        self._long_run_pattern = pattern_registry.compile(
+            "detector.long_run",
+            r"\w{%d,}|\s{%d,}" % (PROGRESSION_RUN_CAP + 1, PROGRESSION_RUN_CAP + 1)
+        )
+
+        widths = [
+            _max_match_width(sre_parse.parse(pattern, re.IGNORECASE), PROGRESSION_RUN_CAP)
+            for stages in SCAM_PROGRESSION_PATTERNS.values()
+            for _, pattern in stages
+        ]
+        if any(w is None for w in widths):
+            logger.warning("Progression patterns not windowable; context analysis will rescan every turn")
+            self.progression_window = None
+        else:
+            self.progression_window = max(
+                widths + [len(t) for t in PIVOT_COURIER_TERMS + PIVOT_AUTHORITY_TERMS] + [PROGRESSION_RUN_CAP + 1]
+            )
+
+    def _urgency_count(self, message: MessageText) -> int:
+        """Number of urgency keywords contained in a message"""
+        urgency_entries = len(self.urgency_keywords)  # urgency is the first keyword family
+        return sum(1 for i in self.keyword_automaton.matched_ids(normalize(message).lower) if i < urgency_entries)
+
+    def _match_progression_stages(self, conversation: str) -> Dict[str, List[int]]:
+        """Full scan: indices of the stages of every progression matching the conversation"""
+        return {
+            scam_type: [i for i, pattern in enumerate(patterns) if regex_guard.search(pattern, conversation)]
+            for scam_type, patterns in self.compiled_progression.items()
+        }
+
+    def _reset_progression_state(self, state: DetectionState, context: List[str]) -> None:
+        """Rebuild a progression state from scratch by folding in every context message"""
+        state.messages_seen = 0
+        state.last_message = ""
+        state.matched_stages = {}
+        state.urgency_counts = []
+        state.courier_seen = False
+        state.authority_seen = False
+        state.tail = ""
+        state.long_runs = False
+        for message in context:
+            self._advance_progression(state, message)
+        if context and (self.progression_window is None or state.long_runs):
+            state.matched_stages = self._match_progression_stages(" ".join(context).lower())
+
+    def _advance_progression(
+        self,
+        state: DetectionState,
+        message: MessageText,
+        context: Optional[List[str]] = None
+    ) -> None:
+        """
+        Fold one message into the progression state.
+        Only the new message plus a carry-over tail (long enough to hold any
+        stage match that crosses the boundary) is scanned; stage matches are
+        monotonic, so earlier matches carry forward unchanged. When the window
+        is not safe, stages are rescanned over context + message (skipped if
+        context is None; the caller rescans instead).
+        """
+        message = normalize(message)
+        message_lower = message.lower
+        window = state.tail + " " + message_lower if state.messages_seen else message_lower
+
+        if not state.long_runs and self._long_run_pattern.search(window):
+            state.long_runs = True
+
+        if self.progression_window is None or state.long_runs:
+            if context is not None:
+                state.matched_stages = self._match_progression_stages(
+                    " ".join(context + [message.raw]).lower()
+                )
+        else:
+            for scam_type, patterns in self.compiled_progression.items():
+                matched = state.matched_stages.setdefault(scam_type, [])
+                for i, pattern in enumerate(patterns):
+                    if i not in matched and regex_guard.search(pattern, window):
+                        matched.append(i)
+
+        if not state.courier_seen:
+            state.courier_seen = any(k in window for k in PIVOT_COURIER_TERMS)
+        if not state.authority_seen:
+            state.authority_seen = any(k in window for k in PIVOT_AUTHORITY_TERMS)
+
+        state.urgency_counts = (state.urgency_counts + [self._urgency_count(message)])[-4:]
+        state.tail = window[-(self.progression_window or PROGRESSION_RUN_CAP + 1):]
+        state.messages_seen += 1
+        state.last_message = message.raw
 
     def _redact_text(self, text: str) -> str:
         """Basic redaction for logging samples safely"""
-        redacted = re.sub(r'https?://\S+', '[link]', text)
-        redacted = re.sub(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[A-Za-z]{2,}', '[email]', redacted)
-        redacted = re.sub(r'\b\d{6,}\b', '[number]', redacted)
+        redacted = text
+        for pattern, placeholder in self._redaction_patterns:
+            redacted = pattern.sub(placeholder, redacted)
         return redacted
 
     def _log_novel_sample(
@@ -401,31 +986,118 @@ class ScamDetector:
             logger.warning(f"Novel sample logging failed: {e}")
     
     def _load_model(self):
-        """Load pre-trained model if available"""
+        """Load the prebuilt model artifact if available (never trains)"""
         try:
-            if os.path.exists(MODEL_PATH) and os.path.exists(VECTORIZER_PATH):
-                self.model = joblib.load(MODEL_PATH)
-                self.vectorizer = joblib.load(VECTORIZER_PATH)
-                self.is_trained = True
-                logger.info("Loaded pre-trained scam detection model")
+            self.reload_model()
         except Exception as e:
             logger.warning(f"Could not load model: {e}")
             self.is_trained = False
+
+    # Single-field views of live_model. Setting one replaces the whole bundle;
+    # a new model drops the compiled copy, which no longer matches it.
+    @property
+    def model(self) -> Any:
+        return self.live_model.model
+
+    @model.setter
+    def model(self, value: Any) -> None:
+        self.live_model = self.live_model._replace(model=value, compiled=None)
+
+    @property
+    def vectorizer(self) -> Any:
+        return self.live_model.vectorizer
+
+    @vectorizer.setter
+    def vectorizer(self, value: Any) -> None:
+        # A new vocabulary invalidates the term counts sessions cached for the old one
+        self.live_model = self.live_model._replace(vectorizer=value, vocabulary=vocabulary_key(None))
+
+    @property
+    def compiled_model(self) -> Optional["CompiledTreeEnsemble"]:
+        return self.live_model.compiled
+
+    @compiled_model.setter
+    def compiled_model(self, value: Optional["CompiledTreeEnsemble"]) -> None:
+        self.live_model = self.live_model._replace(compiled=value)
+
+    @property
+    def model_manifest(self) -> Optional[Dict[str, Any]]:
+        return self.live_model.manifest
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Version of the live model artifact, None when running rules-only"""
+        manifest = self.live_model.manifest
+        return manifest.get("version") if manifest else None
+
+    def load_model_artifact(self) -> Optional[ModelBundle]:
+        """Read and compile the saved model artifact without touching the live model; None if nothing is saved"""
+        artifacts = load_artifacts(MODEL_PATH, VECTORIZER_PATH, mmap_mode=MODEL_MMAP_MODE)
+        if artifacts is None:
+            return None
+        model, vectorizer, manifest = artifacts
+        return ModelBundle(model, vectorizer, self._compiled_for(model), manifest)
+
+    def install_model(self, bundle: ModelBundle) -> None:
+        """Make bundle the live model with a single reference assignment"""
+        self.live_model = bundle._replace(
+            generation=self.live_model.generation + 1, vocabulary=vocabulary_key(bundle.manifest)
+        )
+        self.is_trained = True
+        logger.info(f"Scam detection model {self.model_version} is live (generation {self.live_model.generation})")
+
+    def reload_model(self) -> bool:
+        """Load the saved artifact and make it live; False if there is none"""
+        bundle = self.load_model_artifact()
+        if bundle is None:
+            return False
+        self.install_model(bundle)
+        return True
+
+    def _compiled_for(self, model: Any) -> Optional["CompiledTreeEnsemble"]:
+        """Flattened tree ensemble for model, re-exported if missing or older than the saved model"""
+        try:
+            from tree_evaluator import CompiledTreeEnsemble, compile_model, verify_ensemble
+
+            compiled = None
+            if (os.path.exists(COMPILED_MODEL_PATH)
+                    and os.path.getmtime(COMPILED_MODEL_PATH) >= os.path.getmtime(MODEL_PATH)):
+                compiled = CompiledTreeEnsemble.load(COMPILED_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+                if not verify_ensemble(compiled, model):
+                    logger.warning("Stale compiled tree ensemble, re-exporting")
+                    compiled = None
+            if compiled is None:
+                compiled = compile_model(model)
+                if compiled is not None:
+                    compiled.save(COMPILED_MODEL_PATH)
+                    if MODEL_MMAP_MODE:
+                        # Map the saved arrays so they are shared like the rest of the artifact
+                        compiled = CompiledTreeEnsemble.load(COMPILED_MODEL_PATH, mmap_mode=MODEL_MMAP_MODE)
+            if compiled is not None:
+                logger.info(f"Compiled tree evaluator ready ({len(compiled.roots)} trees)")
+            return compiled
+        except Exception as e:
+            logger.warning(f"Compiled tree evaluator unavailable: {e}")
+            return None
     
-    def train_model(self, dataset_paths: List[str] = None):
-        """Train the ML model on multiple scam datasets with enhanced processing"""
+    def train_model(self, dataset_paths: List[str] = None, streaming: Optional[bool] = None):
+        """
+        Train the ML model on multiple scam datasets with enhanced processing
+        streaming=True (default: TRAINING_MODE=streaming) trains out of core, see streaming_trainer.py
+        """
+        if not dataset_paths:
+            dataset_paths = DEFAULT_TRAINING_DATASETS
+        if streaming is None:
+            streaming = STREAMING_TRAINING_CONFIG["enabled"]
+        if streaming:
+            return self._train_model_streaming(dataset_paths)
+
+        import pandas as pd
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.ensemble import GradientBoostingClassifier
+        from sklearn.model_selection import train_test_split
+
         try:
-            if not dataset_paths:
-                dataset_paths = [
-                    # Large datasets (preferred)
-                    "massive_200k_ultra_diverse_dataset.csv",
-                    "massive_200k_ultra_diverse_dataset_clean.csv",
-                    "additional_data.csv",
-                    # Smaller curated sets (fallback/extra coverage)
-                    "massive_20k_scam_dataset.csv",
-                    "massive_5k_scam_dataset.csv"
-                ]
-            
             logger.info(f"Training scam detection model on {len(dataset_paths)} potential datasets...")
             
             dataframes = []
@@ -499,281 +1171,163 @@ class ScamDetector:
             
             # Vectorize text
             logger.info("Vectorizing features...")
-            self.vectorizer = TfidfVectorizer(
+            vectorizer = TfidfVectorizer(
                 max_features=MODEL_PARAMS["max_features"],
                 ngram_range=MODEL_PARAMS["ngram_range"],
                 min_df=MODEL_PARAMS["min_df"],
                 max_df=MODEL_PARAMS["max_df"]
             )
-            X_train_vec = self.vectorizer.fit_transform(X_train)
-            X_test_vec = self.vectorizer.transform(X_test)
+            X_train_vec = vectorizer.fit_transform(X_train)
+            X_test_vec = vectorizer.transform(X_test)
             
             # Train model
             logger.info(f"Training GradientBoostingClassifier with {MODEL_PARAMS['n_estimators']} estimators...")
-            self.model = GradientBoostingClassifier(
+            model = GradientBoostingClassifier(
                 n_estimators=MODEL_PARAMS["n_estimators"],
                 max_depth=MODEL_PARAMS["max_depth"],
                 learning_rate=MODEL_PARAMS["learning_rate"],
                 random_state=MODEL_PARAMS["random_state"]
             )
-            self.model.fit(X_train_vec, y_train)
+            model.fit(X_train_vec, y_train)
             
             # Evaluate
-            accuracy = self.model.score(X_test_vec, y_test)
+            accuracy = model.score(X_test_vec, y_test)
             logger.info(f"Model trained with accuracy: {accuracy:.2%}")
             
-            # Save model
-            os.makedirs(os.path.dirname(MODEL_PATH) if os.path.dirname(MODEL_PATH) else "models", exist_ok=True)
-            joblib.dump(self.model, MODEL_PATH)
-            joblib.dump(self.vectorizer, VECTORIZER_PATH)
-            logger.info(f"Model saved to {MODEL_PATH}")
-            
-            self.is_trained = True
+            # Save model; the live model is only replaced once the new one is complete
+            manifest = save_artifacts(model, vectorizer, MODEL_PATH, VECTORIZER_PATH, accuracy)
+            self.install_model(ModelBundle(model, vectorizer, self._compiled_for(model), manifest))
             return accuracy
             
         except Exception as e:
             logger.error(f"Training failed: {e}")
             return None
     
-    def _rule_based_score(self, text: str) -> Tuple[float, List[str]]:
+    def _train_model_streaming(self, dataset_paths: List[str]):
+        """Chunked HashingVectorizer + SGD training with bounded memory"""
+        from streaming_trainer import train_streaming
+
+        try:
+            logger.info(f"Streaming training on {len(dataset_paths)} potential datasets...")
+            model, vectorizer, accuracy = train_streaming(dataset_paths)
+            if model is None:
+                return None
+
+            manifest = save_artifacts(model, vectorizer, MODEL_PATH, VECTORIZER_PATH, accuracy)
+            self.install_model(ModelBundle(model, vectorizer, self._compiled_for(model), manifest))
+            return accuracy
+
+        except Exception as e:
+            logger.error(f"Streaming training failed: {e}")
+            return None
+
+    def _rule_based_score(self, text: MessageText) -> Tuple[float, List[str]]:
         """
         Calculate rule-based scam score based on keyword patterns
         Returns (score, detected_keywords)
         """
-        text_lower = text.lower()
+        message = normalize(text)
+        text, text_lower = message.raw, message.lower
         score = 0.0
         detected_keywords = []
         
-        # Check urgency keywords
-        for keyword in self.urgency_keywords:
-            if keyword.lower() in text_lower:
-                score += KEYWORD_WEIGHTS["urgency"]
-                detected_keywords.append(keyword)
-        
-        # Check threat keywords
-        for keyword in self.threat_keywords:
-            if keyword.lower() in text_lower:
-                score += KEYWORD_WEIGHTS["threat"]
-                detected_keywords.append(keyword)
-        
-        # Check action keywords
-        for keyword in self.action_keywords:
-            if keyword.lower() in text_lower:
-                score += KEYWORD_WEIGHTS["action"]
-                detected_keywords.append(keyword)
-        
-        # Check prize keywords
-        for keyword in self.prize_keywords:
-            if keyword.lower() in text_lower:
-                score += KEYWORD_WEIGHTS["prize"]
-                detected_keywords.append(keyword)
-        
-        # Check financial keywords
-        for keyword in self.financial_keywords:
-            if keyword.lower() in text_lower:
-                score += KEYWORD_WEIGHTS["financial"]
-                detected_keywords.append(keyword)
-        
-        # Check Job keywords
-        for keyword in self.job_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.15 # Default weight for job scam
-                detected_keywords.append(keyword)
-
-        # Check Crypto keywords
-        for keyword in self.crypto_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.2 # Default weight for crypto
-                detected_keywords.append(keyword)
-
-        # Check Blackmail keywords
-        for keyword in self.blackmail_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.2
-                detected_keywords.append(keyword)
-
-        # Check Utility/Bill keywords
-        for keyword in self.utility_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25 # Higher weight for bill disconnection threats
-                detected_keywords.append(keyword)
-
-        # V4.0: Pig Butchering (Long-Con) - High risk
-        for keyword in self.pig_butchering_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"pigbutcher_{keyword}")
-
-        # V4.0: Honey Trap / Video Call Sextortion
-        for keyword in self.honeytrap_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.35
-                detected_keywords.append(f"honeytrap_{keyword}")
-
-        # V4.0: AI Voice Cloning
-        for keyword in self.voice_cloning_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.35
-                detected_keywords.append(f"voiceclone_{keyword}")
-
-        # V4.0: CEO/Boss Fraud
-        for keyword in self.ceo_fraud_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"bec_{keyword}")
-
-        # V4.0: Viral Video Link
-        for keyword in self.viral_link_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"virallink_{keyword}")
-
-        # V5.1: Credit Card Rewards
-        for keyword in self.credit_rewards_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25
-                detected_keywords.append(f"credit_reward_{keyword}")
-
-        # V5.1: FASTag KYC
-        for keyword in self.fastag_scam_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25
-                detected_keywords.append(f"fastag_{keyword}")
-                
-        # V5.1: Income Tax Refund
-        for keyword in self.it_refund_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"it_refund_{keyword}")
-
-        # V5.1: Religious Scam
-        for keyword in self.religious_scam_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25
-                detected_keywords.append(f"religious_{keyword}")
-
-        # V5.2: Hi Mom / Family Emergency
-        for keyword in self.hi_mom_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.35
-                detected_keywords.append(f"hi_mom_{keyword}")
-
-        # V5.2: Aadhaar / UIDAI Update
-        for keyword in self.aadhaar_scam_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"aadhaar_{keyword}")
-
-        # V5.2: SBI YONO / Bank App Blocked
-        for keyword in self.yono_scam_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.3
-                detected_keywords.append(f"yono_{keyword}")
-
-        # V5.2: EPF / PF Withdrawal
-        for keyword in self.epf_scam_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25
-                detected_keywords.append(f"epf_{keyword}")
-
-        # V4.0: TRAI/DND
-        for keyword in self.trai_keywords:
-            if keyword.lower() in text_lower:
-                score += 0.25
-                detected_keywords.append(f"trai_{keyword}")
+        # Single pass over the text for every keyword family; hits are replayed
+        # in declaration order so the score sums exactly as the per-family loops did
+        for entry_id in sorted(self.keyword_automaton.matched_ids(text_lower)):
+            weight, tag = self.keyword_automaton.payloads[entry_id]
+            score += weight
+            detected_keywords.append(tag)
         
         # Check for suspicious links
-        for pattern in self.suspicious_link_patterns:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern in self.compiled_link_patterns:
+            if regex_guard.search(pattern, text):
                 score += KEYWORD_WEIGHTS["suspicious_link"]
                 detected_keywords.append("suspicious_link")
         
         # Check for phone numbers
-        phone_pattern = r'(?:\+91)?[\s-]?[6-9]\d{9}'
-        if re.search(phone_pattern, text):
+        if regex_guard.search(self._phone_pattern, text):
             score += KEYWORD_WEIGHTS["phone_number"]
             detected_keywords.append("phone_number")
         
         # Check for UPI ID pattern
-        upi_pattern = r'[a-zA-Z0-9._-]+@[a-zA-Z]+'
-        if re.search(upi_pattern, text):
+        if regex_guard.search(self._upi_pattern, text):
             score += KEYWORD_WEIGHTS["upi_id"]
             detected_keywords.append("upi_id_request")
         
         # Cap at 1.0
         return min(score, 1.0), list(set(detected_keywords))
     
-    def _analyze_sentiment(self, text: str) -> Tuple[float, List[str]]:
+    def _analyze_sentiment(self, text: MessageText) -> Tuple[float, List[str]]:
         """
         Analyze sentiment patterns for urgency, fear, and manipulation
         Returns (sentiment_score, detected_patterns)
         """
+        text = normalize(text).raw
         score = 0.0
         patterns_found = []
         
         # Check urgency phrases
         for pattern in self.compiled_sentiment.get("urgency_phrases", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.15
                 patterns_found.append("urgency_phrase")
         
         # Check fear phrases
         for pattern in self.compiled_sentiment.get("fear_phrases", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.20
                 patterns_found.append("fear_tactic")
         
         # Check trust building (scammer trying to establish credibility)
         for pattern in self.compiled_sentiment.get("trust_building", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.10
                 patterns_found.append("trust_building")
 
         # Check isolation phrases
         for pattern in self.compiled_sentiment.get("isolation_phrases", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.20
                 patterns_found.append("isolation_attempt")
 
         # Check authority phrases
         for pattern in self.compiled_sentiment.get("authority_phrases", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.15
                 patterns_found.append("authority_claim")
 
         # Check greed phrases
         for pattern in self.compiled_sentiment.get("greed_phrases", []):
-            if pattern.search(text):
+            if regex_guard.search(pattern, text):
                 score += 0.15
                 patterns_found.append("greed_trap")
         
         return min(score, 0.6), list(set(patterns_found))
 
-    def _analyze_social_engineering(self, text: str) -> Tuple[float, List[str]]:
+    def _analyze_social_engineering(self, text: MessageText) -> Tuple[float, List[str]]:
         """
         Analyze generic social-engineering cues that generalize to novel scams
         Returns (social_score, detected_patterns)
         """
+        message = normalize(text)
+        text = message.raw
         score = 0.0
         patterns_found = []
 
         # Category-based pattern hits
         for category, patterns in self.compiled_social.items():
-            if any(p.search(text) for p in patterns):
+            if any(regex_guard.search(p, text) for p in patterns):
                 score += self.social_engineering_weights.get(category, 0.1)
                 patterns_found.append(f"social_{category}")
 
         # Multi-action imperatives often appear in scam scripts
-        action_hits = re.findall(
-            r"\b(send|share|click|download|install|transfer|pay|verify|update|call|reply|submit|open)\b",
-            text.lower()
-        )
+        action_hits = regex_guard.findall(self._action_verb_pattern, message.lower)
         if len(action_hits) >= 2:
             score += 0.10
             patterns_found.append("social_multiple_actions")
 
         # Explicit money amounts add risk in context of actions
-        if re.search(r"(₹|rs\.?|inr|usd|\$)\s*\d{2,}", text, re.IGNORECASE):
+        if regex_guard.search(self._money_amount_pattern, text):
             score += 0.10
             patterns_found.append("social_money_amount")
 
@@ -817,26 +1371,46 @@ class ScamDetector:
         return min(score, 0.95), list(set(patterns_found))
 
     
-    def _analyze_context(self, current_message: str, context: List[str]) -> Tuple[float, List[str]]:
+    def _analyze_context(
+        self,
+        current_message: MessageText,
+        context: List[str],
+        state: Optional[DetectionState] = None
+    ) -> Tuple[float, List[str]]:
         """
         Analyze conversation context for multi-stage scam patterns
+        With a DetectionState carried across turns only the new message is scanned;
+        without one the whole conversation is rescanned. Both give identical results.
         Returns (context_score, detected_patterns)
         """
+        message = normalize(current_message)
+        current_message = message.raw
+        if state is not None:
+            if state.messages_seen != len(context) or (context and state.last_message != context[-1]):
+                self._reset_progression_state(state, context)
+            self._advance_progression(state, message, context)
+
         if not context:
             return 0.0, []
         
         score = 0.0
         patterns_found = []
         
-        # Combine all messages for full context analysis
-        full_conversation = " ".join(context + [current_message]).lower()
+        if state is not None:
+            matched_stages = state.matched_stages
+            urgency_scores = state.urgency_counts
+            pivot_detected = state.courier_seen and state.authority_seen
+        else:
+            # Combine all messages for full context analysis
+            full_conversation = " ".join(context + [current_message]).lower()
+            matched_stages = self._match_progression_stages(full_conversation)
+            urgency_scores = [self._urgency_count(msg) for msg in context[-3:] + [message]]
+            pivot_detected = any(k in full_conversation for k in PIVOT_COURIER_TERMS) and \
+                any(k in full_conversation for k in PIVOT_AUTHORITY_TERMS)
         
         # Check for multi-stage scam progression
         for scam_type, stages in SCAM_PROGRESSION_PATTERNS.items():
-            stages_matched = 0
-            for stage_name, pattern in stages:
-                if re.search(pattern, full_conversation, re.IGNORECASE):
-                    stages_matched += 1
+            stages_matched = len(matched_stages.get(scam_type, []))
             
             # If multiple stages detected, it's likely a scam progression
             if stages_matched >= 3:
@@ -844,12 +1418,7 @@ class ScamDetector:
                 score = max(score, progression_score * 0.3)
                 patterns_found.append(f"multi_stage_{scam_type}")
         
-        # Check if urgency is escalating
-        urgency_scores = []
-        for msg in context[-3:] + [current_message]:
-            msg_urgency = sum(1 for kw in self.urgency_keywords if kw.lower() in msg.lower())
-            urgency_scores.append(msg_urgency)
-        
+        # Check if urgency is escalating (last 3 context messages + current)
         if len(urgency_scores) >= 2:
             # Check if urgency is increasing
             if urgency_scores[-1] > urgency_scores[0]:
@@ -857,168 +1426,72 @@ class ScamDetector:
                 patterns_found.append("escalating_urgency")
         
         # Check for Pivot Detection (Changing scam types in one session)
-        potential_pivots = 0
-        if any(k in full_conversation for k in ['parcel', 'fedex', 'dhl']) and \
-           any(k in full_conversation for k in ['digital arrest', 'skype', 'police']):
+        if pivot_detected:
             score += 0.2
             patterns_found.append("type_pivot_detected")
 
         # Check for isolation behavior
-        if re.search(r"(?:don't|do\s+not)\s+(?:tell|inform|share|disconnect)", current_message.lower()):
+        if regex_guard.search(self.isolation_pattern, message.lower):
             score += 0.15
             patterns_found.append("isolation_attempt")
 
         return min(score, 0.5), patterns_found
     
-    def _determine_scam_type(self, text: str, keywords: List[str]) -> Tuple[str, Dict[str, float]]:
+    def _determine_scam_type(self, text: MessageText, keywords: List[str]) -> Tuple[str, Dict[str, float]]:
         """
         Determine the type of scam with confidence scores for alternatives
         Returns (primary_type, {alternative_type: confidence})
         """
-        text_lower = text.lower()
-        
-        type_scores = {
-            "UPI_Banking_Fraud": 0.0,
-            "Prize_Lottery_Scam": 0.0,
-            "Government_Phishing": 0.0,
-            "Loan_Fraud": 0.0,
-            "Phishing": 0.0,
-            "Subscription_Fraud": 0.0,
-            "Malware_Scam": 0.0,
-            "Social_Media_Phishing": 0.0,
-            "Link_Phishing": 0.0,
-            "Digital_Arrest_Scam": 0.0,
-            "Utility_Bill_Scam": 0.0,
-            "General_Scam": 0.1,  # Base score
-        }
-        
-        # Score each type based on keyword matches
-        if any(k in text_lower for k in ['bank', 'upi', 'account block', 'खाता', 'neft', 'rtgs']):
-            type_scores["UPI_Banking_Fraud"] += 0.8
-        
-        if any(k in text_lower for k in ['won', 'prize', 'lottery', 'gift', 'जीत', 'इनाम', 'lucky']):
-            type_scores["Prize_Lottery_Scam"] += 0.8
-        
-        if any(k in text_lower for k in ['aadhaar', 'pan', 'kyc', 'आधार', 'income tax', 'refund']):
-            type_scores["Government_Phishing"] += 0.8
-        
-        if any(k in text_lower for k in ['loan', 'interest', 'emi', 'ऋण', 'pre-approved', 'instant loan']):
-            type_scores["Loan_Fraud"] += 0.8
-        
-        if any(k in text_lower for k in ['otp', 'password', 'verify', 'सत्यापित', 'login', 'credentials']):
-            type_scores["Phishing"] += 0.6
-        
-        if any(k in text_lower for k in ['amazon', 'flipkart', 'subscription', 'prime', 'netflix']):
-            type_scores["Subscription_Fraud"] += 0.8
-        
-        if any(k in text_lower for k in ['malware', 'virus', 'infected', 'download', 'trojan']):
-            type_scores["Malware_Scam"] += 0.8
-        
-        if any(k in text_lower for k in ['instagram', 'facebook', 'whatsapp', 'telegram']):
-            type_scores["Social_Media_Phishing"] += 0.7
-        
-        if any(k in text_lower for k in self.job_keywords):
-            type_scores["Job_Task_Scam"] = 0.95
-            
-        if any(k in text_lower for k in self.crypto_keywords):
-            type_scores["Crypto_Investment_Scam"] = 0.9
-            
-        if any(k in text_lower for k in ['leak', 'nude', 'shame', 'blackmail', 'compromised']) and \
-           any(k in text_lower for k in ['video', 'recorded', 'recording']):
-            type_scores["Sextortion_Blackmail"] = 0.98
-            
-        if any(k in text_lower for k in ['shaadi', 'matrimony', 'partner', 'marriage', 'gift stuck']):
-            type_scores["Matrimonial_Fraud"] = 0.8
+        scores, ranks = self._scam_type_scores([normalize(text).lower], [keywords])
+        types = self.scam_type_matrix["types"]
 
-        if any(k in text_lower for k in ['digital arrest', 'ncb', 'cbi', 'arrest warrant', 'skype call']):
-            type_scores["Digital_Arrest_Scam"] = 0.95
-            
-        if any(k in text_lower for k in self.utility_keywords):
-            type_scores["Utility_Bill_Scam"] = 0.9
-
-        if any(k in text_lower for k in ['olx', 'quikr', 'marketplace', 'carwale', 'bikewale', 'sofa set', 'iphone 99']):
-            type_scores["Marketplace_Fraud"] = 0.8
-
-        # V4.0: New Advanced Scam Categories
-        if any(k in text_lower for k in self.pig_butchering_keywords):
-            type_scores["Pig_Butchering_Scam"] = 0.9
-        if any(k in text_lower for k in self.honeytrap_keywords):
-            type_scores["Honeytrap_Video_Sextortion"] = 0.95
-        if any(k in text_lower for k in self.voice_cloning_keywords):
-            type_scores["Voice_Cloning_Deepfake"] = 0.95
-        if any(k in text_lower for k in self.ceo_fraud_keywords):
-            type_scores["CEO_BEC_Fraud"] = 0.9
-        if any(k in text_lower for k in self.viral_link_keywords):
-            type_scores["Viral_Link_Malware"] = 0.85
-        if any(k in text_lower for k in self.trai_keywords):
-            type_scores["TRAI_DND_Scam"] = 0.85
-            
-        # V5.0: Extended Indian Scam Categories
-        if any(k in text_lower for k in self.stock_trading_keywords):
-            type_scores["Stock_Market_Fraud"] = 0.95
-        if any(k in text_lower for k in self.welfare_scheme_keywords):
-            type_scores["Welfare_Scheme_Fraud"] = 0.9
-        if any(k in text_lower for k in self.rent_scam_keywords):
-            type_scores["Rent_Property_Fraud"] = 0.95
-        if any(k in text_lower for k in self.recharge_scam_keywords):
-            type_scores["Free_Recharge_Fraud"] = 0.85
-        if any(k in text_lower for k in self.election_scam_keywords):
-            type_scores["Election_Voter_Fraud"] = 0.85
-
-        # V5.1: New Indian Scam Types
-        if any(k in text_lower for k in self.credit_rewards_keywords):
-            type_scores["Credit_Card_Rewards_Scam"] = 0.95
-        if any(k in text_lower for k in self.fastag_scam_keywords):
-            type_scores["FASTag_KYC_Fraud"] = 0.95
-        if any(k in text_lower for k in self.it_refund_keywords):
-            type_scores["Income_Tax_Refund_Scam"] = 0.98
-        if any(k in text_lower for k in self.religious_scam_keywords):
-            type_scores["Religious_Donation_Scam"] = 0.90
-
-        if 'suspicious_link' in keywords:
-            type_scores["Link_Phishing"] += 0.5
-        
-        # 🚨 PRIORITY OVERRIDE: If we hit a specific critical keyword, force that type
-        if 'CRITICAL_DIGITAL_ARREST' in keywords: type_scores["Digital_Arrest_Scam"] = 1.0
-        if 'CRITICAL_SEXTORTION_COMBO' in keywords: type_scores["Sextortion_Blackmail"] = 1.0
-        if 'CRITICAL_EXTORTION_COMBO' in keywords: type_scores["Sextortion_Blackmail"] = 0.95
-        if 'CRITICAL_COURIER_HANDOVER' in keywords: type_scores["Digital_Arrest_Scam"] = 0.95
-        if 'CRITICAL_LIC_SCAM' in keywords: type_scores["Prize_Lottery_Scam"] = 0.95
-        if 'CRITICAL_SCHEME_SCAM' in keywords: type_scores["Government_Phishing"] = 0.95
-        if 'CRITICAL_TASK_JOB_SCAM' in keywords: type_scores["Job_Task_Scam"] = 0.95
-        if 'CRITICAL_CHALLAN_SCAM' in keywords: type_scores["Utility_Bill_Scam"] = 0.95
-        if 'CRITICAL_SIM_SWAP_SCAM' in keywords: type_scores["General_Scam"] = 0.95
-        if 'CRITICAL_QR_SCAM' in keywords: type_scores["Marketplace_Fraud"] = 1.0
-        if 'CRITICAL_LOAN_SCAM' in keywords: type_scores["Loan_Fraud"] = 0.95
-        # V4.0 Priority Overrides
-        if 'CRITICAL_PIG_BUTCHER' in keywords: type_scores["Pig_Butchering_Scam"] = 1.0
-        if 'CRITICAL_HONEYTRAP' in keywords: type_scores["Honeytrap_Video_Sextortion"] = 1.0
-        if 'CRITICAL_VOICE_CLONE' in keywords: type_scores["Voice_Cloning_Deepfake"] = 1.0
-        if 'CRITICAL_CEO_FRAUD' in keywords: type_scores["CEO_BEC_Fraud"] = 1.0
-        if 'CRITICAL_VIRAL_LINK' in keywords: type_scores["Viral_Link_Malware"] = 1.0
-        if 'CRITICAL_TRAI_SCAM' in keywords: type_scores["TRAI_DND_Scam"] = 1.0
-        
-        # V5.0 Priority Overrides
-        if 'CRITICAL_STOCK_TRADING' in keywords: type_scores["Stock_Market_Fraud"] = 1.0
-        if 'CRITICAL_WELFARE_FRAUD' in keywords: type_scores["Welfare_Scheme_Fraud"] = 1.0
-        if 'CRITICAL_RENT_SCAM' in keywords: type_scores["Rent_Property_Fraud"] = 1.0
-        if 'CRITICAL_RECHARGE_SCAM' in keywords: type_scores["Free_Recharge_Fraud"] = 1.0
-        if 'CRITICAL_ELECTION_SCAM' in keywords: type_scores["Election_Voter_Fraud"] = 1.0
-        
-        # V5.1 Priority Overrides
-        if 'CRITICAL_CREDIT_REWARDS' in keywords: type_scores["Credit_Card_Rewards_Scam"] = 1.0
-        if 'CRITICAL_FASTAG_SCAM' in keywords: type_scores["FASTag_KYC_Fraud"] = 1.0
-        if 'CRITICAL_IT_REFUND' in keywords: type_scores["Income_Tax_Refund_Scam"] = 1.0
-        if 'CRITICAL_RELIGIOUS_SCAM' in keywords: type_scores["Religious_Donation_Scam"] = 1.0
-
-        # Get primary type and alternatives
-        sorted_types = sorted(type_scores.items(), key=lambda x: x[1], reverse=True)
-        primary_type = sorted_types[0][0]
+        # Get primary type and alternatives: highest score first, ties in the
+        # order the types were first scored (base types, keyword rules, overrides)
+        order = np.lexsort((ranks[0], -scores[0]))
+        primary_type = types[order[0]]
         
         # Get alternatives with scores > 0.3
-        alternatives = {k: v for k, v in sorted_types[1:4] if v > 0.3}
+        alternatives = {types[i]: float(scores[0, i]) for i in order[1:4] if scores[0, i] > 0.3}
         
         return primary_type, alternatives
+
+    def _scam_type_scores(
+        self,
+        texts_lower: List[str],
+        keywords_list: List[List[str]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scam-type scores for a batch of lowercased messages and their detected keywords
+        Returns (scores, ranks), both (messages x types). ranks is the order in which
+        each type was first scored (inf if never), used to break score ties.
+        """
+        matrix = self.scam_type_matrix
+        group_hits = np.zeros((len(texts_lower), matrix["rule_groups"].shape[1]))
+        for row, text_lower in enumerate(texts_lower):
+            for entry_id in self.scam_type_automaton.matched_ids(text_lower):
+                group_hits[row, self.scam_type_automaton.payloads[entry_id]] = 1.0
+
+        # A rule fires when every one of its keyword groups is present
+        rule_hits = (group_hits @ matrix["rule_groups"].T == matrix["rule_group_counts"]).astype(float)
+        scores = matrix["base_scores"] + rule_hits @ matrix["rule_weights"].T
+        created = rule_hits @ matrix["rule_types"].T > 0
+        ranks = np.where(created, matrix["rule_ranks"], np.inf)
+        ranks[:, matrix["base_columns"]] = matrix["base_columns"]
+
+        for row, keywords in enumerate(keywords_list):
+            if 'suspicious_link' in keywords:
+                scores[row, matrix["link_column"]] += 0.5
+
+            # 🚨 PRIORITY OVERRIDE: If we hit a specific critical keyword, force that type
+            # (in SCAM_TYPE_OVERRIDES order, so the last matching override wins)
+            fired = sorted({i for tag in keywords for i in matrix["override_ids"].get(tag, ())})
+            for i in fired:
+                column = matrix["override_columns"][i]
+                scores[row, column] = SCAM_TYPE_OVERRIDES[i][2]
+                if ranks[row, column] == np.inf:
+                    ranks[row, column] = matrix["override_rank_offset"] + i
+
+        return scores, ranks
     
     def _assess_threat_level(
         self,
@@ -1066,345 +1539,344 @@ class ScamDetector:
     
     def detect(
         self,
-        text: str,
-        context: Optional[List[str]] = None
-    ) -> Tuple[bool, float, str, List[str], ScamClassification, ThreatLevel]:
+        text: MessageText,
+        context: Optional[List[str]] = None,
+        detection_state: Optional[DetectionState] = None
+    ) -> DetectionResult:
         """
         Enhanced scam detection with contextual analysis
         
         Args:
-            text: The message text to analyze
+            text: The message text to analyze (or its NormalizedMessage)
             context: Optional list of previous messages for context
+            detection_state: Optional per-session state; when given, context analysis
+                only scans the new message, the ML stage reuses cached per-message
+                term counts, and the state is advanced past this message
             
         Returns:
             Tuple of (is_scam, confidence, scam_type, detected_keywords, classification, threat_level)
         """
-        context = context or []
+        return self.detect_batch([text], [context], [detection_state])[0]
+
+    def detect_batch(
+        self,
+        texts: List[MessageText],
+        contexts: Optional[List[Optional[List[str]]]] = None,
+        detection_states: Optional[List[Optional[DetectionState]]] = None
+    ) -> List[DetectionResult]:
+        """
+        Batched scam detection for offline rescoring and log replay
+        Cheap stages run first; messages they cannot decide (see _cascade_exit) are
+        vectorized into one sparse matrix and scored with a single predict_proba
+        call. Results match detect() message by message.
         
+        Args:
+            texts: Messages to analyze
+            contexts: Optional per-message lists of previous messages (same length as texts)
+            detection_states: Optional per-message DetectionState objects (see detect)
+            
+        Returns:
+            List of detect() tuples, in input order
+        """
+        if contexts is None:
+            contexts = [None] * len(texts)
+        if len(contexts) != len(texts):
+            raise ValueError(f"Got {len(texts)} texts but {len(contexts)} contexts")
+        contexts = [context or [] for context in contexts]
+        if detection_states is None:
+            detection_states = [None] * len(texts)
+        if len(detection_states) != len(texts):
+            raise ValueError(f"Got {len(texts)} texts but {len(detection_states)} detection states")
+        messages = [normalize(text) for text in texts]
+        texts = [message.raw for message in messages]
+
+        # Cascade: cheap stages for every message, ML only where the verdict is still open
+        signals = [
+            self._scan_signals(message, context, state)
+            for message, context, state in zip(messages, contexts, detection_states)
+        ]
+        ml_scores = [0.0] * len(texts)
+        undecided = []
+        for i, message_signals in enumerate(signals):
+            stage = self._cascade_exit(message_signals)
+            if stage is None:
+                undecided.append(i)
+            else:
+                self.record_cascade_exit(stage)
+        if undecided:
+            with stage_metrics.span("detector.ml"):
+                scores = self._ml_scores(
+                    [texts[i] for i in undecided],
+                    [contexts[i] for i in undecided],
+                    [detection_states[i] for i in undecided],
+                )
+            for i, score in zip(undecided, scores):
+                ml_scores[i] = score
+                self.record_cascade_exit("ml")
+
+        return [
+            self._finalize(text, message_signals, ml_score)
+            for text, message_signals, ml_score in zip(texts, signals, ml_scores)
+        ]
+
+    def _ml_input_text(self, text: str, context: List[str]) -> str:
+        """
+        Text fed to the ML model
+        ✅ FIX: Concatenate last 2 messages from context so the model is context-aware
+        """
+        if not context:
+            return text
+        recent_history = " ".join(context[-2:])
+        return recent_history + " " + text
+
+    def _ml_scores(
+        self,
+        texts: List[str],
+        contexts: List[List[str]],
+        states: Optional[List[Optional[DetectionState]]] = None
+    ) -> List[float]:
+        """Get ML model scam probabilities for a batch (0.0 when no model is available)"""
+        # Read the bundle once: a concurrent hot-swap must not mix two models in one batch
+        bundle = self.live_model
+        vectorizer = bundle.vectorizer
+        if not texts or not (self.is_trained and bundle.model is not None and vectorizer is not None):
+            return [0.0] * len(texts)
+        from scipy import sparse
+
+        try:
+            if states and any(state is not None for state in states) and self._supports_incremental_tfidf(vectorizer):
+                # Session-backed messages reuse cached per-message term counts
+                text_vecs = sparse.vstack([
+                    self._incremental_tfidf(text, context, state, bundle) if state is not None
+                    else vectorizer.transform([self._ml_input_text(text, context)])
+                    for text, context, state in zip(texts, contexts, states)
+                ], format="csr")
+            else:
+                text_vecs = vectorizer.transform(
+                    [self._ml_input_text(text, context) for text, context in zip(texts, contexts)]
+                )
+            ml_proba = self._predict_proba(bundle, text_vecs)
+            column = 1 if ml_proba.shape[1] > 1 else 0
+            return [float(p) for p in ml_proba[:, column]]
+        except Exception as e:
+            if len(texts) == 1:
+                logger.warning(f"ML prediction error: {e}")
+                return [0.0]
+            # Isolate the failing message(s) instead of zeroing the whole batch
+            logger.warning(f"Batch ML prediction error, retrying per message: {e}")
+            return [
+                self._ml_scores([text], [context], [state])[0]
+                for text, context, state in zip(texts, contexts, states or [None] * len(texts))
+            ]
+
+    def _predict_proba(self, bundle: ModelBundle, text_vecs):
+        """Small batches go through the compiled tree evaluator when the bundle has one"""
+        if bundle.compiled is not None and text_vecs.shape[0] <= bundle.compiled.max_batch_rows:
+            return bundle.compiled.predict_proba(text_vecs)
+        return bundle.model.predict_proba(text_vecs)
+
+    def _supports_incremental_tfidf(self, vectorizer: Any) -> bool:
+        """
+        Incremental TF-IDF needs a word-level TfidfVectorizer: then tokens never
+        cross the " " joining messages, so the counts of the joined text are the
+        per-message counts plus the n-grams spanning message boundaries
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        return (
+            isinstance(vectorizer, TfidfVectorizer)
+            and vectorizer.analyzer == "word"
+            and hasattr(vectorizer, "vocabulary_")
+            and hasattr(vectorizer, "_tfidf")
+        )
+
+    def _message_features(self, message: str, vectorizer: Any) -> MessageFeatures:
+        """Tokenize one message once and count its in-vocabulary n-grams"""
+        preprocess = vectorizer.build_preprocessor()
+        tokenize = vectorizer.build_tokenizer()
+        stop_words = vectorizer.get_stop_words()
+
+        tokens = tokenize(preprocess(vectorizer.decode(message)))
+        if stop_words is not None:
+            tokens = [t for t in tokens if t not in stop_words]
+
+        vocabulary = vectorizer.vocabulary_
+        min_n, max_n = vectorizer.ngram_range
+        counts: Dict[int, int] = {}
+        for n in range(min_n, max_n + 1):
+            for i in range(len(tokens) - n + 1):
+                idx = vocabulary.get(" ".join(tokens[i:i + n]))
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+
+        # Only the first/last max_n-1 tokens can take part in boundary n-grams
+        edge = max_n - 1
+        if edge == 0:
+            edge_tokens = []
+        elif len(tokens) <= 2 * edge:
+            edge_tokens = list(tokens)
+        else:
+            edge_tokens = tokens[:edge] + [None] + tokens[-edge:]
+
+        return MessageFeatures(counts=counts, edge_tokens=edge_tokens)
+
+    def _incremental_tfidf(
+        self, text: str, context: List[str], state: DetectionState, bundle: Optional[ModelBundle] = None
+    ):
+        """
+        TF-IDF row for _ml_input_text(text, context) built from cached per-message
+        counts; equal to vectorizer.transform on the concatenated string
+        """
+        from scipy import sparse
+
+        if bundle is None:
+            bundle = self.live_model
+        vectorizer = bundle.vectorizer
+        # Counts index the vocabulary they were built with. Not id(vectorizer) (reused once
+        # freed) or the generation (restarted workers count from 1 again): see vocabulary_key
+        if state.ml_vocabulary != bundle.vocabulary:
+            state.ml_features = {}
+            state.ml_vocabulary = bundle.vocabulary
+
+        window = context[-2:] + [text]
+        features = []
+        for message in window:
+            cached = state.ml_features.get(message)
+            if cached is None:
+                cached = self._message_features(message, vectorizer)
+                state.ml_features[message] = cached
+            features.append(cached)
+        # Next turn's window is the last context message plus this one
+        state.ml_features = {m: state.ml_features[m] for m in window[-2:]}
+
+        counts: Dict[int, int] = {}
+        for feature in features:
+            for idx, count in feature.counts.items():
+                counts[idx] = counts.get(idx, 0) + count
+
+        # N-grams spanning message boundaries
+        min_n, max_n = vectorizer.ngram_range
+        sequence: List[Optional[str]] = []
+        boundaries = []
+        for feature in features:
+            if sequence:
+                boundaries.append(len(sequence))
+            sequence.extend(feature.edge_tokens)
+        for n in range(max(min_n, 2), max_n + 1):
+            for start in range(len(sequence) - n + 1):
+                gram = sequence[start:start + n]
+                if None in gram or not any(start < b < start + n for b in boundaries):
+                    continue
+                idx = vectorizer.vocabulary_.get(" ".join(gram))
+                if idx is not None:
+                    counts[idx] = counts.get(idx, 0) + 1
+
+        indices = sorted(counts)
+        values = [1 if vectorizer.binary else counts[i] for i in indices]
+        term_counts = sparse.csr_matrix(
+            (
+                np.asarray(values, dtype=vectorizer.dtype),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray([0, len(indices)], dtype=np.int32),
+            ),
+            shape=(1, len(vectorizer.vocabulary_)),
+        )
+        return vectorizer._tfidf.transform(term_counts, copy=False)
+
+    def _scan_signals(
+        self,
+        text: MessageText,
+        context: List[str],
+        detection_state: Optional[DetectionState] = None
+    ) -> Dict[str, Any]:
+        """Cheap cascade stages: rules, sentiment, social engineering, context, kill switches, scam type"""
+        text = normalize(text)
+        # Sentiment and social engineering are skipped once a pathological message
+        # has used its time budget; the other stages always run
+        budget = AnalysisBudget()
+        # Stage timings: each lap() closes the stage that ran since the previous one
+        laps = stage_metrics.laps()
         # Get rule-based score
         rule_score, detected_keywords = self._rule_based_score(text)
+        laps.lap("detector.rules")
         
         # Get sentiment analysis score
-        sentiment_score, sentiment_patterns = self._analyze_sentiment(text)
+        sentiment_score, sentiment_patterns = 0.0, []
+        if budget.allows("sentiment"):
+            sentiment_score, sentiment_patterns = self._analyze_sentiment(text)
+            laps.lap("detector.sentiment")
         detected_keywords.extend(sentiment_patterns)
 
         # Get generic social-engineering score (novel scam cues)
-        social_score, social_patterns = self._analyze_social_engineering(text)
+        social_score, social_patterns = 0.0, []
+        if budget.allows("social_engineering"):
+            social_score, social_patterns = self._analyze_social_engineering(text)
+            laps.lap("detector.social")
         detected_keywords.extend(social_patterns)
+        budget.report("Scam detection")
 
         # Get context analysis score
-        context_score, context_patterns = self._analyze_context(text, context)
+        context_score, context_patterns = self._analyze_context(text, context, detection_state)
         detected_keywords.extend(context_patterns)
-        
-        # Get ML model score if available
-        ml_score = 0.0
-        if self.is_trained and self.model and self.vectorizer:
-            try:
-                # ✅ FIX: Concatenate last 2 messages from context for prediction
-                # This makes the ML model context-aware
-                full_context_text = text
-                if context:
-                    # Add last 2 messages to provide context to the model
-                    recent_history = " ".join(context[-2:])
-                    full_context_text = recent_history + " " + text
-                
-                text_vec = self.vectorizer.transform([full_context_text])
-                ml_proba = self.model.predict_proba(text_vec)[0]
-                ml_score = float(ml_proba[1]) if len(ml_proba) > 1 else float(ml_proba[0])
-            except Exception as e:
-                logger.warning(f"ML prediction error: {e}")
-                ml_score = 0.0
+        laps.lap("detector.context")
         
         # 🚨 KILL SWITCH: Immediate Override for High-Risk Patterns
-        # Don't rely on averages for guaranteed signs of fraud
-        kill_switch_score = 0.0
-        kill_switch_triggered = False
-        
-        # 1. Phishing Link + Any Urgency/Threat = 100% Scam
-        if 'suspicious_link' in detected_keywords and (
-            sentiment_score > 0.1 or 
-            any(kw in detected_keywords for kw in ['urgency_phrase', 'fear_tactic'] + self.urgency_keywords)
-        ):
-            kill_switch_score = 1.0
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_PHISHING_COMBO")
-            logger.info(f"Kill switch: Phishing link with urgency/threat detected")
-        
-        # 2. Digital Arrest Combo (Authority + Skype/Video + Crime) = 1.0 Scam
-        if any(kw in text.lower() for kw in ['skype', 'video call', 'digital arrest']) and \
-           any(kw in text.lower() for kw in ['cbi', 'police', 'customs', 'ncb', 'sharma']):
-            kill_switch_score = 1.0
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_DIGITAL_ARREST")
-            logger.info(f"Kill switch: Digital arrest pattern detected")
-
-        # 3. Sextortion Combo (Video recorded + Social Media/Contacts + Threat) = 1.0 Scam
-        # Note: Exclude if it looks like a Honeytrap (video CALL, whatsapp call, intimate) - that's a different, more specific category
-        if any(kw in text.lower() for kw in ['recorded', 'video', 'recording']) and \
-           any(kw in text.lower() for kw in ['contacts', 'friends', 'facebook', 'leaked']) and \
-           any(kw in text.lower() for kw in ['pay', 'money', 'delete', 'rupees']) and \
-           not any(kw in text.lower() for kw in ['video call', 'whatsapp call', 'intimate', 'nude']):
-            kill_switch_score = 1.0
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_SEXTORTION_COMBO")
-            logger.info(f"Kill switch: Sextortion pattern detected")
-
-        # 4. Financial Request + Threat = 0.95 Scam (Extortion pattern)
-        # Refined: require explicit payment/money intent to avoid misclassifying OTP phishing
-        payment_intent = bool(re.search(
-            r"\b(pay|payment|transfer|send|deposit|money|amount|rs\.?|inr|₹|upi)\b",
-            text.lower()
-        ))
-        if (payment_intent and
-            ('upi_id_request' in detected_keywords or 
-             any(kw in detected_keywords for kw in self.financial_keywords)) and
-            any(kw in detected_keywords for kw in self.threat_keywords) and
-            not any(kw in text.lower() for kw in ['airtel', 'jio', 'vi', 'bsnl', 'challan', 'rto', 'customer care', 'agent id'])):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_EXTORTION_COMBO")
-            logger.info(f"Kill switch: Financial request with threat detected")
-        
-        # 5. FedEx/Courier Illegal Item Handover = 0.95 Scam
-        if any(kw in text.lower() for kw in ['fedex', 'dhl', 'parcel', 'courier']) and \
-           any(kw in text.lower() for kw in ['drugs', 'illegal', 'contraband', 'passport']) and \
-           any(kw in text.lower() for kw in ['cbi', 'customs', 'police']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_COURIER_HANDOVER")
-            logger.info(f"Kill switch: Courier illegal item handover pattern detected")
-
-        # 6. Known Multi-Stage Scam Pattern 
-        if any('multi_stage' in p for p in detected_keywords):
-            kill_switch_score = max(kill_switch_score, 0.85)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_MULTI_STAGE")
-            logger.info(f"Kill switch: Multi-stage scam pattern detected")
-        
-        # 4. Suspicious link alone (even without urgency) is very high risk
-        if 'suspicious_link' in detected_keywords and not kill_switch_triggered:
-            kill_switch_score = max(kill_switch_score, 0.75)
-            kill_switch_triggered = True
-            logger.info(f"Kill switch: Suspicious link detected")
-        
-        # 7. LIC/Insurance Prize Scam (Congratulations + Policy/Bonus/LIC) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['congratulations', 'badhai', 'mubarak']) and \
-           any(kw in text.lower() for kw in ['lic', 'policy', 'insurance', 'bonus', 'approve', 'maturity']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_LIC_SCAM")
-            logger.info(f"Kill switch: LIC/Insurance prize scam detected")
-        
-        # 8. COVID/Scheme Urgency Scam (Scheme + Expire/Urgent) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['scheme', 'relief', 'subsidy', 'government']) and \
-           any(kw in text.lower() for kw in ['expire', 'hours', 'today', 'immediate', 'last chance']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_SCHEME_SCAM")
-            logger.info(f"Kill switch: Government scheme urgency scam detected")
+        # Don't rely on averages for guaranteed signs of fraud (see KILL_SWITCH_RULES)
+        kill_switch_score, kill_switch_triggered, kill_switch_tags = self._evaluate_kill_switches(
+            text, detected_keywords, sentiment_score
+        )
+        detected_keywords.extend(kill_switch_tags)
+        laps.lap("detector.kill_switch")
         
-        # 9. YouTube/Task Job Scam (Tasks/Reviews + Daily Income + WhatsApp/Telegram) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['like youtube', 'google maps review', 'task', 'subscribe']) and \
-           any(kw in text.lower() for kw in ['daily income', 'earn', 'salary', 'bonus', 'rs', 'inr']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_TASK_JOB_SCAM")
-            logger.info(f"Kill switch: YouTube/Task job scam detected")
-
-        # 10. RTO/Challan/Traffic Fine Scam (Vehicle # + Fine + Disconnect/Block) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['challan', 'rto', 'traffic fine', 'vehicle number', 'dl block']) and \
-           any(kw in text.lower() for kw in ['pending', 'unpaid', 'immediately', 'pay now']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_CHALLAN_SCAM")
-            logger.info(f"Kill switch: RTO/Challan scam detected")
-
-        # 11. SIM Swap / eSIM Upgrade Scam (Airtel/Jio + 5G Upgrade + OTP/QR) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['airtel', 'jio', 'vi', 'bsnl', 'voda', 'sim', 'esim', '5g']) and \
-           any(kw in text.lower() for kw in ['blocked', 'verification', 'update', 'share', 'scan', 'deactivate', 'activate', 'upgrade']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_SIM_SWAP_SCAM")
-            logger.info(f"Kill switch: SIM/eSIM upgrade scam detected")
-
-        # 12. Marketplace/QR Code Scam (OLX + Scan to Receive + Amount) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['olx', 'quikr', 'marketplace', 'sofa', 'furnitur', 'interested']) and \
-           any(kw in text.lower() for kw in ['qr', 'scan', 'receive', 'amount', 'barcode']):
-            kill_switch_score = max(kill_switch_score, 0.98)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_QR_SCAM")
-            logger.info(f"Kill switch: Marketplace QR code scam detected")
-
-        # 13. Instant Loan / Harassment Scam (Instant Loan + No Docs + Gallery Access) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['instant loan', 'no documents', 'fast credit', 'loan approve']) and \
-           any(kw in text.lower() for kw in ['emergency', 'pan card', 'aadhaar card', 'contacts access']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_LOAN_SCAM")
-            logger.info(f"Kill switch: Predatory loan app scam detected")
-
-        # --- V4.0: ADVANCED KILL SWITCHES (2024-2025 Research) ---
-
-        # 14. Pig Butchering (Investment + Romance + Crypto) = 1.0 Scam
-        if any(kw in text.lower() for kw in ['i love you', 'trust me', 'lonely', 'widower', 'overseas']) and \
-           any(kw in text.lower() for kw in ['investment', 'crypto', 'trading', 'withdraw', 'platform', 'returns']):
-            kill_switch_score = max(kill_switch_score, 1.0)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_PIG_BUTCHER")
-            logger.info(f"Kill switch: Pig Butchering (romance + investment) scam detected")
-
-        # 15. Honeytrap Video Call (Video Call + Recording Threat + Payment) = 1.0 Scam
-        if any(kw in text.lower() for kw in ['video call', 'whatsapp call', 'nude', 'intimate', 'recorded you']) and \
-           any(kw in text.lower() for kw in ['your contacts', 'will viral', 'pay or else', 'facebook leak', 'share with friends']):
-            kill_switch_score = max(kill_switch_score, 1.0)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_HONEYTRAP")
-            logger.info(f"Kill switch: Honeytrap video call sextortion detected")
-
-        # 16. AI Voice Cloning / Deepfake Emergency (Family In Trouble + Money) = 1.0 Scam
-        if any(kw in text.lower() for kw in ['mom help', 'dad i need', 'son in trouble', 'accident', 'hospital urgent', 'kidnapped', 'bail money']) and \
-           any(kw in text.lower() for kw in ['send immediately', 'don\'t tell anyone', 'urgent transfer', 'police custody']):
-            kill_switch_score = max(kill_switch_score, 1.0)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_VOICE_CLONE")
-            logger.info(f"Kill switch: AI Voice Cloning / Deepfake emergency scam detected")
-
-        # 17. CEO/Boss Fraud (Impersonation + Urgent Transfer) = 0.98 Scam
-        if any(kw in text.lower() for kw in ['this is your ceo', 'boss here', 'i am in a meeting', 'confidential transaction']) and \
-           any(kw in text.lower() for kw in ['urgent wire', 'vendor payment', 'do not discuss', 'handle personally', 'reply to personal email']):
-            kill_switch_score = max(kill_switch_score, 0.98)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_CEO_FRAUD")
-            logger.info(f"Kill switch: CEO/Business Email Compromise fraud detected")
-
-        # 18. Viral Video Link Malware (Trending/Shocking + Link) = 0.9 Scam
-        if any(kw in text.lower() for kw in ['7 minute viral', 'shocking video', 'your video is trending', 'you are in this video', 'click to see who']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_VIRAL_LINK")
-            logger.info(f"Kill switch: Viral video link malware scam detected")
-
-        # 19. TRAI/DND Deactivation (TRAI + Disconnect + Press 1) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['trai', 'telecom', 'dnd', 'regulatory compliance', 'telecom department']) and \
-           any(kw in text.lower() for kw in ['disconnected', 'deactivated', 'press 1', 'press 2', 'within 24 hours']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_TRAI_SCAM")
-            logger.info(f"Kill switch: TRAI/DND deactivation scam detected")
-
-        # --- V5.0: EXTENDED INDIAN KILL SWITCHES ---
-
-        # 20. Stock Market / Fake Trading Group (IPO + Expert + Withdrawal Fee) = 0.98 Scam
-        if any(kw in text.lower() for kw in ['ipo', 'stock market', 'trading expert', 'trading signal', 'sebi', 'investment group']) and \
-           any(kw in text.lower() for kw in ['guaranteed', 'withdrawal tax', 'processing fee', 'high profit', 'whatsapp group']):
-            kill_switch_score = max(kill_switch_score, 0.98)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_STOCK_TRADING")
-            logger.info(f"Kill switch: Fake stock market trading group detected")
-
-        # 21. Welfare Scheme Fraud (PM-Kisan / Ayushman / Govt Subsidy) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['pm kisan', 'ayushman bharat', 'govt scheme', 'sarkari yojana', 'samman nidhi', 'subsidy']) and \
-           any(kw in text.lower() for kw in ['kitsch', 'bonus', 'claim', 'registration fee', 'click to register']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_WELFARE_FRAUD")
-            logger.info(f"Kill switch: Government welfare scheme fraud detected")
-
-        # 22. Rent / Property Token Scam (Security Deposit Before Visit + OLX/MagicBricks) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['rent', 'property', 'flat', 'house', 'olx', 'magicbricks']) and \
-           any(kw in text.lower() for kw in ['token amount', 'security deposit', 'gate pass', 'before visit', 'block property']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_RENT_SCAM")
-            logger.info(f"Kill switch: Online rental property fraud detected")
-
-        # 23. Free Recharge / Data Balance Scam (Free + Recharge + Brand) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['free recharge', 'free data', 'balance', 'recharge link']) and \
-           any(kw in text.lower() for kw in ['jio', 'airtel', 'vi', 'offer', 'congratulations', 'won']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_RECHARGE_SCAM")
-            logger.info(f"Kill switch: Free recharge/data баланс scam detected")
-
-        # 24. Election / Voter ID Fraud (Voter ID + Update + Mandatory) = 0.85 Scam
-        if any(kw in text.lower() for kw in ['voter id', 'election card', 'voter list']) and \
-           any(kw in text.lower() for kw in ['update', 'mandatory', 'verify', 'click to update']):
-            kill_switch_score = max(kill_switch_score, 0.85)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_ELECTION_SCAM")
-            logger.info(f"Kill switch: Election/Voter ID fraud detected")
-
-        # --- V5.1: NEW INDIAN SCAM CATEGORIES ---
-
-        # 25. Credit Card Reward Points (Points + Expire/Redeem) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['reward points', 'credit card points', 'redeem points']) and \
-           any(kw in text.lower() for kw in ['expire today', 'expiring', 'redeem now', 'cash value', 'click link']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_CREDIT_REWARDS")
-            logger.info(f"Kill switch: Credit card reward points scam detected")
-
-        # 26. FASTag KYC Update (FASTag + Deactivate/Update) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['fastag', 'toll tag', 'nhai', 'vehicle tag']) and \
-           any(kw in text.lower() for kw in ['kyc pending', 'deactivated', 'blocked', 'update immediately', 'wallet expired']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_FASTAG_SCAM")
-            logger.info(f"Kill switch: FASTag KYC update scam detected")
-
-        # 27. Income Tax Refund (Refund + Approve/Verify) = 0.98 Scam
-        if any(kw in text.lower() for kw in ['income tax', 'tax refund', 'it dept', 'refund issued', 'it department']) and \
-           any(kw in text.lower() for kw in ['click to claim', 'verify account', 'refund pending', 'approved', 'update bank', 'claim', 'incorrect']):
-            kill_switch_score = max(kill_switch_score, 0.98)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_IT_REFUND")
-            logger.info(f"Kill switch: Income Tax refund phishing detected")
-
-        # 28. Ram Mandir / Religious VIP Scam (Temple + VIP/Donation) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['ram mandir', 'ayodhya', 'temple trust', 'darshan', 'jai shri ram']) and \
-           any(kw in text.lower() for kw in ['vip pass', 'vip entry', 'vip darshan', 'prasad', 'prasad delivery', 'donation qr', 'book now', 'skip the queue']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_RELIGIOUS_SCAM")
-            logger.info(f"Kill switch: Religious/VIP Darshan scam detected")
-
-        # --- V5.2: ADVANCED INDIAN IDENTITY SCAMS ---
-
-        # 29. Hi Mom / Family Emergency WhatsApp (New Number + Urgent Money) = 0.98 Scam
-        if any(kw in text.lower() for kw in ['hi mom', 'hi mum', 'hi dad', 'this is your son', 'this is your daughter', 'new number']) and \
-           any(kw in text.lower() for kw in ['lost my phone', 'broken phone', 'can\'t access bank', 'urgent help', 'need money', 'emergency', 'don\'t tell']):
-            kill_switch_score = max(kill_switch_score, 0.98)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_HI_MOM_SCAM")
-            logger.info(f"Kill switch: Hi Mom/Family Emergency WhatsApp scam detected")
-
-        # 30. Aadhaar / UIDAI Update Scam (Aadhaar + Update/Expired) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['aadhaar', 'uidai', 'biometric', 'aeps', 'e-aadhaar']) and \
-           any(kw in text.lower() for kw in ['update', 'expired', 'verification', 'link expired', 'click to update', 'mandatory update']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_AADHAAR_SCAM")
-            logger.info(f"Kill switch: Aadhaar/UIDAI update scam detected")
-
-        # 31. SBI YONO / Bank App Blocked (YONO + Blocked/Suspended) = 0.95 Scam
-        if any(kw in text.lower() for kw in ['yono', 'sbi yono', 'netbanking', 'mobile banking']) and \
-           any(kw in text.lower() for kw in ['blocked', 'suspended', 'will be blocked', 'update pan', 'download apk', 'click to activate']):
-            kill_switch_score = max(kill_switch_score, 0.95)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_YONO_SCAM")
-            logger.info(f"Kill switch: SBI YONO/Bank App blocked scam detected")
-
-        # 32. EPF / PF Withdrawal Scam (PF + Claim/Frozen) = 0.90 Scam
-        if any(kw in text.lower() for kw in ['epf', 'pf withdrawal', 'provident fund', 'uan', 'epfo']) and \
-           any(kw in text.lower() for kw in ['claim', 'frozen', 'settlement', 'processing fee', 'faster withdrawal', 'click to claim']):
-            kill_switch_score = max(kill_switch_score, 0.90)
-            kill_switch_triggered = True
-            detected_keywords.append("CRITICAL_EPF_SCAM")
-            logger.info(f"Kill switch: EPF/PF withdrawal scam detected")
+        # 🛡️ SAFETY CHECK: Reduce score for likely legitimate messages
+        # This reduces false positives for common transactional messages
+        is_likely_legit = any(regex_guard.search(p, text.raw) for p in LEGIT_MESSAGE_PATTERNS)
         
+        # Determine scam type and alternatives
+        scam_type, alt_types = self._determine_scam_type(text, detected_keywords)
+        laps.lap("detector.scam_type")
+
+        # 🧪 NOVEL SCAM OVERRIDE: Strong social-engineering cues without a known category
+        novel_override = False
+        social_hits = [p for p in social_patterns if p.startswith("social_")]
+        if (
+            scam_type == "General_Scam"
+            and not kill_switch_triggered
+            and social_score >= 0.45
+            and len(social_hits) >= 2
+        ):
+            scam_type = "Novel_Scam"
+            detected_keywords.append("NOVEL_SOCIAL_ENGINEERING")
+            alt_types["Novel_Scam"] = round(social_score, 2)
+            novel_override = True
+
+        return {
+            "rule_score": rule_score,
+            "sentiment_score": sentiment_score,
+            "social_score": social_score,
+            "context_score": context_score,
+            "detected_keywords": detected_keywords,
+            "sentiment_patterns": sentiment_patterns,
+            "social_patterns": social_patterns,
+            "context_patterns": context_patterns,
+            "kill_switch_score": kill_switch_score,
+            "kill_switch_triggered": kill_switch_triggered,
+            "is_likely_legit": is_likely_legit,
+            "scam_type": scam_type,
+            "alt_types": alt_types,
+            "novel_override": novel_override,
+            "degraded": budget.degraded,
+            # Get adaptive threshold for this scam type
+            "threshold": SCAM_TYPE_THRESHOLDS.get(scam_type, SCAM_CONFIDENCE_THRESHOLD),
+        }
+
+    def _combined_score(self, signals: Dict[str, Any], ml_score: float) -> float:
+        """Final confidence for a given ML score (non-decreasing in ml_score)"""
+        kill_switch_triggered = signals["kill_switch_triggered"]
+
         # Apply Kill Switch or calculate weighted score
-        if kill_switch_triggered and kill_switch_score > 0:
-            combined_score = kill_switch_score
+        if kill_switch_triggered and signals["kill_switch_score"] > 0:
+            combined_score = signals["kill_switch_score"]
         else:
             # Weighted average with normalized weights (robust to new signals)
             weights = {
@@ -1418,97 +1890,101 @@ class ScamDetector:
 
             combined_score = float(
                 (ml_score * weights["ml_model"]) +
-                (rule_score * weights["rule_based"]) +
-                (context_score * weights["context_bonus"]) +
-                (sentiment_score * weights["sentiment_weight"]) +
-                (social_score * weights["social_engineering"])
+                (signals["rule_score"] * weights["rule_based"]) +
+                (signals["context_score"] * weights["context_bonus"]) +
+                (signals["sentiment_score"] * weights["sentiment_weight"]) +
+                (signals["social_score"] * weights["social_engineering"])
             ) / weight_sum
 
-        
-        # 🛡️ SAFETY CHECK: Reduce score for likely legitimate messages
-        # This reduces false positives for common transactional messages
-        legit_patterns = [
-            r"otp is \d{4,6}",          # "OTP is 123456"
-            r"code is \d{4,6}",          # "Code is 123456"
-            r"sent you ₹\d+",            # "Sent you ₹500" (payment receipts)
-            r"sent you rs\.?\s*\d+",     # "Sent you Rs 500"
-            r"received ₹\d+",            # Transaction confirmations
-            r"received rs\.?\s*\d+",
-            r"credited to your",         # Bank credit messages
-            r"debited from your",        # Bank debit messages
-            r"your order #\w+",          # Order confirmations
-            r"meeting.*rescheduled",     # Business meetings
-            r"office.*meeting",          # Office context
-            r"happy birthday",           # Greetings
-            r"dinner",                   # Personal plans
-            r"lunch",                    # Personal plans
-            r"love you",                 # Personal affection
-            r"miss you",                 # Personal affection
-        ]
-        
-        is_likely_legit = any(re.search(p, text, re.IGNORECASE) for p in legit_patterns)
-        
         # Only apply safety reduction if NOT a kill switch case and no suspicious link
-        if is_likely_legit and 'suspicious_link' not in detected_keywords and not kill_switch_triggered:
+        if (signals["is_likely_legit"] and 'suspicious_link' not in signals["detected_keywords"]
+                and not kill_switch_triggered):
             old_score = combined_score
             combined_score *= 0.5  # Halve the scam score for legitimate-looking patterns
             logger.debug(f"Safety check: Reduced score from {old_score:.2f} to {combined_score:.2f} for legit pattern")
 
         # Clamp to valid probability range
         combined_score = max(0.0, min(combined_score, 1.0))
-        
-        # Determine scam type and alternatives
-        scam_type, alt_types = self._determine_scam_type(text, detected_keywords)
 
-        # 🧪 NOVEL SCAM OVERRIDE: Strong social-engineering cues without a known category
-        novel_override = False
-        social_hits = [p for p in social_patterns if p.startswith("social_")]
-        if (
-            scam_type == "General_Scam"
-            and not kill_switch_triggered
-            and social_score >= 0.45
-            and len(social_hits) >= 2
-        ):
-            scam_type = "Novel_Scam"
-            detected_keywords.append("NOVEL_SOCIAL_ENGINEERING")
-            alt_types["Novel_Scam"] = round(social_score, 2)
+        if signals["novel_override"]:
             # Nudge confidence to reflect strong novel scam intent
-            combined_score = max(combined_score, min(0.85, social_score + 0.15))
-            novel_override = True
-        
-        # Get adaptive threshold for this scam type
-        threshold = SCAM_TYPE_THRESHOLDS.get(scam_type, SCAM_CONFIDENCE_THRESHOLD)
-        
+            combined_score = max(combined_score, min(0.85, signals["social_score"] + 0.15))
+        return combined_score
+
+    def _cascade_exit(self, signals: Dict[str, Any]) -> Optional[str]:
+        """
+        Name of the cascade stage that already decides this message, or None if the
+        ML score is still needed. A scam verdict is fixed when even ml_score=0 reaches
+        the threshold and ml_score=0 and 1 give the same threat level; the result
+        then reports the rules-only confidence, a lower bound of the ML-scored one.
+        Non-scam verdicts always get the ML score: with any ML weight it can lift
+        the confidence into main.py's LLM band.
+        """
+        if signals["kill_switch_triggered"] and signals["kill_switch_score"] > 0:
+            return "kill_switch"
+        if not DETECTION_CASCADE_CONFIG["enabled"]:
+            return None
+        lower = self._combined_score(signals, 0.0)
+        if (lower >= signals["threshold"] + DETECTION_CASCADE_CONFIG["early_exit_margin"]
+                and self._threat_level(signals, lower) == self._threat_level(signals, self._combined_score(signals, 1.0))):
+            return "rules_scam"
+        return None
+
+    def _threat_level(self, signals: Dict[str, Any], combined_score: float) -> ThreatLevel:
+        """Threat level of a message scored combined_score"""
+        detected_keywords = signals["detected_keywords"]
         # Assess threat level (higher for kill switch cases)
         threat_level = self._assess_threat_level(
-            combined_score, detected_keywords, sentiment_patterns, context_patterns
+            combined_score, detected_keywords, signals["sentiment_patterns"], signals["context_patterns"]
         )
         
         # Upgrade threat level for kill switch cases
-        if kill_switch_triggered and threat_level != ThreatLevel.HIGH:
+        if signals["kill_switch_triggered"] and threat_level != ThreatLevel.HIGH:
             if any("CRITICAL" in kw for kw in detected_keywords):
                 threat_level = ThreatLevel.HIGH
+        return threat_level
+
+    def record_cascade_exit(self, stage: str) -> None:
+        """Count a cascade exit (also used by main.py for the LLM stage)"""
+        self.cascade_counts[stage] = self.cascade_counts.get(stage, 0) + 1
+
+    def get_cascade_stats(self) -> Dict[str, int]:
+        """Per-stage exit counters for the stats endpoint"""
+        return dict(self.cascade_counts)
+
+    def _finalize(self, text: str, signals: Dict[str, Any], ml_score: float) -> DetectionResult:
+        """Combine the cheap-stage signals with ml_score into a detect() tuple"""
+        combined_score = self._combined_score(signals, ml_score)
+        detected_keywords = signals["detected_keywords"]
+        sentiment_patterns = signals["sentiment_patterns"]
+        context_patterns = signals["context_patterns"]
+        social_patterns = signals["social_patterns"]
+        kill_switch_triggered = signals["kill_switch_triggered"]
+        scam_type = signals["scam_type"]
+        
+        threat_level = self._threat_level(signals, combined_score)
         
         # Make decision with adaptive threshold
-        is_scam = bool(combined_score >= threshold)
+        is_scam = bool(combined_score >= signals["threshold"])
         
         # Create classification object
         classification = ScamClassification(
             scamType=scam_type,
             confidence=combined_score,
-            alternativeTypes=[{k: v} for k, v in alt_types.items()],
-            tacticsIdentified=list(set(sentiment_patterns + context_patterns + social_patterns))
+            alternativeTypes=[{k: v} for k, v in signals["alt_types"].items()],
+            tacticsIdentified=list(set(sentiment_patterns + context_patterns + social_patterns)),
+            degraded=signals["degraded"],
         )
 
-        if novel_override:
+        if signals["novel_override"]:
             self._log_novel_sample(
                 text=text,
                 combined_score=combined_score,
-                social_score=social_score,
-                rule_score=rule_score,
+                social_score=signals["social_score"],
+                rule_score=signals["rule_score"],
                 ml_score=ml_score,
-                sentiment_score=sentiment_score,
-                context_score=context_score,
+                sentiment_score=signals["sentiment_score"],
+                context_score=signals["context_score"],
                 detected_keywords=detected_keywords,
                 social_patterns=social_patterns,
             )
@@ -1526,6 +2002,5 @@ class ScamDetector:
         
         return is_scam, combined_score, scam_type, list(set(detected_keywords)), classification, threat_level
 
-
-# Global instance
-detector = ScamDetector()
+# Global instance (built on first use)
+detector = LazySingleton(ScamDetector)
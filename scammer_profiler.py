@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from collections import defaultdict
 
+from lazy_singleton import LazySingleton
+
 # Use absolute path for persistence
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scammer_database.json")
 logger = logging.getLogger("honeypot.profiler")
@@ -78,5 +80,5 @@ class ScammerProfiler:
                 }
         return None
 
-# Global instance
-profiler = ScammerProfiler()
+# Global instance (built on first use)
+profiler = LazySingleton(ScammerProfiler)
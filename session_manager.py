@@ -18,7 +18,6 @@ from config import (
 from models import (
     SessionState,
     Message,
-    ExtractedIntelligence,
     GUVICallbackPayload,
     EngagementPhase,
     ThreatLevel,
@@ -34,10 +33,21 @@ from exceptions import (
     CallbackRetryExhaustedError,
 )
 from logging_config import get_logger, log_with_context, api_logger
+from text_normalizer import NormalizedMessage, normalize
+from lazy_singleton import LazySingleton
+from pattern_registry import pattern_registry
+from stage_metrics import stage_metrics
 import logging
 
 logger = get_logger("honeypot.session_manager")
 
+# Response quality analytics
+_EXTRACTION_ATTEMPT_PATTERNS = pattern_registry.compile_all("session.extraction_attempt", [
+    r"upi", r"account", r"bank", r"number", r"branch", r"phone", r"name", r"office", r"id card"
+])
+_REALISM_PATTERN = pattern_registry.compile("session.realism", r"(arre|yaar|matlab|actually|sorry)")
+_WORD_PATTERN = pattern_registry.compile("session.word", r'\w+')
+
 
 class SessionManager:
     """
@@ -87,11 +97,13 @@ class SessionManager:
         self,
         session: SessionState,
         message: Message,
-        keywords: List[str] = None
+        keywords: List[str] = None,
+        normalized: Optional[NormalizedMessage] = None
     ) -> None:
         """Update conversation analytics"""
         analytics = session.analytics
         keywords = keywords or []
+        text_lower = (normalized or normalize(message.text)).lower
         
         # Track message timing
         if session.conversation_history:
@@ -118,7 +130,7 @@ class SessionManager:
         
         # Track urgency progression
         urgency_keywords = ['urgent', 'immediate', 'now', 'hurry', 'fast', 'quick']
-        urgency_score = sum(1 for kw in urgency_keywords if kw in message.text.lower()) / len(urgency_keywords)
+        urgency_score = sum(1 for kw in urgency_keywords if kw in text_lower) / len(urgency_keywords)
         analytics.urgencyProgression.append(urgency_score)
         
         # Track intent diversity (tactics used)
@@ -140,7 +152,7 @@ class SessionManager:
             analytics.scammerEngagementLevel = min(1.0, analytics.scammerEngagementLevel + 0.05)
         
         # --- Scammer Sentiment Analysis (V34) ---
-        msg_text = message.text.lower()
+        msg_text = text_lower
         frustration_keywords = ["hurry", "last chance", "hello?", "are you there", "waiting", "fast", "immediately", "reply"]
         threat_keywords = ["arrest", "seize", "police", "legal action", "jail", "court", "warrant", "illegal"]
         
@@ -184,8 +196,8 @@ class SessionManager:
                         risk += 0.1
         
         # Too many questions about scammer details might raise suspicion
-        intel = session.extracted_intelligence
-        if len(intel.personNames) > 2 and len(intel.phoneNumbers) > 2:
+        intel = session.intelligence
+        if intel.count("personNames") > 2 and intel.count("phoneNumbers") > 2:
             risk += 0.1
 
         # Scammer frustration increases risk
@@ -253,9 +265,14 @@ class SessionManager:
         scam_type: str,
         keywords: list,
         threat_level: ThreatLevel = ThreatLevel.MEDIUM,
-        forced_persona: Optional[str] = None
+        forced_persona: Optional[str] = None,
+        normalized: Optional[NormalizedMessage] = None
     ) -> SessionState:
-        """Update session with new message and detection results"""
+        """
+        Update session with new message and detection results
+        normalized: the request's NormalizedMessage for message.text (built here if omitted)
+        """
+        normalized = normalized or normalize(message.text)
         session = await self.get_or_create_session(
             session_id, 
             scam_type, 
@@ -281,14 +298,15 @@ class SessionManager:
                     session.persona = agent.select_persona(scam_type, first_message=message.text)
             
             # Update analytics
-            self._update_analytics(session, message, keywords)
+            self._update_analytics(session, message, keywords, normalized)
 
             
             # Update persona emotional state
-            agent.update_persona_emotion(session, message.text)
+            agent.update_persona_emotion(session, normalized)
             
             # Extract and accumulate intelligence
-            new_intel = extractor.extract_from_text(message.text)
+            with stage_metrics.span("session.extraction"):
+                new_intel = extractor.extract_from_text(normalized)
             
             # --- 🛡️ REFINEMENT: Update Global Scammer Profiler ---
             try:
@@ -302,29 +320,11 @@ class SessionManager:
             except Exception as e:
                 logger.error(f"Global profiler update failed: {e}")
 
-            session.extracted_intelligence = extractor.merge_intelligence(
-                session.extracted_intelligence,
-                ExtractedIntelligence(
-                    bankAccounts=list(new_intel.get('bank_accounts', set())),
-                    upiIds=list(new_intel.get('upi_ids', set())),
-                    phishingLinks=list(new_intel.get('phishing_links', set())),
-                    phoneNumbers=list(new_intel.get('phone_numbers', set())),
-                    cryptoWallets=list(new_intel.get('crypto_wallets', set())),
-                    suspiciousKeywords=list(new_intel.get('suspicious_keywords', set())),
-                    emailAddresses=list(new_intel.get('email_addresses', set())),
-                    personNames=list(new_intel.get('person_names', set())),
-                    organizationNames=list(new_intel.get('organization_names', set())),
-                    paymentPlatforms=list(new_intel.get('payment_platforms', set())),
-                    socialMediaHandles=list(new_intel.get('social_handles', set())),
-                    geographicIndicators=list(new_intel.get('geographic_indicators', set())),
-                    referenceNumbers=list(new_intel.get('reference_numbers', set())),
-                    vehicleNumbers=list(new_intel.get('vehicle_numbers', set())),
-                    employeeIds=list(new_intel.get('employee_ids', set())),
-                )
-            )
+            # Fold only this message's new items into the session's accumulator
+            session.intelligence.add(new_intel)
             
             # Update scammer profile
-            self._update_scammer_profile(session, new_intel)
+            self._update_scammer_profile(session, new_intel, normalized)
             
             # Check if engagement should complete (intelligent completion)
             should_complete, reason = self._should_complete_intelligently(session)
@@ -342,7 +342,12 @@ class SessionManager:
         
         return session
     
-    def _update_scammer_profile(self, session: SessionState, new_intel: dict) -> None:
+    def _update_scammer_profile(
+        self,
+        session: SessionState,
+        new_intel: dict,
+        last_message: Optional[NormalizedMessage] = None
+    ) -> None:
         """Update cross-session scammer profile with behavioral patterns"""
         identifiers = (
             list(new_intel.get('phone_numbers', [])) +
@@ -380,7 +385,10 @@ class SessionManager:
                 "Bank Manager": ["bank manager", "sbi", "hdfc", "cyber cell", "manager singh"],
                 "Customer Care": ["customer care", "support", "amazon", "fedex", "kbc"]
             }
-            last_msg = session.conversation_history[-1].text.lower() if session.conversation_history else ""
+            if last_message is not None:
+                last_msg = last_message.lower
+            else:
+                last_msg = session.conversation_history[-1].text.lower() if session.conversation_history else ""
             for claim, kws in authority_keywords.items():
                 if any(kw in last_msg for kw in kws):
                     profile.authority_claim = claim
@@ -608,8 +616,6 @@ class SessionManager:
 
     def _calculate_response_quality(self, session: SessionState) -> ResponseQuality:
         """Calculate response quality metrics for AI performance tracking"""
-        import re
-        
         quality = ResponseQuality()
         
         # Get all bot responses
@@ -636,12 +642,9 @@ class SessionManager:
         quality.persona_consistency = min(1.0, persona_hits / max(len(target_keywords), 1))
         
         # --- 2. Extraction Attempts ---
-        extraction_patterns = [
-            r"upi", r"account", r"bank", r"number", r"branch", r"phone", r"name", r"office", r"id card"
-        ]
         for response in bot_responses:
-            for pattern in extraction_patterns:
-                if re.search(pattern, response.lower()):
+            for pattern in _EXTRACTION_ATTEMPT_PATTERNS:
+                if pattern.search(response.lower()):
                     quality.extraction_attempts += 1
                     break
         
@@ -650,7 +653,7 @@ class SessionManager:
         realism_indicators = 0
         for response in bot_responses:
             if "..." in response: realism_indicators += 0.5
-            if re.search(r"(arre|yaar|matlab|actually|sorry)", response.lower()): realism_indicators += 0.5
+            if _REALISM_PATTERN.search(response.lower()): realism_indicators += 0.5
             if len(response) > 20 and len(response) < 200: realism_indicators += 0.5
             if not response.isupper(): realism_indicators += 0.5
         
@@ -688,7 +691,7 @@ class SessionManager:
         hinglish_count = 0
         for r in bot_responses:
             # Clean and split
-            words = re.findall(r'\w+', r.lower())
+            words = _WORD_PATTERN.findall(r.lower())
             for word in words:
                 if word in hinglish_words:
                     hinglish_count += 1
@@ -808,5 +811,5 @@ class SessionManager:
         }
 
 
-# Global instance
-session_manager = SessionManager()
+# Global instance (built on first use)
+session_manager = LazySingleton(SessionManager)
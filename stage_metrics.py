@@ -0,0 +1,215 @@
+"""
+Per-Stage Latency Metrics
+Lightweight spans (perf_counter_ns) around detection and request-handling stages,
+aggregated into in-process log-bucketed histograms for /api/metrics
+"""
+import math
+import threading
+from contextvars import ContextVar
+from time import perf_counter_ns
+from typing import Dict, Optional
+
+from config import STAGE_METRICS_CONFIG
+
+# Durations under 16ns get a bucket each; above that, each power of two is split
+# into 16 buckets, so a reported percentile is within ~3% of the true value
+_SUB_BUCKET_BITS = 4
+_SUB_BUCKETS = 1 << _SUB_BUCKET_BITS
+_NUM_BUCKETS = 64 * _SUB_BUCKETS
+
+# Per-request stage totals (ns) while a trace is active, see StageMetrics.start_trace
+_current_trace: ContextVar[Optional[Dict[str, int]]] = ContextVar("stage_trace", default=None)
+
+
+def _bucket_index(ns: int) -> int:
+    if ns < _SUB_BUCKETS:
+        return max(ns, 0)
+    shift = ns.bit_length() - _SUB_BUCKET_BITS - 1
+    return (shift << _SUB_BUCKET_BITS) + (ns >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """Middle of a bucket, in ns"""
+    if index < _SUB_BUCKETS:
+        return float(index)
+    shift = (index >> _SUB_BUCKET_BITS) - 1
+    return ((index & (_SUB_BUCKETS - 1)) + _SUB_BUCKETS + 0.5) * (1 << shift)
+
+
+class StageHistogram:
+    """Log-bucketed latency histogram for one stage"""
+
+    __slots__ = ("counts", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * _NUM_BUCKETS
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int) -> None:
+        # _bucket_index inlined: this runs for every stage of every message
+        if ns < _SUB_BUCKETS:
+            self.counts[max(ns, 0)] += 1
+        else:
+            shift = ns.bit_length() - _SUB_BUCKET_BITS - 1
+            self.counts[(shift << _SUB_BUCKET_BITS) + (ns >> shift)] += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in ms"""
+        count = self.count
+        if not count:
+            return 0.0
+        rank = max(1, math.ceil(count * q / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_value(index), self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self) -> Dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "p50Ms": round(self.percentile(50), 3),
+            "p95Ms": round(self.percentile(95), 3),
+            "p99Ms": round(self.percentile(99), 3),
+            "meanMs": round(self.total_ns / count / 1e6, 3) if count else 0.0,
+            "maxMs": round(self.max_ns / 1e6, 3),
+        }
+
+
+class _Span:
+    """Times a `with` block into the owning StageMetrics"""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "StageMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.record(self.name, perf_counter_ns() - self.start)
+
+
+class StageLaps:
+    """
+    Back-to-back stages timed with one clock read each: lap(name) closes the
+    stage that ran since the previous lap (or since laps() was called).
+    Cheaper than a span per stage on the detector's hot path.
+    """
+
+    __slots__ = ("metrics", "histograms", "trace", "last")
+
+    def __init__(self, metrics: "StageMetrics"):
+        self.metrics = metrics
+        self.histograms = metrics.histograms
+        self.trace = _current_trace.get() if metrics.tracing else None
+        self.last = perf_counter_ns()
+
+    def lap(self, name: str) -> None:
+        now = perf_counter_ns()
+        ns = now - self.last
+        self.last = now
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.metrics.histogram(name)
+        histogram.add(ns)
+        if self.trace is not None:
+            self.trace[name] = self.trace.get(name, 0) + ns
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self) -> "_Noop":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def lap(self, name: str) -> None:
+        pass
+
+
+_NOOP = _Noop()
+
+
+class StageMetrics:
+    """
+    Stage latency histograms, keyed by dotted stage name ("detector.rules").
+
+    `with stage_metrics.span("detector.ml"): ...` records one sample, as does
+    each StageLaps.lap(); when disabled both are shared no-ops. Histograms are per process: with
+    DETECTOR_WORKERS > 0, detector-internal stages are timed in the worker
+    processes and only the API-side "api.detect" span is reported here.
+    """
+
+    def __init__(self, enabled: bool = STAGE_METRICS_CONFIG["enabled"]):
+        self.enabled = enabled
+        self.histograms: Dict[str, StageHistogram] = {}
+        self.tracing = False
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Context manager timing one stage"""
+        return _Span(self, name) if self.enabled else _NOOP
+
+    def laps(self):
+        """StageLaps starting now (a no-op when disabled)"""
+        return StageLaps(self) if self.enabled else _NOOP
+
+    def record(self, name: str, ns: int) -> None:
+        """
+        Add one sample (ns) to a stage, and to the current request's trace if any
+        Lock-free: concurrent threads can occasionally drop a count, which is
+        acceptable for latency percentiles and keeps the overhead low.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histogram(name)
+        histogram.add(ns)
+        trace = _current_trace.get() if self.tracing else None
+        if trace is not None:
+            trace[name] = trace.get(name, 0) + ns
+
+    def histogram(self, name: str) -> StageHistogram:
+        """The stage's histogram, created on first use"""
+        with self._lock:
+            return self.histograms.setdefault(name, StageHistogram())
+
+    def start_trace(self) -> Dict[str, int]:
+        """Collect this request's (task's) stage totals into the returned dict"""
+        trace: Dict[str, int] = {}
+        self.tracing = True
+        _current_trace.set(trace)
+        return trace
+
+    @staticmethod
+    def format_trace(trace: Dict[str, int]) -> str:
+        """"stage=1.23ms, ..." in recording order"""
+        return ", ".join(f"{name}={ns / 1e6:.2f}ms" for name, ns in trace.items())
+
+    def get_stats(self) -> Dict:
+        """Percentiles per stage for the metrics endpoint"""
+        stages = {name: h.summary() for name, h in sorted(list(self.histograms.items()))}
+        return {"enabled": self.enabled, "stages": stages}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+
+
+# Global instance
+stage_metrics = StageMetrics()
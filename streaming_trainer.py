@@ -0,0 +1,200 @@
+"""
+Out-of-Core Streaming Trainer
+Reads training CSVs in chunks, hashes features with a stateless HashingVectorizer
+and fits an SGD logistic-regression model with partial_fit, so peak memory is
+bounded by the chunk size rather than by the dataset size.
+
+Usage: python streaming_trainer.py [dataset.csv ...]
+"""
+import hashlib
+import os
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+from config import MODEL_PARAMS, STREAMING_TRAINING_CONFIG, MODEL_PATH, VECTORIZER_PATH
+from logging_config import get_logger
+from model_artifacts import save_artifacts
+
+logger = get_logger("honeypot.streaming_trainer")
+
+TEXT_COLUMNS = ['message_text', 'text', 'content']
+LABEL_COLUMNS = ['label', 'is_scam', 'class']
+
+# additional_data.csv style headerless layout
+HEADERLESS_COLUMNS = ['id', 'text', 'label', 'type', 'channel', 'lang', 'loc', 'keys', 'conf', 'sub', 'link', 'urgency']
+
+
+def _read_options(path: str) -> dict:
+    """pd.read_csv options for a dataset, using the same header sniffing as ScamDetector.train_model"""
+    test_df = pd.read_csv(path, nrows=1)
+    has_headers = not str(test_df.iloc[0, 0]).isdigit()  # Crude check for ID vs Name
+    if not has_headers or "146" in str(test_df.columns[0]):
+        return {"names": HEADERLESS_COLUMNS, "header": None}
+    return {}
+
+
+def _select_columns(chunk: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Reduce a chunk to (message_text, label), mapping known column names or positions"""
+    col_map = {}
+    for c in chunk.columns:
+        if str(c).lower() in TEXT_COLUMNS:
+            col_map[c] = 'message_text'
+        if str(c).lower() in LABEL_COLUMNS:
+            col_map[c] = 'label'
+
+    if 'message_text' in col_map.values() and 'label' in col_map.values():
+        return chunk.rename(columns=col_map)[['message_text', 'label']]
+    # Fallback for datasets where we couldn't find named columns
+    if len(chunk.columns) >= 3:
+        subset = chunk.iloc[:, [1, 2]]
+        subset.columns = ['message_text', 'label']
+        return subset
+    return None
+
+
+def _digest(text: str) -> int:
+    """Stable 64-bit digest of a message (deduplication and train/holdout split)"""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class DigestBloomFilter:
+    """
+    Fixed-size set of 64-bit digests: memory stays bits/8 bytes however many
+    messages go through, at the price of occasionally taking a new message for
+    a duplicate (about 0.4% at 10M distinct messages with the default 2^27 bits)
+    """
+
+    def __init__(self, bits: int = STREAMING_TRAINING_CONFIG["dedupe_bits"], hashes: int = 4):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def add(self, digest: int) -> bool:
+        """Add a digest; True if it was (probably) added before"""
+        # Double hashing: the digest's two 32-bit halves give every probe position
+        low, step = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        seen = True
+        for i in range(self.hashes):
+            bit = (low + i * step) % self.bits
+            mask = 1 << (bit & 7)
+            if not self._array[bit >> 3] & mask:
+                self._array[bit >> 3] |= mask
+                seen = False
+        return seen
+
+
+def iter_labelled_chunks(
+    dataset_paths: List[str],
+    chunk_size: int = STREAMING_TRAINING_CONFIG["chunk_size"],
+    holdout: bool = False,
+    dedupe: bool = STREAMING_TRAINING_CONFIG["dedupe"]
+) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """
+    Yield (texts, labels) chunks from every readable dataset
+    Rows are assigned to the training or holdout split by message digest, so the
+    split is the same on every pass without keeping any rows in memory.
+    """
+    holdout_percent = int(round(MODEL_PARAMS["test_size"] * 100))
+    seen = DigestBloomFilter() if dedupe else None
+    rng = np.random.default_rng(MODEL_PARAMS["random_state"])
+
+    for path in dataset_paths:
+        if not os.path.exists(path):
+            logger.warning(f"Dataset not found: {path}")
+            continue
+        try:
+            reader = pd.read_csv(path, chunksize=chunk_size, **_read_options(path))
+            for chunk in reader:
+                chunk = _select_columns(chunk)
+                if chunk is None:
+                    logger.warning(f"Could not parse columns for {path}")
+                    break
+
+                texts, labels = [], []
+                for text, label in zip(chunk['message_text'].astype(str).fillna(''), chunk['label'].astype(str)):
+                    digest = _digest(text)
+                    if (digest % 100 < holdout_percent) != holdout:
+                        continue
+                    if seen is not None and seen.add(digest):
+                        continue
+                    texts.append(text)
+                    labels.append(1 if label.lower() == 'scam' else 0)
+
+                if texts:
+                    # Files are often grouped by label; shuffle within the chunk for SGD
+                    order = rng.permutation(len(texts))
+                    yield [texts[i] for i in order], np.asarray(labels)[order]
+        except Exception as e:
+            logger.error(f"Error streaming {path}: {e}")
+
+
+def make_vectorizer() -> HashingVectorizer:
+    """Stateless vectorizer; nothing to fit, so it never needs the full vocabulary in memory"""
+    return HashingVectorizer(
+        n_features=STREAMING_TRAINING_CONFIG["n_features"],
+        ngram_range=MODEL_PARAMS["ngram_range"],
+        alternate_sign=False,
+        norm="l2",
+    )
+
+
+def train_streaming(
+    dataset_paths: List[str],
+    chunk_size: int = STREAMING_TRAINING_CONFIG["chunk_size"],
+    epochs: int = STREAMING_TRAINING_CONFIG["epochs"]
+) -> Tuple[Optional[SGDClassifier], HashingVectorizer, Optional[float]]:
+    """
+    Train an SGD logistic-regression scam classifier out of core
+    Returns (model, vectorizer, holdout_accuracy); model is None if no data was read
+    """
+    vectorizer = make_vectorizer()
+    model = SGDClassifier(
+        loss="log_loss",
+        alpha=STREAMING_TRAINING_CONFIG["alpha"],
+        random_state=MODEL_PARAMS["random_state"],
+    )
+
+    trained_rows = 0
+    for epoch in range(epochs):
+        for texts, labels in iter_labelled_chunks(dataset_paths, chunk_size):
+            model.partial_fit(vectorizer.transform(texts), labels, classes=np.array([0, 1]))
+            trained_rows += len(texts) if epoch == 0 else 0
+        logger.info(f"Streaming epoch {epoch + 1}/{epochs} complete ({trained_rows} training samples)")
+
+    if trained_rows == 0:
+        logger.error("No data loaded. Streaming training aborted.")
+        return None, vectorizer, None
+
+    correct = total = 0
+    for texts, labels in iter_labelled_chunks(dataset_paths, chunk_size, holdout=True):
+        correct += int((model.predict(vectorizer.transform(texts)) == labels).sum())
+        total += len(texts)
+    accuracy = correct / total if total else None
+    if accuracy is not None:
+        logger.info(f"Streaming model holdout accuracy: {accuracy:.2%} on {total} samples")
+    return model, vectorizer, accuracy
+
+
+def main():
+    from scam_detector import DEFAULT_TRAINING_DATASETS
+
+    dataset_paths = sys.argv[1:] or DEFAULT_TRAINING_DATASETS
+    start_time = time.time()
+    model, vectorizer, accuracy = train_streaming(dataset_paths)
+    if model is None:
+        sys.exit(1)
+
+    # Through save_artifacts so the manifest matches and the API loads (and hot-swaps) it
+    save_artifacts(model, vectorizer, MODEL_PATH, VECTORIZER_PATH, accuracy=accuracy)
+    accuracy_text = f"{accuracy:.2%}" if accuracy is not None else "n/a"
+    print(f"✅ Streaming model saved to {MODEL_PATH} (accuracy {accuracy_text}, {time.time() - start_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,6 +75,14 @@ class TestHealthEndpoint:
         data = response.json()
         assert "version" in data
 
+    def test_health_check_reports_readiness(self, client):
+        """Test readiness tracks whether an ML model is live"""
+        data = client.get("/api/health").json()
+
+        assert data["readiness"] == ("ready" if data["model_trained"] else "degraded")
+        assert "model_version" in data
+        assert "state" in data["training"]
+
 
 class TestMessageEndpoint:
     """Test main message processing endpoint"""
@@ -279,6 +287,59 @@ class TestStatsEndpoint:
         assert "activeSessions" in data
         assert "modelTrained" in data
         assert "geminiEnabled" in data
+        assert "hits" in data["detectionCache"]
+        assert "misses" in data["detectionCache"]
+        assert "topCampaigns" in data["campaigns"]
+        assert "hitRate" in data["urls"]
+    
+    def test_repeated_message_served_from_cache(self, client, api_key, sample_scam_message):
+        """Test that a repeated campaign message hits the detection cache"""
+        from detection_cache import detection_cache
+        
+        client.post("/api/message", json=sample_scam_message, headers={"X-API-Key": api_key})
+        hits_before = detection_cache.hits
+        
+        repeat = dict(sample_scam_message, sessionId="test-session-cache-repeat")
+        response = client.post("/api/message", json=repeat, headers={"X-API-Key": api_key})
+        
+        assert response.status_code == 200
+        assert response.json()["scamDetected"] == True
+        assert detection_cache.hits == hits_before + 1
+
+    def test_degraded_verdict_not_cached(self, client, api_key, sample_scam_message, monkeypatch):
+        """Test a verdict that ran out of analysis budget is neither cached nor indexed"""
+        from detection_cache import detection_cache
+        from campaign_index import campaign_index
+        from regex_guard import AnalysisBudget
+
+        monkeypatch.setattr("scam_detector.AnalysisBudget", lambda: AnalysisBudget(budget_ms=-1))
+        message = dict(sample_scam_message, sessionId="test-session-degraded")
+        message["message"] = dict(message["message"], text="Sir your KYC lapsed, share the OTP sent to you to keep the account open")
+        size_before = len(detection_cache)
+        indexed_before = campaign_index.get_stats()["size"]
+
+        response = client.post("/api/message", json=message, headers={"X-API-Key": api_key})
+
+        assert response.status_code == 200
+        assert response.json()["scamClassification"]["degraded"] is True
+        assert len(detection_cache) == size_before
+        assert campaign_index.get_stats()["size"] == indexed_before
+
+
+class TestMetricsEndpoint:
+    """Test per-stage latency metrics endpoint"""
+    
+    def test_metrics_report_stage_percentiles(self, client, api_key, sample_scam_message):
+        """Test detection and request stages show up with percentiles"""
+        message = dict(sample_scam_message, sessionId="test-session-metrics")
+        client.post("/api/message", json=message, headers={"X-API-Key": api_key})
+        
+        response = client.get("/api/metrics", headers={"X-API-Key": api_key})
+        
+        assert response.status_code == 200
+        stages = response.json()["stages"]
+        assert stages["api.total"]["count"] >= 1
+        assert {"p50Ms", "p95Ms", "p99Ms"} <= set(stages["api.session_update"])
 
 
 class TestPersonasEndpoint:
@@ -311,6 +372,13 @@ class TestTrainEndpoint:
         response = client.post("/api/train")
         
         assert response.status_code == 422
+    
+    def test_unknown_training_job(self, client, api_key):
+        """Test polling a job id that does not exist"""
+        response = client.get("/api/train/missing", headers={"X-API-Key": api_key})
+        
+        assert response.status_code == 404
+        assert response.json()["error"] == "TRAINING_JOB_NOT_FOUND"
 
 
 class TestOpenAPISchema:
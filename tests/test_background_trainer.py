@@ -0,0 +1,192 @@
+"""
+Unit Tests for Background Training Jobs and Model Hot-Swap
+"""
+import asyncio
+import json
+
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+import scam_detector
+from background_trainer import BackgroundTrainer, TrainingJob, _try_lock
+from model_artifacts import save_artifacts
+from scam_detector import ModelBundle, ScamDetector
+
+
+def write_dataset(path, rows=200):
+    data = []
+    for i in range(rows):
+        if i % 2 == 0:
+            data.append((f"urgent share otp {i} now or account blocked", "scam"))
+        else:
+            data.append((f"see you at lunch tomorrow {i}", "legit"))
+    pd.DataFrame(data, columns=["message_text", "label"]).to_csv(path, index=False)
+
+
+class TestBackgroundTrainer:
+    """Test training in a child process and swapping the result in"""
+
+    def setup_method(self):
+        self.detector = ScamDetector()
+        self.swaps = []
+
+    def patch_paths(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(scam_detector, "MODEL_PATH", str(tmp_path / "model.joblib"))
+        monkeypatch.setattr(scam_detector, "VECTORIZER_PATH", str(tmp_path / "vectorizer.joblib"))
+        monkeypatch.setattr(scam_detector, "COMPILED_MODEL_PATH", str(tmp_path / "trees.joblib"))
+
+    def run(self, trainer, dataset_paths):
+        async def scenario():
+            assert trainer.start(dataset_paths, streaming=True)
+            assert not trainer.start(dataset_paths, streaming=True)
+            await trainer.wait()
+        asyncio.run(scenario())
+        return trainer.current_job
+
+    def test_trains_and_hot_swaps(self, tmp_path, monkeypatch):
+        """Test a rules-only detector goes live with the child's model"""
+        self.patch_paths(tmp_path, monkeypatch)
+        path = str(tmp_path / "data.csv")
+        write_dataset(path)
+        assert not self.detector.is_trained
+
+        # fork so the child sees the patched artifact paths
+        trainer = BackgroundTrainer(self.detector, start_method="fork", poll_interval_seconds=0.05)
+        trainer.add_swap_listener(lambda: self.swaps.append(self.detector.model_version))
+        job = self.run(trainer, [path])
+
+        assert job.state == "succeeded" and job.phase == "swapped"
+        assert trainer.get_job(job.id) is job
+        assert self.detector.is_trained
+        assert self.swaps == [self.detector.model_version] and self.swaps[0]
+        assert job.metrics["modelVersion"] == self.detector.model_version
+        assert job.metrics["modelGeneration"] == 1
+        assert job.metrics["accuracy"] is not None
+        assert 0.0 <= self.detector._ml_scores(["share otp now"], [[]])[0] <= 1.0
+
+    def test_failed_training_keeps_rules_only(self, tmp_path, monkeypatch):
+        """Test a failed run reports the error and installs nothing"""
+        self.patch_paths(tmp_path, monkeypatch)
+        trainer = BackgroundTrainer(self.detector, start_method="fork", poll_interval_seconds=0.05)
+        trainer.add_swap_listener(lambda: self.swaps.append(True))
+        job = self.run(trainer, [str(tmp_path / "missing.csv")])
+
+        assert job.state == "failed" and job.phase == "training"
+        assert "exited with code 1" in trainer.get_status()["error"]
+        assert not self.detector.is_trained
+        assert self.swaps == []
+
+
+class TestSharedTraining:
+    """Test training coordination between API workers sharing a model directory"""
+
+    def setup_method(self):
+        self.detector = ScamDetector()
+
+    def patch_paths(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(scam_detector, "MODEL_PATH", str(tmp_path / "model.joblib"))
+        monkeypatch.setattr(scam_detector, "VECTORIZER_PATH", str(tmp_path / "vectorizer.joblib"))
+        monkeypatch.setattr(scam_detector, "COMPILED_MODEL_PATH", str(tmp_path / "trees.joblib"))
+
+    def test_one_trainer_at_a_time(self, tmp_path, monkeypatch):
+        """Test a worker does not start a job while another holds the training lock"""
+        self.patch_paths(tmp_path, monkeypatch)
+        other_worker = _try_lock(str(tmp_path / "model.training.lock"))
+        (tmp_path / "model.training.json").write_text(json.dumps(TrainingJob(None, None).to_dict()))
+        trainer = BackgroundTrainer(self.detector, start_method="fork")
+
+        async def scenario():
+            return trainer.start([str(tmp_path / "missing.csv")])
+
+        try:
+            assert asyncio.run(scenario()) is None
+            shared_id = json.loads((tmp_path / "model.training.json").read_text())["jobId"]
+            assert trainer.active_job_id() == shared_id
+            assert trainer.get_job(shared_id).to_dict()["state"] == "running"
+        finally:
+            other_worker.close()
+
+    def test_job_status_visible_to_other_workers(self, tmp_path, monkeypatch):
+        """Test a finished job is reported by a worker that did not run it and the lock is released"""
+        self.patch_paths(tmp_path, monkeypatch)
+        trainer = BackgroundTrainer(self.detector, start_method="fork", poll_interval_seconds=0.05)
+
+        async def scenario():
+            job = trainer.start([str(tmp_path / "missing.csv")])
+            await trainer.wait()
+            return job
+
+        job = asyncio.run(scenario())
+        other = BackgroundTrainer(ScamDetector())
+
+        assert other.get_job(job.id).to_dict() == job.to_dict()
+        assert other.active_job_id() is None
+        lock = _try_lock(str(tmp_path / "model.training.lock"))
+        assert lock is not None
+        lock.close()
+
+    def test_reloads_artifact_saved_elsewhere(self, tmp_path, monkeypatch):
+        """Test a worker hot-swaps in a model another process saved, once"""
+        self.patch_paths(tmp_path, monkeypatch)
+        texts = ["share otp now", "account blocked pay fee", "lunch tomorrow", "happy birthday"]
+        vectorizer = TfidfVectorizer().fit(texts)
+        model = LogisticRegression().fit(vectorizer.transform(texts), [1, 1, 0, 0])
+        trainer = BackgroundTrainer(self.detector)
+        swaps = []
+        trainer.add_swap_listener(lambda: swaps.append(self.detector.model_version))
+
+        assert not asyncio.run(trainer.reload_if_changed())
+        manifest = save_artifacts(model, vectorizer, scam_detector.MODEL_PATH, scam_detector.VECTORIZER_PATH)
+
+        assert asyncio.run(trainer.reload_if_changed())
+        assert not asyncio.run(trainer.reload_if_changed())
+        assert swaps == [manifest["version"]]
+
+
+class SwapOnTransform:
+    """Vectorizer wrapper that hot-swaps another model in mid-detection"""
+
+    def __init__(self, vectorizer, detector, bundle):
+        self.vectorizer, self.detector, self.bundle = vectorizer, detector, bundle
+
+    def transform(self, texts):
+        self.detector.install_model(self.bundle)
+        return self.vectorizer.transform(texts)
+
+
+class TestModelBundle:
+    """Test the live (vectorizer, model) pair is replaced as a unit"""
+
+    def setup_method(self):
+        texts = ["share otp now", "account blocked pay fee", "lunch tomorrow", "happy birthday"]
+        self.vectorizer = TfidfVectorizer().fit(texts)
+        X = self.vectorizer.transform(texts)
+        self.scam_model = LogisticRegression().fit(X, [1, 1, 0, 0])
+        self.inverted_model = LogisticRegression().fit(X, [0, 0, 1, 1])
+        self.detector = ScamDetector()
+
+    def test_install_bumps_generation(self):
+        """Test each install is one new bundle with a higher generation"""
+        self.detector.install_model(ModelBundle(self.scam_model, self.vectorizer, manifest={"version": "v1"}))
+        self.detector.install_model(ModelBundle(self.inverted_model, self.vectorizer, manifest={"version": "v2"}))
+
+        assert self.detector.live_model.generation == 2
+        assert self.detector.model is self.inverted_model
+        assert self.detector.model_version == "v2"
+
+    def test_setting_model_drops_compiled_copy(self):
+        """Test a compiled ensemble never outlives the model it was built from"""
+        self.detector.install_model(ModelBundle(self.scam_model, self.vectorizer, compiled=object()))
+        self.detector.model = self.inverted_model
+        assert self.detector.compiled_model is None
+
+    def test_swap_during_scoring_uses_one_pair(self):
+        """Test a detection in flight keeps scoring with the bundle it started with"""
+        self.detector.install_model(ModelBundle(self.scam_model, self.vectorizer))
+        expected = self.detector._ml_scores(["share otp now"], [[]])
+        swapping = SwapOnTransform(self.vectorizer, self.detector, ModelBundle(self.inverted_model, self.vectorizer))
+        self.detector.install_model(ModelBundle(self.scam_model, swapping))
+
+        assert self.detector._ml_scores(["share otp now"], [[]]) == expected
+        assert self.detector.model is self.inverted_model
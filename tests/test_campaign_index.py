@@ -0,0 +1,132 @@
+"""
+Unit Tests for Near-Duplicate Campaign Detection
+"""
+from campaign_index import CampaignIndex, mask_tokens
+from models import ScamClassification, ThreatLevel
+
+TEMPLATE = "Dear {name}, your SBI account will be blocked today. Pay Rs {amount} to {upi} immediately to update KYC"
+
+
+def make_result(is_scam=True, confidence=0.95, scam_type="KYC_Fraud"):
+    """Build a detect()-shaped tuple"""
+    classification = ScamClassification(scamType=scam_type, confidence=confidence)
+    return (is_scam, confidence, scam_type, ["kyc"], classification, ThreatLevel.HIGH)
+
+
+class TestMaskTokens:
+    """Test masking of the parts scammers vary"""
+
+    def test_identifiers_digits_and_urls_masked(self):
+        """Test UPI IDs, amounts, phones and links become placeholders"""
+        tokens = mask_tokens("Pay Rs.500 to fraud@ybl, call 9876543210 or open https://bit.ly/x!")
+        assert tokens == ["pay", "<num>", "to", "<id>", "call", "<num>", "or", "open", "<url>"]
+
+
+class TestCampaignIndex:
+    """Test LSH lookup, verdict reuse and campaign accounting"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.index = CampaignIndex(max_entries=100, ttl_seconds=60, enabled=True)
+
+    def classify(self, text, result, reusable=True):
+        match = self.index.lookup(text)
+        return match, self.index.record(match, result, reusable=reusable)
+
+    def test_template_variant_reuses_verdict(self):
+        """Test a variant with a new name, amount and UPI reuses the confident scam verdict"""
+        _, campaign_id = self.classify(TEMPLATE.format(name="Ramesh", amount=499, upi="a1@ybl"), make_result())
+
+        match = self.index.lookup(TEMPLATE.format(name="Sunita", amount=12000, upi="kyc.help@okaxis"))
+
+        assert match.campaign_id == campaign_id
+        assert match.verdict[2] == "KYC_Fraud"
+        # Only counted once the caller serves it
+        assert self.index.get_stats()["verdictReuses"] == 0
+        self.index.record_reuse()
+        assert self.index.get_stats()["verdictReuses"] == 1
+
+    def test_reused_verdict_not_stored_again(self):
+        """Test a served verdict is not re-indexed for reuse, so reuse cannot chain across edits"""
+        variant = TEMPLATE.format(name="Sunita", amount=12000, upi="kyc.help@okaxis")
+        _, campaign_id = self.classify(variant, make_result(), reusable=False)
+
+        match = self.index.lookup(TEMPLATE.format(name="Priya", amount=75, upi="b2@paytm"))
+
+        assert match.campaign_id == campaign_id
+        assert match.verdict is None
+
+    def test_context_messages_get_no_verdict(self):
+        """Test stored verdicts are not reused for messages with conversation context"""
+        _, campaign_id = self.classify(TEMPLATE.format(name="Ramesh", amount=499, upi="a1@ybl"), make_result())
+
+        match = self.index.lookup(TEMPLATE.format(name="Sunita", amount=12000, upi="kyc.help@okaxis"), ["Hello sir"])
+
+        assert match.campaign_id == campaign_id
+        assert match.verdict is None
+
+    def test_unrelated_message_not_matched(self):
+        """Test a different message starts its own campaign"""
+        self.classify(TEMPLATE.format(name="Ramesh", amount=499, upi="a1@ybl"), make_result())
+
+        match = self.index.lookup("Hi, the team lunch tomorrow has moved to the cafe near the office")
+
+        assert match.campaign_id is None
+        assert match.verdict is None
+
+    def test_low_confidence_verdict_not_reused(self):
+        """Test only confident scam verdicts are kept for reuse, but the campaign is still tracked"""
+        _, campaign_id = self.classify(TEMPLATE.format(name="Ramesh", amount=499, upi="a1@ybl"), make_result(confidence=0.6))
+
+        match = self.index.lookup(TEMPLATE.format(name="Priya", amount=75, upi="b2@paytm"))
+
+        assert match.campaign_id == campaign_id
+        assert match.verdict is None
+
+    def test_short_messages_not_fingerprinted(self):
+        """Test messages under min_tokens are skipped"""
+        match = self.index.lookup("pay now")
+        assert match.signature is None
+        assert self.index.record(match, make_result()) is None
+
+    def test_campaign_stats_and_eviction(self):
+        """Test campaign sizes are reported and evicted entries leave the index"""
+        index = CampaignIndex(max_entries=2, ttl_seconds=60, enabled=True)
+        for amount, upi in ((100, "a@ybl"), (200, "b@ybl"), (300, "c@ybl")):
+            match = index.lookup(TEMPLATE.format(name=f"user {upi}", amount=amount, upi=upi))
+            index.record(match, make_result())
+
+        stats = index.get_stats()
+        assert stats["size"] <= 2
+        assert stats["topCampaigns"][0]["messages"] == 3
+
+    def test_expired_entries_purged(self, monkeypatch):
+        """Test entries past their TTL leave the index and the campaign stats"""
+        clock = [1000.0]
+        monkeypatch.setattr("campaign_index.time.monotonic", lambda: clock[0])
+        index = CampaignIndex(max_entries=100, ttl_seconds=60, enabled=True)
+        for name in ("Ramesh", "Sunita"):
+            match = index.lookup(TEMPLATE.format(name=name, amount=499, upi="a1@ybl"))
+            index.record(match, make_result())
+        clock[0] += 30
+        match = index.lookup("Your electricity connection will be cut tonight, call the officer now to avoid it")
+        index.record(match, make_result(scam_type="Utility_Scam"))
+
+        clock[0] += 31
+        stats = index.get_stats()
+
+        assert stats["size"] == len(index) == 1
+        assert stats["expirations"] == 2
+        assert [c["scamType"] for c in stats["topCampaigns"]] == ["Utility_Scam"]
+        assert len(index._buckets) == index.bands
+        assert index.lookup(TEMPLATE.format(name="Amit", amount=10, upi="z@ibl")).campaign_id is None
+
+    def test_invalidate_keeps_campaigns(self):
+        """Test retraining drops reusable verdicts but keeps campaign membership"""
+        _, campaign_id = self.classify(TEMPLATE.format(name="Ramesh", amount=499, upi="a1@ybl"), make_result())
+        self.index.invalidate_verdicts()
+
+        match = self.index.lookup(TEMPLATE.format(name="Amit", amount=10, upi="z@ibl"))
+
+        assert match.campaign_id == campaign_id
+        assert match.verdict is None
@@ -0,0 +1,83 @@
+"""
+Unit Tests for Detection Result Cache
+"""
+from detection_cache import DetectionCache
+from models import ScamClassification, ThreatLevel
+
+
+def make_result(keywords=None):
+    """Build a detect()-shaped tuple"""
+    classification = ScamClassification(scamType="Phishing", confidence=0.9)
+    return (True, 0.9, "Phishing", keywords or ["urgent"], classification, ThreatLevel.HIGH)
+
+
+class TestDetectionCache:
+    """Test LRU+TTL detection cache behaviour"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.cache = DetectionCache(max_entries=2, ttl_seconds=60, enabled=True)
+    
+    def test_key_normalizes_case_and_whitespace(self):
+        """Test that the key ignores case and surrounding whitespace"""
+        assert self.cache.make_key("  URGENT pay now ") == self.cache.make_key("urgent pay now")
+    
+    def test_key_covers_whole_context(self):
+        """Test that any context message affects the key (context analysis sees all of them)"""
+        key_a = self.cache.make_key("pay now", ["old", "a", "b"])
+        key_b = self.cache.make_key("pay now", ["different", "a", "b"])
+        key_c = self.cache.make_key("pay now", ["OLD ", "a", "b"])
+        
+        assert key_a != key_b
+        assert key_a == key_c
+    
+    def test_hit_and_miss_counters(self):
+        """Test hit/miss accounting"""
+        key = self.cache.make_key("pay now")
+        assert self.cache.get(key) is None
+        
+        self.cache.put(key, make_result())
+        assert self.cache.get(key) is not None
+        
+        assert self.cache.hits == 1
+        assert self.cache.misses == 1
+    
+    def test_returned_values_are_copies(self):
+        """Test that callers cannot mutate the cached verdict"""
+        key = self.cache.make_key("pay now")
+        self.cache.put(key, make_result())
+        
+        first = self.cache.get(key)
+        first[3].append("AI_SEMANTIC_DETECTION")
+        first[4].scamType = "Changed"
+        second = self.cache.get(key)
+        
+        assert second[3] == ["urgent"]
+        assert second[4].scamType == "Phishing"
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted"""
+        self.cache.put("a", make_result())
+        self.cache.put("b", make_result())
+        self.cache.get("a")
+        self.cache.put("c", make_result())
+        
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") is not None
+        assert self.cache.evictions == 1
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are dropped"""
+        cache = DetectionCache(max_entries=10, ttl_seconds=-1, enabled=True)
+        cache.put("a", make_result())
+        
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+    
+    def test_clear_invalidates_everything(self):
+        """Test invalidation after retraining"""
+        self.cache.put("a", make_result())
+        self.cache.clear()
+        
+        assert len(self.cache) == 0
+        assert self.cache.get_stats()["invalidations"] == 1
@@ -3,7 +3,9 @@ Unit Tests for Scam Detector Module
 """
 import pytest
 from scam_detector import ScamDetector, detector
-from models import ThreatLevel
+from models import ThreatLevel, DetectionState
+from keyword_automaton import KeywordAutomaton
+from text_normalizer import normalize
 
 
 class TestScamDetector:
@@ -102,6 +104,37 @@ class TestScamDetector:
         
         assert scam_type == "Loan_Fraud"
     
+    def test_scam_type_ties_keep_declaration_order(self):
+        """Test equal scores resolve to the type scored first, alternatives in order"""
+        text = "Your bank loan on amazon: you won a prize"
+        
+        scam_type, alternatives = self.detector._determine_scam_type(text, [])
+        
+        assert scam_type == "UPI_Banking_Fraud"
+        assert list(alternatives) == ["Prize_Lottery_Scam", "Loan_Fraud", "Subscription_Fraud"]
+    
+    def test_scam_type_overrides_apply_in_order(self):
+        """Test the last matching priority override wins"""
+        text = "We recorded your video"
+        keywords = ["CRITICAL_EXTORTION_COMBO", "CRITICAL_SEXTORTION_COMBO", "CRITICAL_QR_SCAM"]
+        
+        scam_type, alternatives = self.detector._determine_scam_type(text, keywords)
+        
+        assert scam_type == "Marketplace_Fraud"
+        assert alternatives["Sextortion_Blackmail"] == 0.95
+    
+    def test_scam_type_batch_scores(self):
+        """Test the batch matrix scores one row per message"""
+        scores, ranks = self.detector._scam_type_scores(
+            ["your bank account", "hello there"], [["suspicious_link"], []]
+        )
+        types = self.detector.scam_type_matrix["types"]
+        
+        assert scores.shape == ranks.shape == (2, len(types))
+        assert scores[0, types.index("UPI_Banking_Fraud")] == 0.8
+        assert scores[0, types.index("Link_Phishing")] == 0.5
+        assert scores[1].max() == scores[1, types.index("General_Scam")] == 0.1
+    
     def test_threat_level_assessment_high(self):
         """Test high threat level detection"""
         threat = self.detector._assess_threat_level(
@@ -230,6 +263,34 @@ class TestKillSwitch:
         assert is_scam == True
         assert confidence >= 0.70
         assert "suspicious_link" in keywords
+    
+    def test_kill_switch_table_compiled(self):
+        """Test that every declared kill switch compiles to a non-empty bitmask"""
+        from config import KILL_SWITCH_RULES
+        
+        assert len(self.detector.kill_switch_rules) == len(KILL_SWITCH_RULES)
+        assert all(rule[0] for rule in self.detector.kill_switch_rules)
+    
+    def test_kill_switch_exclusion_group(self):
+        """Test that exclusion terms suppress a kill switch"""
+        sextortion = "We recorded your video, pay money or it goes to all your contacts"
+        honeytrap = "We recorded your video call, pay money or it goes to all your contacts"
+        
+        _, _, tags = self.detector._evaluate_kill_switches(sextortion, [], 0.0)
+        assert "CRITICAL_SEXTORTION_COMBO" in tags
+        
+        _, _, tags = self.detector._evaluate_kill_switches(honeytrap, [], 0.0)
+        assert "CRITICAL_SEXTORTION_COMBO" not in tags
+    
+    def test_link_alone_fallback_only_when_untriggered(self):
+        """Test that the link-alone rule does not lower an earlier kill switch"""
+        score, triggered, tags = self.detector._evaluate_kill_switches(
+            "visit now", ["suspicious_link", "now"], 0.0
+        )
+        
+        assert triggered
+        assert score == 1.0
+        assert tags == ["CRITICAL_PHISHING_COMBO"]
 
 
 class TestSafeWordFiltering:
@@ -287,5 +348,260 @@ class TestContextAwareML:
         # Should detect multi-stage pattern or at least high confidence
 
 
+class TestDetectionState:
+    """Test incremental context analysis against the full-rescan path"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.detector = ScamDetector()
+    
+    def assert_equivalent(self, messages, state=None):
+        """Feed messages turn by turn, comparing stateful and stateless analysis"""
+        state = state or DetectionState()
+        for i, message in enumerate(messages):
+            context = messages[:i]
+            incremental = self.detector._analyze_context(message, context, state)
+            full = self.detector._analyze_context(message, context)
+            assert incremental == full, f"Turn {i}: {incremental} != {full}"
+        return state
+    
+    def test_digital_arrest_marathon(self):
+        """Test a long multi-stage conversation"""
+        messages = [
+            "Hello sir, this is CBI Mumbai",
+            "An illegal parcel with drugs was found in your name",
+            "You are under digital arrest, stay on skype video call",
+            "Don't disconnect and don't tell your family",
+            "Transfer for clearance to this safe account immediately",
+        ] * 8
+        state = self.assert_equivalent(messages)
+        
+        assert state.messages_seen == len(messages)
+    
+    def test_stage_match_across_message_boundary(self):
+        """Test that a stage split across two messages is still matched"""
+        messages = ["hi", "there is a problem with your account", "blocked today, within 2 hours", "share otp"]
+        self.assert_equivalent(messages)
+        
+        _, patterns = self.detector._analyze_context(messages[-1], messages[:-1], DetectionState())
+        assert "multi_stage_classic_banking" in patterns
+    
+    def test_long_runs_fall_back_to_rescan(self):
+        """Test conversations with whitespace runs longer than the carry-over window"""
+        messages = ["hello from sbi bank", "your account" + " " * 300, "blocked", "within 2 hours", "share otp"]
+        state = self.assert_equivalent(messages)
+        
+        assert state.long_runs
+    
+    def test_stale_state_is_rebuilt(self):
+        """Test that a state out of sync with the context is rebuilt"""
+        stale = DetectionState(messages_seen=7, last_message="something else")
+        self.assert_equivalent(["hello dear customer", "kyc expired", "verify details today"], stale)
+
+
+class TestDetectBatch:
+    """Test batched detection against the single-message path"""
+    
+    def setup_method(self):
+        """Setup test fixtures with a small trained model"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.ensemble import GradientBoostingClassifier
+        
+        train_texts = [
+            "your account is blocked share otp now",
+            "you won a lottery prize pay processing fee",
+            "urgent kyc update click link",
+            "digital arrest cbi officer transfer money",
+            "see you at lunch tomorrow",
+            "happy birthday have a great day",
+            "meeting moved to 3pm",
+            "thanks for the photos from the trip",
+        ]
+        self.detector = ScamDetector()
+        self.detector.vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+        self.detector.model = GradientBoostingClassifier(n_estimators=10, random_state=42)
+        self.detector.model.fit(self.detector.vectorizer.fit_transform(train_texts), [1, 1, 1, 1, 0, 0, 0, 0])
+        self.detector.is_trained = True
+        
+        self.texts = [
+            "Share your OTP now or account will be blocked",
+            "Hi, are we still on for lunch?",
+            "Congratulations! You won a prize, pay the fee",
+            "Please visit http://bit.ly/secure123 for verification",
+        ]
+        self.contexts = [["Hello from SBI bank", "KYC issue"], [], None, ["hi"]]
+    
+    def test_batch_matches_single_detect(self):
+        """Test that detect_batch returns the same tuples as detect"""
+        batch = self.detector.detect_batch(self.texts, self.contexts)
+        
+        for result, text, context in zip(batch, self.texts, self.contexts):
+            single = self.detector.detect(text, context)
+            assert result[:3] == single[:3]
+            assert sorted(result[3]) == sorted(single[3])
+            assert result[4] == single[4]
+            assert result[5] == single[5]
+    
+    def test_batch_uses_single_predict_call(self):
+        """Test that the ML stage scores every undecided message at once"""
+        calls = []
+        predict_proba = self.detector.model.predict_proba
+        self.detector.model.predict_proba = lambda X: calls.append(X.shape[0]) or predict_proba(X)
+        
+        self.detector.detect_batch(self.texts, self.contexts)
+        
+        assert calls == [self.detector.get_cascade_stats()["ml"]]
+    
+    def test_cascade_skips_ml_only_for_decided_scams(self):
+        """Test that kill switches exit before the ML stage and chit-chat still gets its ML score"""
+        calls = []
+        predict_proba = self.detector.model.predict_proba
+        self.detector.model.predict_proba = lambda X: calls.append(X.shape[0]) or predict_proba(X)
+        
+        scam = self.detector.detect("Digital arrest: CBI officer says transfer money now or jail")
+        text = "Happy birthday! See you at dinner"
+        chat = self.detector.detect(text)
+        
+        assert scam[0] and not chat[0]
+        assert calls == [1]
+        assert self.detector.get_cascade_stats() == {"kill_switch": 1, "ml": 1}
+        signals = self.detector._scan_signals(normalize(text), [], None)
+        assert chat[1] == self.detector._combined_score(signals, self.detector._ml_scores([text], [[]])[0])
+    
+    def test_rules_scam_exit_needs_a_fixed_threat_level(self, monkeypatch):
+        """Test that a rules-decided scam still runs ML when its score could change the threat level"""
+        text = "Your SBI account is blocked, share OTP and pay the KYC fee now"
+        signals = self.detector._scan_signals(normalize(text), [], None)
+        signals.update(kill_switch_triggered=False, threshold=0.0)
+        lower, upper = self.detector._combined_score(signals, 0.0), self.detector._combined_score(signals, 1.0)
+        
+        assert self.detector._threat_level(signals, lower) != self.detector._threat_level(signals, upper)
+        assert self.detector._cascade_exit(signals) is None
+        
+        monkeypatch.setattr(self.detector, "_threat_level", lambda signals, score: ThreatLevel.MEDIUM)
+        assert self.detector._cascade_exit(signals) == "rules_scam"
+    
+    def test_cascade_keeps_verdicts(self, monkeypatch):
+        """Test that early exits change neither the verdict, scam type nor threat level, only lower the confidence"""
+        from config import DETECTION_CASCADE_CONFIG
+        
+        cascaded = self.detector.detect_batch(self.texts, self.contexts)
+        monkeypatch.setitem(DETECTION_CASCADE_CONFIG, "enabled", False)
+        full = self.detector.detect_batch(self.texts, self.contexts)
+        
+        for a, b in zip(cascaded, full):
+            assert a[0] == b[0]
+            assert a[2] == b[2]
+            assert a[5] == b[5]
+            assert a[1] <= b[1]
+    
+    def test_batch_length_mismatch(self):
+        """Test that mismatched texts/contexts are rejected"""
+        with pytest.raises(ValueError):
+            self.detector.detect_batch(self.texts, [[]])
+    
+    def test_session_state_reuses_cached_term_counts(self):
+        """Test that incremental TF-IDF matches transform() on the joined context"""
+        import numpy as np
+        
+        state = DetectionState()
+        conversation = [
+            "Hello from SBI bank",
+            "Your KYC is pending and account blocked",
+            "Share OTP now",
+            "Pay the processing fee today",
+        ]
+        for i, text in enumerate(conversation):
+            context = conversation[:i]
+            incremental = self.detector._incremental_tfidf(text, context, state)
+            expected = self.detector.vectorizer.transform([self.detector._ml_input_text(text, context)])
+            
+            assert np.array_equal(incremental.toarray(), expected.toarray())
+            assert set(state.ml_features) == set((context[-1:] + [text]))
+
+    def test_model_swap_drops_cached_term_counts(self):
+        """Test that counts cached against one vocabulary are not reused with another"""
+        def worker(vectorizer_sha):
+            # A freshly started worker: its first install_model() is generation 1
+            manifest = {"version": vectorizer_sha, "files": {"vectorizer": {"sha256": vectorizer_sha}}}
+            worker_detector = ScamDetector()
+            worker_detector.install_model(self.detector.live_model._replace(manifest=manifest))
+            return worker_detector
+        
+        old_worker, new_worker, same_worker = worker("old"), worker("new"), worker("old")
+        assert old_worker.live_model.generation == new_worker.live_model.generation
+        
+        state = DetectionState()
+        old_worker._incremental_tfidf("Share OTP now", ["Hello from SBI bank"], state)
+        poisoned = {m: features.model_copy(update={"counts": {0: 99}}) for m, features in state.ml_features.items()}
+        
+        state.ml_features = dict(poisoned)
+        same_worker._incremental_tfidf("Share OTP now", ["Hello from SBI bank"], state)
+        assert state.ml_features == poisoned
+        
+        incremental = new_worker._incremental_tfidf("Share OTP now", ["Hello from SBI bank"], state)
+        expected = self.detector.vectorizer.transform(["Hello from SBI bank Share OTP now"])
+        assert (incremental != expected).nnz == 0
+        assert state.ml_vocabulary == "new"
+    
+    def test_detect_with_state_matches_stateless(self):
+        """Test that a session-backed detect() gives the same verdicts"""
+        state = DetectionState()
+        for i, text in enumerate(self.texts):
+            context = self.texts[:i]
+            stateful = self.detector.detect(text, context, state)
+            stateless = self.detector.detect(text, context)
+            
+            assert stateful[:3] == stateless[:3]
+            assert sorted(stateful[3]) == sorted(stateless[3])
+
+
+class TestKeywordAutomaton:
+    """Test the multi-pattern keyword matcher behind rule-based scoring"""
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.detector = ScamDetector()
+    
+    def test_overlapping_and_nested_matches(self):
+        """Test that overlapping and nested keywords are all reported"""
+        automaton = KeywordAutomaton([("he", 0), ("she", 1), ("his", 2), ("hers", 3)])
+        
+        assert automaton.matched_ids("ushers") == {0, 1, 3}
+        assert automaton.matched_ids("nothing here") == {0}
+    
+    def test_duplicate_patterns_keep_separate_entries(self):
+        """Test that a keyword shared by two families is reported for both"""
+        automaton = KeywordAutomaton([("block", "urgency"), ("block", "threat")])
+        
+        assert automaton.hits("will block you") == [("block", "urgency"), ("block", "threat")]
+    
+    def test_matches_legacy_substring_scoring(self):
+        """Test that the automaton reproduces per-keyword substring scoring exactly"""
+        samples = [
+            "URGENT: Your account will be blocked in 24 hours. Act now!",
+            "Digital arrest by CBI officer, transfer money via UPI scammer@okaxis",
+            "Hi mom, my phone broke, send money to this new number urgently",
+            "तुरंत अपना खाता सत्यापित करें, वरना ब्लॉक हो जाएगा",
+            "FASTag KYC expired, update now or pay penalty at toll",
+            "Hello, how are you doing today?",
+        ]
+        
+        for text in samples:
+            text_lower = text.lower()
+            expected_score = 0.0
+            expected_keywords = []
+            for keywords, weight, prefix in self.detector._keyword_families():
+                for keyword in keywords:
+                    if keyword.lower() in text_lower:
+                        expected_score += weight
+                        expected_keywords.append(f"{prefix}{keyword}")
+            
+            hits = self.detector.keyword_automaton.hits(text_lower)
+            
+            assert [tag for _, (_, tag) in hits] == expected_keywords
+            assert sum(weight for _, (weight, _) in hits) == expected_score
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,103 @@
+"""
+Unit Tests for the Detector Execution Service
+"""
+import asyncio
+from concurrent.futures import Future
+
+from detector_service import DetectorService
+from models import DetectionState
+from scam_detector import detector
+
+
+SCAM_TEXT = "URGENT: Your SBI account will be blocked. Share OTP now"
+CHAT_TEXT = "Hi, are we still on for lunch tomorrow?"
+
+
+class TestDetectorServiceInProcess:
+    """Test the in-process path (workers=0)"""
+
+    def test_matches_detector(self):
+        """Test results equal a direct detect() call"""
+        service = DetectorService(workers=0)
+        result = asyncio.run(service.detect(SCAM_TEXT, ["Hello from SBI"]))
+        expected = detector.detect(SCAM_TEXT, ["Hello from SBI"])
+
+        assert result[:4] == expected[:4]
+        assert service.get_stats()["inlineCalls"] == 1
+        assert not service.running
+
+    def test_saturated_pool_scores_short_messages_inline(self):
+        """Test short messages skip the queue when every worker is busy"""
+        service = DetectorService(workers=1)
+        service._pool = object()  # Never used: the saturation check runs first
+        service._in_flight = 1
+
+        result = asyncio.run(service.detect(CHAT_TEXT))
+
+        assert result[:3] == detector.detect(CHAT_TEXT)[:3]
+        assert service.saturated_fallbacks == 1
+
+    def test_cancelled_pool_batch_falls_back(self):
+        """Test a batch cancelled in the executor queue is still answered in-process"""
+        class CancellingPool:
+            def submit(self, fn, *args):
+                future = Future()
+                future.cancel()
+                return future
+
+        service = DetectorService(workers=1, batch_wait_ms=1)
+        service._pool = CancellingPool()
+
+        result = asyncio.run(asyncio.wait_for(service.detect(SCAM_TEXT), timeout=5))
+
+        assert result[:3] == detector.detect(SCAM_TEXT)[:3]
+        assert service.pool_errors == 1
+
+
+class TestDetectorServicePool:
+    """Test micro-batched detection in worker processes"""
+
+    def setup_method(self):
+        """Start a single-worker pool"""
+        self.service = DetectorService(workers=1, max_batch_size=8, batch_wait_ms=20)
+        self.service.start()
+
+    def teardown_method(self):
+        self.service.shutdown()
+
+    def test_batch_matches_detector_and_syncs_state(self):
+        """Test pooled results match in-process detection and session state is updated"""
+        async def run():
+            state = DetectionState()
+            results = await asyncio.gather(
+                self.service.detect(SCAM_TEXT, ["Hello from SBI"], state),
+                self.service.detect(CHAT_TEXT),
+            )
+            return state, results
+
+        state, results = asyncio.run(run())
+        expected_state = DetectionState()
+        expected = [
+            detector.detect(SCAM_TEXT, ["Hello from SBI"], expected_state),
+            detector.detect(CHAT_TEXT),
+        ]
+
+        for result, single in zip(results, expected):
+            assert result[:3] == single[:3]
+        assert state.messages_seen == expected_state.messages_seen
+        assert state.matched_stages == expected_state.matched_stages
+        assert self.service.pool_batches == 1
+        assert self.service.pool_messages == 2
+
+    def test_falls_back_when_pool_stops(self):
+        """Test queued messages are scored in-process if the pool goes away"""
+        async def run():
+            pending = asyncio.ensure_future(self.service.detect(SCAM_TEXT))
+            await asyncio.sleep(0)
+            self.service.shutdown()
+            return await pending
+
+        result = asyncio.run(run())
+
+        assert result[:3] == detector.detect(SCAM_TEXT)[:3]
+        assert self.service.pool_errors == 1
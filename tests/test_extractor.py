@@ -1,9 +1,13 @@
 """
 Unit Tests for Intelligence Extractor Module
 """
+import random
+import re
+
 import pytest
-from intelligence_extractor import IntelligenceExtractor, extractor
-from models import Message
+from intelligence_extractor import DIGIT_CUE, IntelligenceExtractor, extractor
+from text_normalizer import normalize
+from models import INTELLIGENCE_FIELDS, ExtractedIntelligence, IntelligenceState, Message, SessionState
 
 
 class TestIntelligenceExtractor:
@@ -187,6 +191,208 @@ class TestIntelligenceExtractor:
         assert len(keywords) >= 1
 
 
+# Message texts used by the tests above
+FIXTURE_TEXTS = [
+    "Call me at 9876543210 or +91 8765432109",
+    "My number is 9876543210. Please call me.",
+    "Send payment to myupi@paytm or payment@oksbi",
+    "Click here: http://verify-your-bank.xyz/login or bit.ly/secure123",
+    "Visit https://www.google.com for help",
+    "A/C No: 123456789012 IFSC: SBIN0001234",
+    "Contact support@fraudbank.com for assistance",
+    "I am Mr. Rahul Sharma from State Bank customer care",
+    "This is from State Bank customer service department",
+    "Pay using Paytm or PhonePe to this number",
+    "I am calling from Mumbai office, area code 022",
+    "Your case reference number is REF123456789",
+    "URGENT: Verify your OTP immediately or account will be blocked",
+    "Hello, I am Rahul from SBI",
+    "Your account 12345678901 is blocked. Call 9876543210",
+    "My mobile number is 9876543210",
+    "तुरंत verify करें, आपका खाता ब्लॉक हो जाएगा",
+]
+
+ENTITIES = [
+    "+91 9876543210", "(212) 555-1234", "A/C No: 123456789012", "SBIN0001234", "fraud@paytm",
+    "abc@okhdfcbank", "https://secure-login.in/x", "www.google.com", "rb.gy/abc", "me@mail.com",
+    "@scam_handle", "instagram.com/foo.bar", "t.me/xyz", "Ticket #XY12345678",
+    "1BoatSLRHtKNngkdXEeobR76b53LETtpyT", "TR7NHqjeKQxGTCi8q8ZY4pL8otSzgjLj6t", "0x" + "ab" * 20,
+    "Beneficiary: Asha Rao", "this is Suresh Patel", "Smt. Devi", "executive Gupta",
+    "from Apex Finance ltd", "customer support of Paytm", "Punjab National", "MH12AB1234",
+    "Badge ID: EMP12345", "whatsapp me at", "my upi id is", "transfer to account", "Kolkata", "033",
+    # Characters IGNORECASE treats specially, and Devanagari keywords
+    "ſend to", "İD: AB123456", "Officer Rakeſh", "ſtate Bank", "\u212aYC", "खाता ब्लॉक",
+]
+
+
+class TestSinglePassScanner:
+    """Golden test: the cue scan must not change any extraction"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.extractor = IntelligenceExtractor()
+        self.reference = IntelligenceExtractor(cue_scan=False)
+
+    def generated_corpus(self, count=1500):
+        rng = random.Random(21)
+        filler = "hello sir please your the we kindly urgent now ji at of".split()
+        for _ in range(count):
+            words = rng.choices(filler, k=rng.randint(0, 8))
+            for entity in rng.sample(ENTITIES, rng.randint(1, 5)):
+                words.insert(rng.randint(0, len(words)), entity)
+            yield " ".join(words)
+
+    def test_fixtures_and_generated_corpus_unchanged(self):
+        """Test extraction equals running every pattern, on the fixtures and a generated corpus"""
+        for text in FIXTURE_TEXTS + list(self.generated_corpus()):
+            assert self.extractor.extract_from_text(text) == self.reference.extract_from_text(text), text
+
+    def test_cues_occur_in_their_patterns(self):
+        """Test every literal cue is spelled out in the pattern it gates (catches typos)"""
+        families = {
+            **self.extractor.patterns,
+            **self.extractor.context_indicators,
+            'social_handles_cs': self.extractor.patterns['social_handles'],
+            'person_name': self.extractor.name_patterns,
+            'organization': self.extractor.org_patterns,
+        }
+        for family, cue_lists in self.extractor.pattern_cues.items():
+            assert len(cue_lists) == len(families[family]), family
+            for pattern, cues in zip(families[family], cue_lists):
+                source = pattern.lower().replace("\\", "")
+                for cue in cues or ():
+                    if cue == DIGIT_CUE:
+                        assert "d" in source or any(c.isdigit() for c in source), pattern
+                    else:
+                        # Alternations split cues like "instagram.com/", so check each word of the cue
+                        assert all(word in source for word in re.findall(r"[a-z]+", cue)), (cue, pattern)
+
+    def test_absent_cues_skip_patterns(self):
+        """Test a message without digits or '@' does not run those patterns"""
+        cues = self.extractor._scan_cues(normalize("Hello, officer here. Your KYC is pending"))
+
+        assert ('bank_accounts', 0) not in cues
+        assert ('upi_ids', 0) not in cues
+        assert ('person_names', 0) in cues
+
+
+class TestDigitSpans:
+    """Test the single phone/account decision per digit span"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.extractor = IntelligenceExtractor()
+
+    def test_spans_fold_country_code_and_groups(self):
+        """Test '+CC' prefixes and grouped numbers become one span each"""
+        spans = self.extractor._digit_spans("Call +91 98765-43210 or (555) 123-4567, pay Rs 500")
+
+        assert [(span.digits, span.country_code, span.grouped) for span in spans] == [
+            ("919876543210", "91", True),
+            ("5551234567", "", True),
+            ("500", "", False),
+        ]
+
+    def test_country_code_not_double_counted(self):
+        """Test '+91 9876543210' is one phone with one confidence"""
+        extracted = self.extractor.extract_from_text("Call +91 9876543210 now")
+
+        assert extracted['phone_numbers'] == {"9876543210"}
+        assert [k for k in extracted['confidence_scores'] if k.startswith('phone:')] == ["phone:9876543210"]
+
+    def test_labelled_account_counted_once(self):
+        """Test an A/C-labelled run is one account, with no phone read out of it"""
+        extracted = self.extractor.extract_from_text("A/C No: 9876543210 IFSC: sbin0001234")
+
+        assert extracted['bank_accounts'] == {"9876543210", "SBIN0001234"}
+        assert extracted['phone_numbers'] == set()
+        assert not any(k.startswith('phone:') for k in extracted['confidence_scores'])
+
+    def test_mobile_containing_91(self):
+        """Test a mobile number with '91' inside it is still a phone"""
+        extracted = self.extractor.extract_from_text("whatsapp 9123456789 urgent")
+
+        assert extracted['phone_numbers'] == {"9123456789"}
+
+    def test_runs_inside_codes_ignored(self):
+        """Test digits glued to letters (references, IFSC) are not phones or accounts"""
+        extracted = self.extractor.extract_from_text("Ref TXN9876543210 and code AB123456789012")
+
+        assert extracted['phone_numbers'] == set()
+        assert extracted['bank_accounts'] == set()
+
+    def test_international_number_kept_as_written(self):
+        """Test non-Indian numbers need a '+' and keep their formatting"""
+        extracted = self.extractor.extract_from_text("call +1 (555) 123-4567 or (555) 123-4567")
+
+        assert extracted['phone_numbers'] == {"+1 (555) 123-4567"}
+
+
+class TestIntelligenceState:
+    """Test the per-session in-place intelligence accumulator"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.extractor = IntelligenceExtractor()
+
+    def test_add_returns_only_new_items_in_order(self):
+        """Test items keep first-seen order and repeats add nothing"""
+        state = IntelligenceState()
+
+        first = state.add(self.extractor.extract_from_text("Call 9876543210 and pay to fraud@paytm"))
+        second = state.add(self.extractor.extract_from_text("Pay fraud@paytm now or call 8765432109"))
+
+        assert first["upiIds"] == ["fraud@paytm"]
+        assert second["phoneNumbers"] == ["8765432109"]
+        assert "upiIds" not in second
+        assert state.materialize().phoneNumbers == ["9876543210", "8765432109"]
+
+    def test_materialize_cached_until_change(self):
+        """Test the model is rebuilt only after new items or higher confidences arrive"""
+        state = IntelligenceState()
+        state.add(self.extractor.extract_from_text("Pay to fraud@paytm"))
+        intel = state.materialize()
+
+        state.add({"upi_ids": {"fraud@paytm"}, "confidence_scores": {"upi:fraud@paytm": 0.0}})
+        assert state.materialize() is intel
+
+        state.add({"upi_ids": {"fraud@paytm"}, "confidence_scores": {"upi:fraud@paytm": 1.0}})
+        assert state.materialize() is not intel
+        assert state.materialize().confidenceScores.upiIds["fraud@paytm"] == 1.0
+
+    def test_confidence_keys_keep_full_links(self):
+        """Test link confidences are keyed by the whole URL"""
+        state = IntelligenceState()
+        state.add({"phishing_links": {"https://sbi-kyc.xyz/verify"}, "confidence_scores": {"link:https://sbi-kyc.xyz/verify": 0.8}})
+
+        assert state.materialize().confidenceScores.phishingLinks == {"https://sbi-kyc.xyz/verify": 0.8}
+
+    def test_matches_merge_intelligence(self):
+        """Test accumulating the fixture conversation gives the same items as repeated merges"""
+        state = IntelligenceState()
+        merged = ExtractedIntelligence()
+        for text in FIXTURE_TEXTS:
+            extracted = self.extractor.extract_from_text(text)
+            state.add(extracted)
+            merged = self.extractor.merge_intelligence(merged, ExtractedIntelligence(
+                **{field: list(extracted.get(key, ())) for key, field in INTELLIGENCE_FIELDS.items()}
+            ))
+
+        intel = state.materialize()
+        for field in INTELLIGENCE_FIELDS.values():
+            assert sorted(getattr(intel, field)) == sorted(getattr(merged, field)), field
+
+    def test_session_view(self):
+        """Test SessionState.extracted_intelligence reflects the accumulator"""
+        session = SessionState(session_id="s1")
+        assert session.extracted_intelligence.upiIds == []
+
+        session.intelligence.add(self.extractor.extract_from_text("Send money to fraud@paytm"))
+
+        assert session.extracted_intelligence.upiIds == ["fraud@paytm"]
+        assert session.intelligence.count("upiIds") == 1
+
+
 class TestGlobalExtractor:
     """Test global extractor instance"""
     
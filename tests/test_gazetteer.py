@@ -0,0 +1,89 @@
+"""
+Unit Tests for the Gazetteer
+"""
+from gazetteer import (
+    AREA_CODE, CITY, PAYMENT_PLATFORM, SUSPICIOUS_KEYWORD, Gazetteer, build_gazetteer
+)
+
+
+class TestGazetteerMatching:
+    """Test token-boundary matching of the built-in dictionaries"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.gazetteer = build_gazetteer({SUSPICIOUS_KEYWORD: ["block", "urgent", "pay", "बंद"]}, data_dir="")
+
+    def test_whole_tokens_only(self):
+        """Test entries inside longer words are not matched"""
+        found = self.gazetteer.find("follow us on instagram, pay with kotak or paytm")
+
+        assert "Agra" not in found.get(CITY, set())
+        assert "Kota" not in found.get(CITY, set())
+        assert found[PAYMENT_PLATFORM] >= {"paytm"}
+        assert found[SUSPICIOUS_KEYWORD] == {"pay"}
+
+    def test_keyword_inflections(self):
+        """Test keywords match their English inflections but not other words"""
+        found = self.gazetteer.find("your account is blocked, act urgently")
+        assert found[SUSPICIOUS_KEYWORD] == {"block", "urgent"}
+
+        assert SUSPICIOUS_KEYWORD not in self.gazetteer.find("the blockchain is unblockable")
+
+    def test_multi_word_phrase(self):
+        """Test phrases spanning tokens are matched alongside their parts"""
+        found = self.gazetteer.find("send it on google pay now")
+        assert "google pay" in found[PAYMENT_PLATFORM]
+
+    def test_area_code_prefix(self):
+        """Test STD codes match at the start of a number but not inside one"""
+        assert self.gazetteer.find("call 022-2345678")[AREA_CODE] == {"Mumbai (022)"}
+        assert AREA_CODE not in self.gazetteer.find("call 9876502212")
+
+    def test_devanagari_keyword(self):
+        """Test combining marks count as word characters"""
+        assert self.gazetteer.find("आपका खाता बंद होगा")[SUSPICIOUS_KEYWORD] == {"बंद"}
+        assert SUSPICIOUS_KEYWORD not in self.gazetteer.find("बंदी")
+
+    def test_match_positions(self):
+        """Test matches report spans in text order"""
+        text = "pay in delhi"
+        spans = [(text[start:end], category) for start, end, category, _ in self.gazetteer.matches(text)]
+        assert spans == [("pay", SUSPICIOUS_KEYWORD), ("delhi", CITY)]
+
+
+class TestGazetteerLoading:
+    """Test data files and dictionary growth"""
+
+    def test_load_dir(self, tmp_path):
+        """Test each file adds a category named after it, with values and comments"""
+        (tmp_path / "bank.txt").write_text(
+            "# Issuing banks\nstate bank of india|SBI\nhdfc bank  # private\n\n", encoding="utf-8"
+        )
+        (tmp_path / "notes.md").write_text("ignored\n", encoding="utf-8")
+
+        gazetteer = Gazetteer()
+        assert gazetteer.load_dir(str(tmp_path)) == 2
+
+        found = gazetteer.find("transfer from state bank of india to hdfc bank")
+        assert found == {"bank": {"SBI", "hdfc bank"}}
+
+    def test_missing_dir_ignored(self, tmp_path):
+        """Test a missing data directory adds nothing"""
+        assert Gazetteer().load_dir(str(tmp_path / "missing")) == 0
+
+    def test_add_after_build(self):
+        """Test entries added after a lookup are picked up by the next one"""
+        gazetteer = Gazetteer()
+        assert gazetteer.find("visit nagpur") == {}
+
+        gazetteer.add(CITY, "Nagpur", "Nagpur")
+        assert gazetteer.find("visit nagpur") == {CITY: {"Nagpur"}}
+
+    def test_large_dictionary(self):
+        """Test a large dictionary still finds only whole-token entries"""
+        gazetteer = Gazetteer()
+        gazetteer.add_all("district", (f"district{i}" for i in range(20000)))
+        gazetteer.build()
+
+        assert len(gazetteer) == 20000
+        assert gazetteer.find("from district123 and district19999x") == {"district": {"district123"}}
@@ -0,0 +1,76 @@
+"""
+Import-Time Budget Tests for the API Process
+"""
+import os
+import subprocess
+import sys
+
+from config import IMPORT_TIME_BUDGET_SECONDS, IMPORT_TIME_FORBIDDEN_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ATTEMPTS = 3
+
+
+def run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=120
+    )
+
+
+def import_main_seconds() -> float:
+    """Cumulative import time of main from -X importtime"""
+    result = run_python("-X", "importtime", "-c", "import main")
+    assert result.returncode == 0, result.stderr[-2000:]
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[2].strip() == "main":
+            return int(fields[1]) / 1e6
+    raise AssertionError("main not found in -X importtime output")
+
+
+class TestImportTime:
+    """Test `import main` stays on the serving path"""
+
+    def test_import_main_within_budget(self):
+        """Test the best of a few runs is within IMPORT_TIME_BUDGET_SECONDS"""
+        timings = []
+        for _ in range(ATTEMPTS):
+            timings.append(import_main_seconds())
+            if timings[-1] <= IMPORT_TIME_BUDGET_SECONDS:
+                break
+        assert min(timings) <= IMPORT_TIME_BUDGET_SECONDS, f"import main took {min(timings):.2f}s"
+
+    def test_training_dependencies_and_singletons_are_lazy(self):
+        """Test import main loads no training libraries and builds no singletons"""
+        script = (
+            "import sys, main, scam_detector, session_manager;"
+            f"print([m for m in {IMPORT_TIME_FORBIDDEN_MODULES!r} if m in sys.modules]);"
+            "print(scam_detector.detector._built, session_manager.session_manager._built)"
+        )
+        result = run_python("-c", script)
+        assert result.returncode == 0, result.stderr[-2000:]
+        loaded, built = result.stdout.strip().splitlines()[-2:]
+        assert loaded == "[]"
+        assert built == "False False"
+
+
+class TestGunicornPreload:
+    """Test the preloaded gunicorn master builds the model before forking workers"""
+
+    def test_when_ready_builds_detector_before_fork(self):
+        """Test the when_ready hook leaves the detector built for pre_fork"""
+        script = (
+            "import os, runpy, logging;"
+            "os.environ['GUNICORN_PRELOAD'] = 'true';"
+            "hooks = runpy.run_path('gunicorn.conf.py');"
+            "import main, scam_detector;"
+            "print(scam_detector.detector._built);"
+            "server = type('Server', (), {'log': logging.getLogger('gunicorn.test')})();"
+            "hooks['when_ready'](server); hooks['pre_fork'](server, None); hooks['post_fork'](server, None);"
+            "print(scam_detector.detector._built)"
+        )
+        result = run_python("-c", script)
+        assert result.returncode == 0, result.stderr[-2000:]
+        # Logging shares stdout; keep only the two flags
+        flags = [line for line in result.stdout.splitlines() if line in ("True", "False")]
+        assert flags == ["False", "True"]
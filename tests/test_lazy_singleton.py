@@ -0,0 +1,59 @@
+"""
+Unit Tests for Lazy Module Singletons
+"""
+import threading
+
+from lazy_singleton import LazySingleton, unwrap
+
+
+class Counter:
+    builds = 0
+
+    def __init__(self):
+        Counter.builds += 1
+        self.value = 0
+        self._lock = "counter lock"
+
+    def increment(self):
+        self.value += 1
+        return self.value
+
+
+class TestLazySingleton:
+    """Test deferred construction and attribute forwarding"""
+
+    def setup_method(self):
+        Counter.builds = 0
+        self.proxy = LazySingleton(Counter)
+
+    def test_built_on_first_use(self):
+        """Test nothing is built until an attribute is used"""
+        assert not self.proxy._built
+        assert Counter.builds == 0
+        assert self.proxy.increment() == 1
+        assert self.proxy._built and Counter.builds == 1
+
+    def test_forwards_reads_and_writes(self):
+        """Test attributes, including ones named like the proxy's own, go to the instance"""
+        self.proxy.value = 41
+        assert self.proxy.increment() == 42
+        assert self.proxy._lock == "counter lock"
+        assert unwrap(self.proxy).value == 42
+        assert isinstance(unwrap(self.proxy), Counter)
+
+    def test_built_once_across_threads(self):
+        """Test concurrent first use builds a single instance"""
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(unwrap(self.proxy))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert Counter.builds == 1
+        assert all(instance is seen[0] for instance in seen)
+
+    def test_unwrap_passes_plain_objects_through(self):
+        """Test unwrap() on a normal object returns it unchanged"""
+        counter = Counter()
+        assert unwrap(counter) is counter
@@ -0,0 +1,76 @@
+"""
+Unit Tests for Versioned Model Artifacts
+"""
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+
+from model_artifacts import UNVERSIONED, load_artifacts, manifest_path, read_manifest, save_artifacts, temp_path
+
+
+def make_model():
+    vectorizer = TfidfVectorizer()
+    model = LogisticRegression().fit(vectorizer.fit_transform(["share otp now", "lunch tomorrow"]), [1, 0])
+    return model, vectorizer
+
+
+class TestModelArtifacts:
+    """Test manifest writing and verified loading"""
+
+    def setup_method(self):
+        self.model, self.vectorizer = make_model()
+
+    def test_round_trip(self, tmp_path):
+        """Test the saved artifact loads with its manifest"""
+        model_path, vectorizer_path = str(tmp_path / "model.joblib"), str(tmp_path / "vectorizer.joblib")
+        manifest = save_artifacts(self.model, self.vectorizer, model_path, vectorizer_path, accuracy=0.9)
+
+        model, vectorizer, loaded = load_artifacts(model_path, vectorizer_path)
+
+        assert loaded == manifest == read_manifest(model_path)
+        assert manifest["trainer"] == "LogisticRegression"
+        assert manifest["accuracy"] == 0.9
+        assert manifest["version"].endswith(manifest["files"]["model"]["sha256"][:8])
+        assert model.predict(vectorizer.transform(["share otp now"]))[0] == 1
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_temp_names_are_unique_per_writer(self, tmp_path):
+        """Test concurrent writers never share a temp file"""
+        path = str(tmp_path / "model.joblib")
+        assert temp_path(path) != temp_path(path)
+        assert temp_path(path).startswith(path + ".")
+
+    def test_memory_mapped_load(self, tmp_path):
+        """Test mmap_mode maps the model's arrays and predictions are unchanged"""
+        model_path, vectorizer_path = str(tmp_path / "model.joblib"), str(tmp_path / "vectorizer.joblib")
+        save_artifacts(self.model, self.vectorizer, model_path, vectorizer_path)
+
+        model, vectorizer, _ = load_artifacts(model_path, vectorizer_path, mmap_mode="r")
+
+        assert isinstance(model.coef_, np.memmap)
+        assert isinstance(vectorizer.idf_, np.memmap)
+        texts = ["share otp now", "lunch tomorrow"]
+        expected = self.model.predict_proba(self.vectorizer.transform(texts))
+        assert np.array_equal(model.predict_proba(vectorizer.transform(texts)), expected)
+
+    def test_mismatched_files_are_refused(self, tmp_path):
+        """Test a model overwritten without its manifest is not loaded"""
+        model_path, vectorizer_path = str(tmp_path / "model.joblib"), str(tmp_path / "vectorizer.joblib")
+        save_artifacts(self.model, self.vectorizer, model_path, vectorizer_path)
+        joblib.dump(LogisticRegression(C=0.5), model_path)
+
+        with pytest.raises(ValueError):
+            load_artifacts(model_path, vectorizer_path)
+
+    def test_missing_and_legacy_artifacts(self, tmp_path):
+        """Test nothing loads without files, and files without a manifest load unversioned"""
+        model_path, vectorizer_path = str(tmp_path / "model.joblib"), str(tmp_path / "vectorizer.joblib")
+        assert load_artifacts(model_path, vectorizer_path) is None
+
+        joblib.dump(self.model, model_path)
+        joblib.dump(self.vectorizer, vectorizer_path)
+        _, _, manifest = load_artifacts(model_path, vectorizer_path)
+        assert manifest["version"] == UNVERSIONED
+        assert manifest_path(model_path) == str(tmp_path / "model.manifest.json")
@@ -0,0 +1,63 @@
+"""
+Unit Tests for the Central Regex Pattern Registry
+"""
+import re
+
+import pytest
+
+from pattern_registry import PatternRegistry, pattern_registry
+from intelligence_extractor import IntelligenceExtractor
+from scam_detector import ScamDetector
+
+
+class TestPatternRegistry:
+    """Test named handles, sharing and the startup report"""
+
+    def setup_method(self):
+        self.registry = PatternRegistry()
+
+    def test_compile_and_get(self):
+        """Test a compiled handle is returned and retrievable by name"""
+        pattern = self.registry.compile("test.upi", r"\w+@\w+", re.IGNORECASE)
+
+        assert pattern.search("pay fraud@paytm").group() == "fraud@paytm"
+        assert self.registry.get("test.upi") is pattern
+        assert "test.upi" in self.registry
+        with pytest.raises(KeyError):
+            self.registry.get("test.missing")
+
+    def test_identical_patterns_shared(self):
+        """Test the same (pattern, flags) compiles once; different flags do not share"""
+        a = self.registry.compile("a.digits", r"\d+")
+        b = self.registry.compile("b.digits", r"\d+")
+        c = self.registry.compile("c.digits", r"\d+", re.IGNORECASE)
+
+        assert a is b
+        assert a is not c
+        assert self.registry.get_stats()["compiled"] == 2
+
+    def test_compile_all_names_in_order(self):
+        """Test list registration keeps order and numbers the handles"""
+        handles = self.registry.compile_all("test.words", ["one", "two"])
+
+        assert [p.pattern for p in handles] == ["one", "two"]
+        assert self.registry.get("test.words.1") is handles[1]
+
+    def test_stats_group_by_module(self):
+        """Test the report counts handles per leading name component"""
+        self.registry.compile_all("detector.link", ["a", "b"])
+        self.registry.compile("extractor.phone", "c")
+
+        stats = self.registry.get_stats()
+        assert stats["handles"] == 3
+        assert stats["byModule"] == {"detector": 2, "extractor": 1}
+        assert stats["compileMs"] >= 0
+
+    def test_modules_register_handles(self):
+        """Test the detector and extractor compile through the global registry"""
+        detector = ScamDetector()
+        extractor = IntelligenceExtractor()
+
+        assert pattern_registry.get("detector.phone") is detector._phone_pattern
+        assert pattern_registry.get("extractor.upi_ids.0") is extractor.compiled_patterns["upi_ids"][0]
+        assert {"detector", "extractor", "gazetteer"} <= set(pattern_registry.get_stats()["byModule"])
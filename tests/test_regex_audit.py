@@ -0,0 +1,64 @@
+"""
+Worst-Case Regex Audit Tests
+Every registered pattern must stay linear on generated adversarial input
+"""
+import re
+import time
+
+from config import REGEX_SCAN_CONFIG
+from pattern_registry import PatternRegistry, pattern_registry
+from regex_audit import GROWTH_LIMIT, adversarial_inputs, audit, audit_pattern, build, flagged
+from scam_detector import ScamDetector
+from intelligence_extractor import IntelligenceExtractor
+from ai_agent import HoneypotAgent
+from session_manager import SessionManager
+
+AUDIT_LENGTH = 1000
+
+
+class TestRegexAudit:
+    """Test the audit itself and run it over the live registry"""
+
+    def test_inputs_built_from_pattern(self):
+        """Test adversarial inputs reuse the pattern's own literals"""
+        units = {unit for unit, _ in adversarial_inputs(re.compile(r"awaaz.*?nahi"))}
+        assert {"awaaz", "nahi"} <= units
+        assert len(build("ab", "!", 5)) == 6
+
+    def test_detects_catastrophic_backtracking(self):
+        """Test a known quadratic pattern is flagged and its linear rewrite is not"""
+        registry = PatternRegistry()
+        registry.compile("test.quadratic", r"[a-z0-9.]+@[a-z]+")
+        registry.compile("test.linear", r"(?<![a-z0-9.])[a-z0-9.]+@[a-z]+")
+
+        results = audit(registry, AUDIT_LENGTH)
+
+        assert results["test.quadratic"]["growth"] > GROWTH_LIMIT
+        assert flagged(results, REGEX_SCAN_CONFIG["pattern_budget_ms"]) == ["test.quadratic"]
+
+    def test_registered_patterns_are_linear(self):
+        """Test no detector, extractor, agent or session pattern backtracks badly"""
+        ScamDetector()
+        IntelligenceExtractor()
+        HoneypotAgent()
+        SessionManager()
+
+        results = audit(pattern_registry, AUDIT_LENGTH)
+
+        assert flagged(results, REGEX_SCAN_CONFIG["pattern_budget_ms"]) == []
+
+    def test_adversarial_message_is_bounded(self):
+        """Test a maximal hostile message is analysed in bounded time"""
+        detector = ScamDetector()
+        extractor = IntelligenceExtractor()
+        text = ("http://" * 500 + "a1" * 500 + " awaaz " * 200 + "of " * 500) * 5
+
+        start = time.process_time()
+        detector.detect(text)
+        extractor.extract_from_text(text)
+        assert time.process_time() - start < 2.0
+
+    def test_single_pattern_report(self):
+        """Test the per-pattern report fields"""
+        report = audit_pattern(re.compile(r"\d+"), 200)
+        assert set(report) == {"pattern", "worstMs", "growth", "sample"}
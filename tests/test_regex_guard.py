@@ -0,0 +1,97 @@
+"""
+Unit Tests for Bounded Regex Scanning
+"""
+import random
+import re
+import time
+
+import regex_guard
+from regex_guard import AnalysisBudget, scan_windows
+from config import REGEX_SCAN_CONFIG
+from scam_detector import ScamDetector
+from intelligence_extractor import IntelligenceExtractor
+
+
+WORDS = ["hello", "9876543210", "http://x.com/verify", "@handle_x", "ref ABC12345", "123456789012", "a"]
+
+
+class TestScanWindows:
+    """Test window layout and windowed matching"""
+
+    def test_short_text_is_one_window(self):
+        """Test text under the cap is scanned as is"""
+        assert scan_windows("pay now", max_chars=100) == [(0, "pay now", 7)]
+
+    def test_windows_bounded_and_overlapping(self):
+        """Test every window respects the cap and shares the overlap with the next"""
+        text = "word " * 2000
+        windows = scan_windows(text, max_chars=500, overlap=50)
+
+        assert all(len(window) <= 500 for _, window, _ in windows)
+        for (offset, window, owned), (next_offset, _, _) in zip(windows, windows[1:]):
+            assert next_offset == offset + owned
+            assert offset + len(window) - next_offset >= 50
+        assert windows[-1][0] + len(windows[-1][1]) == len(text)
+
+    def test_text_beyond_message_cap_ignored(self):
+        """Test nothing past max_message_chars is scanned"""
+        text = "a " * REGEX_SCAN_CONFIG["max_message_chars"] + "9876543210"
+        assert not regex_guard.search(re.compile(r"\d{10}"), text)
+
+    def test_findall_matches_single_scan(self):
+        """Test windowed findall/search return what one full scan does"""
+        rng = random.Random(3)
+        patterns = [
+            re.compile(r"\b\d{9,18}\b"),
+            re.compile(r"https?://\S+"),
+            re.compile(r"(?:ref)[\s#:.-]*([A-Z0-9]{6,20})", re.IGNORECASE),
+            re.compile(r"(\d)(\d)?"),
+        ]
+        for _ in range(20):
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(200, 1500)))
+            for pattern in patterns:
+                assert regex_guard.findall(pattern, text) == pattern.findall(text)
+                assert regex_guard.search(pattern, text) == bool(pattern.search(text))
+
+
+class TestAnalysisBudget:
+    """Test graceful degradation once the budget is spent"""
+
+    def test_allows_until_expired(self):
+        """Test stages run while time remains and are recorded once skipped"""
+        budget = AnalysisBudget(budget_ms=10_000)
+        assert budget.allows("sentiment")
+
+        budget = AnalysisBudget(budget_ms=0)
+        time.sleep(0.001)
+        assert not budget.allows("sentiment")
+        assert budget.skipped == ["sentiment"]
+
+    def test_detector_degrades(self, monkeypatch):
+        """Test the detector skips optional stages instead of failing when out of budget"""
+        monkeypatch.setattr("scam_detector.AnalysisBudget", lambda: AnalysisBudget(budget_ms=-1))
+        detector = ScamDetector()
+
+        signals = detector._scan_signals("urgent! share otp now, your account is blocked", [])
+
+        assert signals["sentiment_patterns"] == []
+        assert signals["social_patterns"] == []
+        assert signals["rule_score"] > 0
+        assert detector.detect("urgent! share otp now, your account is blocked")[4].degraded
+
+    def test_full_analysis_not_degraded(self):
+        """Test results within the budget are not flagged"""
+        assert not ScamDetector().detect("urgent! share otp now, your account is blocked")[4].degraded
+        assert not IntelligenceExtractor().extract_from_text("pay to fraud@paytm")["degraded"]
+
+    def test_extractor_keeps_core_fields(self, monkeypatch):
+        """Test core intelligence is still extracted when optional fields are skipped"""
+        monkeypatch.setattr("intelligence_extractor.AnalysisBudget", lambda: AnalysisBudget(budget_ms=-1))
+        extractor = IntelligenceExtractor()
+
+        result = extractor.extract_from_text("Officer Sharma here, pay to fraud@paytm ref ABC123456")
+
+        assert "fraud@paytm" in result["upi_ids"]
+        assert not result["person_names"]
+        assert not result["reference_numbers"]
+        assert result["degraded"]
@@ -0,0 +1,43 @@
+"""
+Unit Tests for Agent Reply Cleanup
+"""
+import time
+
+from ai_agent import HoneypotAgent, strip_enclosed
+
+
+class TestResponseCleanup:
+    """Test chain-of-thought and bracket removal from model replies"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.agent = HoneypotAgent()
+
+    def test_long_think_block_removed(self):
+        """Test a think block of any length is stripped"""
+        reasoning = "The scammer wants my OTP. " * 200
+        ok, reply = self.agent._validate_response(f"<think>{reasoning}</think>Haan ji, kaunsa OTP?")
+
+        assert len(reasoning) > 1000
+        assert ok and reply == "Haan ji, kaunsa OTP?"
+
+    def test_long_parenthetical_removed(self):
+        """Test a stage direction of any length is stripped"""
+        ok, reply = self.agent._validate_response(f"Ruko ({'sounds confused ' * 30}) ek minute")
+        assert ok and reply == "Ruko ek minute"
+
+    def test_matches_non_greedy_regex(self):
+        """Test each span ends at the first closer, and unclosed openers are kept"""
+        assert strip_enclosed("a(b)c(d)e", "(", ")") == "ace"
+        assert strip_enclosed("a(b(c)d)e", "(", ")") == "ad)e"
+        assert strip_enclosed("a(b)c(d", "(", ")") == "ac(d"
+        assert strip_enclosed("<think>x</think>", "<thinking>", "</thinking>") == "<think>x</think>"
+
+    def test_unclosed_openers_are_linear(self):
+        """Test many unclosed openers are handled in one pass"""
+        text = "<think>(" * 50000
+
+        start = time.perf_counter()
+        for opener, closer in [("<think>", "</think>"), ("(", ")")]:
+            assert strip_enclosed(text, opener, closer) == text
+        assert time.perf_counter() - start < 0.5
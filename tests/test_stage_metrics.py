@@ -0,0 +1,82 @@
+"""
+Unit Tests for Per-Stage Latency Metrics
+"""
+import random
+
+from stage_metrics import StageHistogram, StageMetrics
+
+
+class TestStageHistogram:
+    """Test bucketed percentiles"""
+
+    def test_percentiles_close_to_exact(self):
+        """Test p50/p95/p99 are within the bucket resolution of the exact values"""
+        rng = random.Random(7)
+        samples = [int(rng.lognormvariate(13, 1)) for _ in range(5000)]
+        histogram = StageHistogram()
+        for ns in samples:
+            histogram.add(ns)
+
+        ordered = sorted(samples)
+        for q in (50, 95, 99):
+            exact = ordered[int(len(ordered) * q / 100) - 1] / 1e6
+            assert abs(histogram.percentile(q) - exact) / exact < 0.05
+
+    def test_summary(self):
+        """Test counts, mean and max"""
+        histogram = StageHistogram()
+        for ms in (1, 2, 3):
+            histogram.add(ms * 1_000_000)
+
+        summary = histogram.summary()
+        assert summary["count"] == 3
+        assert summary["meanMs"] == 2.0
+        assert summary["maxMs"] == 3.0
+        assert summary["p99Ms"] <= 3.0
+
+
+class TestStageMetrics:
+    """Test spans, request traces and the disabled mode"""
+
+    def test_span_records_stage(self):
+        """Test a span adds one sample to its stage"""
+        metrics = StageMetrics(enabled=True)
+        with metrics.span("detector.rules"):
+            sum(range(1000))
+
+        stages = metrics.get_stats()["stages"]
+        assert stages["detector.rules"]["count"] == 1
+        assert stages["detector.rules"]["maxMs"] > 0
+
+    def test_laps_close_consecutive_stages(self):
+        """Test each lap records the time since the previous one"""
+        metrics = StageMetrics(enabled=True)
+        trace = metrics.start_trace()
+        laps = metrics.laps()
+        sum(range(1000))
+        laps.lap("detector.rules")
+        laps.lap("detector.context")
+
+        stages = metrics.get_stats()["stages"]
+        assert stages["detector.rules"]["count"] == stages["detector.context"]["count"] == 1
+        assert list(trace) == ["detector.rules", "detector.context"]
+
+    def test_trace_collects_request_breakdown(self):
+        """Test an active trace sums each stage for the current request"""
+        metrics = StageMetrics(enabled=True)
+        trace = metrics.start_trace()
+        metrics.record("api.detect", 2_000_000)
+        metrics.record("api.detect", 1_000_000)
+        metrics.record("api.agent", 500_000)
+
+        assert trace == {"api.detect": 3_000_000, "api.agent": 500_000}
+        assert metrics.format_trace(trace) == "api.detect=3.00ms, api.agent=0.50ms"
+
+    def test_disabled_records_nothing(self):
+        """Test spans are no-ops when metrics are off"""
+        metrics = StageMetrics(enabled=False)
+        with metrics.span("detector.ml"):
+            pass
+        metrics.laps().lap("detector.rules")
+
+        assert metrics.get_stats() == {"enabled": False, "stages": {}}
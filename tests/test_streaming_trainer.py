@@ -0,0 +1,113 @@
+"""
+Unit Tests for the Out-of-Core Streaming Trainer
+"""
+import pandas as pd
+
+import scam_detector
+from scam_detector import ScamDetector
+from streaming_trainer import DigestBloomFilter, iter_labelled_chunks, train_streaming
+
+
+SCAMS = [
+    "urgent share otp {} now or account blocked",
+    "you won lottery prize {} pay processing fee",
+    "cbi officer says pay {} to avoid digital arrest",
+]
+LEGIT = [
+    "see you at lunch tomorrow {}",
+    "your order {} has been shipped",
+    "happy birthday have a great day {}",
+]
+
+
+def write_dataset(path, rows=300):
+    data = []
+    for i in range(rows):
+        templates = SCAMS if i % 2 == 0 else LEGIT
+        data.append((templates[i % 3].format(i), "scam" if i % 2 == 0 else "legit"))
+    pd.DataFrame(data, columns=["message_text", "label"]).to_csv(path, index=False)
+
+
+class TestStreamingTrainer:
+    """Test chunked reading and partial_fit training"""
+
+    def test_chunks_are_bounded_and_split_disjoint(self, tmp_path):
+        """Test chunk size, deduplication and a stable train/holdout split"""
+        path = str(tmp_path / "data.csv")
+        write_dataset(path)
+        pd.concat([pd.read_csv(path)] * 2).to_csv(str(tmp_path / "dupes.csv"), index=False)
+        paths = [path, str(tmp_path / "dupes.csv")]
+
+        train = [t for texts, _ in iter_labelled_chunks(paths, chunk_size=50) for t in texts]
+        holdout = [t for texts, _ in iter_labelled_chunks(paths, chunk_size=50, holdout=True) for t in texts]
+
+        assert all(len(texts) <= 50 for texts, _ in iter_labelled_chunks(paths, chunk_size=50))
+        assert len(train) == len(set(train))
+        assert not set(train) & set(holdout)
+        assert len(train) + len(holdout) == 300
+
+    def test_dedupe_filter_is_fixed_size(self):
+        """Test the dedupe filter remembers digests without growing"""
+        seen = DigestBloomFilter(bits=1 << 16)
+        size = len(seen._array)
+
+        assert not any(seen.add(digest * 0x9E3779B97F4A7C15 % (1 << 64)) for digest in range(1000))
+        assert all(seen.add(digest * 0x9E3779B97F4A7C15 % (1 << 64)) for digest in range(1000))
+        assert len(seen._array) == size == 1 << 13
+
+    def test_train_streaming(self, tmp_path):
+        """Test the SGD model learns the synthetic split"""
+        path = str(tmp_path / "data.csv")
+        write_dataset(path)
+
+        model, vectorizer, accuracy = train_streaming([path], chunk_size=64, epochs=3)
+
+        assert accuracy is not None and accuracy > 0.9
+        proba = model.predict_proba(vectorizer.transform(["share otp now account blocked"]))
+        assert proba.shape == (1, 2)
+        assert proba[0, 1] > 0.5
+
+    def test_missing_datasets(self, tmp_path):
+        """Test training aborts cleanly when nothing can be read"""
+        model, _, accuracy = train_streaming([str(tmp_path / "missing.csv")])
+        assert model is None and accuracy is None
+
+    def test_detector_streaming_mode(self, tmp_path, monkeypatch):
+        """Test ScamDetector.train_model(streaming=True) saves and uses the SGD model"""
+        path = str(tmp_path / "data.csv")
+        write_dataset(path)
+        monkeypatch.setattr(scam_detector, "MODEL_PATH", str(tmp_path / "model.joblib"))
+        monkeypatch.setattr(scam_detector, "VECTORIZER_PATH", str(tmp_path / "vectorizer.joblib"))
+        monkeypatch.setattr(scam_detector, "COMPILED_MODEL_PATH", str(tmp_path / "trees.joblib"))
+
+        detector = ScamDetector()
+        accuracy = detector.train_model([path], streaming=True)
+
+        assert accuracy is not None
+        assert detector.is_trained
+        assert (tmp_path / "model.joblib").exists()
+        assert detector.compiled_model is None
+        assert 0.0 <= detector._ml_scores(["share otp now"], [[]])[0] <= 1.0
+
+    def test_cli_saves_a_loadable_artifact(self, tmp_path, monkeypatch):
+        """Test the CLI replaces an existing artifact with one whose manifest matches"""
+        import streaming_trainer
+        from model_artifacts import save_artifacts
+
+        path = str(tmp_path / "data.csv")
+        write_dataset(path)
+        paths = {"MODEL_PATH": str(tmp_path / "model.joblib"), "VECTORIZER_PATH": str(tmp_path / "vectorizer.joblib")}
+        for name, value in paths.items():
+            monkeypatch.setattr(streaming_trainer, name, value)
+            monkeypatch.setattr(scam_detector, name, value)
+        monkeypatch.setattr(scam_detector, "COMPILED_MODEL_PATH", str(tmp_path / "trees.joblib"))
+        write_dataset(str(tmp_path / "old.csv"), rows=60)
+        model, vectorizer, _ = train_streaming([str(tmp_path / "old.csv")])
+        old = save_artifacts(model, vectorizer, paths["MODEL_PATH"], paths["VECTORIZER_PATH"])
+
+        monkeypatch.setattr("sys.argv", ["streaming_trainer.py", path])
+        streaming_trainer.main()
+
+        detector = ScamDetector()
+        assert detector.is_trained
+        assert detector.model_version != old["version"]
@@ -0,0 +1,46 @@
+"""
+Unit Tests for Shared Text Normalization
+"""
+from intelligence_extractor import IntelligenceExtractor
+from scam_detector import ScamDetector
+from text_normalizer import NormalizedMessage, normalize
+
+
+class TestNormalizedMessage:
+    """Test the normalized views of a message"""
+
+    def test_lower_matches_str_lower(self):
+        """Test that lower is exactly str.lower() so keyword checks are unchanged"""
+        text = "URGENT: Your SBI Account İs Blocked"
+        assert NormalizedMessage(text).lower == text.lower()
+
+    def test_canonical_removes_obfuscation(self):
+        """Test zero-width characters and fullwidth forms are folded"""
+        message = NormalizedMessage("Share \uff2f\u200b\uff34\u200d\uff30 now")
+        assert message.canonical == "share otp now"
+
+    def test_normalize_reuses_instance(self):
+        """Test normalize() does not rebuild an existing NormalizedMessage"""
+        message = normalize("hello")
+        assert normalize(message) is message
+        assert str(message) == "hello"
+
+
+class TestNormalizedPipeline:
+    """Test consumers give the same output for a string and its NormalizedMessage"""
+
+    def test_detector_accepts_normalized(self):
+        """Test detect() results are identical"""
+        detector = ScamDetector()
+        text = "URGENT: Share OTP now or your SBI account will be blocked. Call 9876543210"
+        plain = detector.detect(text, ["Hello from SBI"])
+        normalized = detector.detect(normalize(text), ["Hello from SBI"])
+
+        assert plain[:3] == normalized[:3]
+        assert sorted(plain[3]) == sorted(normalized[3])
+
+    def test_extractor_accepts_normalized(self):
+        """Test extract_from_text() results are identical"""
+        extractor = IntelligenceExtractor()
+        text = "Pay Rs 500 to fraud@paytm or call 9876543210 from Mumbai"
+        assert extractor.extract_from_text(text) == extractor.extract_from_text(normalize(text))
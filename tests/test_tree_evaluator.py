@@ -0,0 +1,107 @@
+"""
+Unit Tests for the Compiled Tree-Ensemble Evaluator
+"""
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from scam_detector import ScamDetector
+from tree_evaluator import CompiledTreeEnsemble, compile_model
+
+
+class TestCompiledTreeEnsemble:
+    """Test that flattened trees reproduce sklearn probabilities"""
+
+    def setup_method(self):
+        """Setup test fixtures with a small sparse model"""
+        self.X = sparse.random(300, 400, density=0.02, format="csr", random_state=0)
+        y = (self.X[:, :20].sum(axis=1).A1 > 0.1).astype(int)
+        self.model = GradientBoostingClassifier(n_estimators=20, max_depth=4, random_state=42)
+        self.model.fit(self.X, y)
+        self.compiled = CompiledTreeEnsemble.from_sklearn(self.model)
+
+    def test_matches_sklearn(self):
+        """Test probabilities agree with sklearn within 1e-9"""
+        rows = sparse.vstack([
+            self.X[:100],
+            sparse.random(100, 400, density=0.05, format="csr", random_state=1),
+            sparse.csr_matrix((1, 400)),
+        ]).tocsr()
+
+        diff = np.abs(self.model.predict_proba(rows) - self.compiled.predict_proba(rows))
+        assert diff.max() <= 1e-9
+
+    def test_unsorted_indices(self):
+        """Test rows with unsorted column indices are handled"""
+        row = sparse.csr_matrix((np.array([0.5, 0.3]), np.array([15, 3]), np.array([0, 2])), shape=(1, 400))
+        assert np.allclose(self.compiled.predict_proba(row), self.model.predict_proba(row), atol=1e-9)
+
+    def test_save_load_roundtrip(self, tmp_path):
+        """Test the exported arrays load back to the same evaluator"""
+        path = str(tmp_path / "trees.joblib")
+        self.compiled.save(path)
+        loaded = CompiledTreeEnsemble.load(path)
+
+        assert loaded.max_depth == self.compiled.max_depth
+        assert np.array_equal(loaded.predict_proba(self.X[:20]), self.compiled.predict_proba(self.X[:20]))
+
+    def test_concurrent_saves_use_own_temp_files(self, tmp_path, monkeypatch):
+        """Test writers exporting the same path never share a temp file"""
+        import tree_evaluator
+
+        path = str(tmp_path / "trees.joblib")
+        written = []
+        dump = tree_evaluator.joblib.dump
+        monkeypatch.setattr(tree_evaluator.joblib, "dump", lambda data, target: written.append(target) or dump(data, target))
+        self.compiled.save(path)
+        self.compiled.save(path)
+
+        assert len(set(written)) == 2 and path not in written
+        assert [p.name for p in tmp_path.iterdir()] == ["trees.joblib"]
+
+    def test_memory_mapped_load(self, tmp_path):
+        """Test the saved arrays can be memory-mapped read-only and still score"""
+        path = str(tmp_path / "trees.joblib")
+        self.compiled.save(path)
+        loaded = CompiledTreeEnsemble.load(path, mmap_mode="r")
+
+        assert isinstance(loaded.value, np.memmap)
+        assert np.array_equal(loaded.predict_proba(self.X[:20]), self.compiled.predict_proba(self.X[:20]))
+
+    def test_rejects_wrong_width(self):
+        """Test a row with the wrong feature count is rejected"""
+        with pytest.raises(ValueError):
+            self.compiled.predict_proba(sparse.csr_matrix((1, 10)))
+
+    def test_multiclass_not_compiled(self):
+        """Test unsupported models fall back to sklearn"""
+        y = np.arange(300) % 3
+        model = GradientBoostingClassifier(n_estimators=3, random_state=42).fit(self.X, y)
+
+        with pytest.raises(ValueError):
+            CompiledTreeEnsemble.from_sklearn(model)
+        assert compile_model(model) is None
+
+
+class TestDetectorCompiledScoring:
+    """Test ScamDetector routes single messages through the compiled evaluator"""
+
+    def test_single_message_uses_compiled_model(self):
+        """Test the compiled path is used and returns the sklearn score"""
+        texts = ["share otp now account blocked", "lottery prize pay fee", "lunch tomorrow", "happy birthday"]
+        detector = ScamDetector()
+        detector.vectorizer = TfidfVectorizer()
+        detector.model = GradientBoostingClassifier(n_estimators=10, random_state=42)
+        detector.model.fit(detector.vectorizer.fit_transform(texts), [1, 1, 0, 0])
+        detector.is_trained = True
+        expected = detector._ml_scores(["share your otp"], [[]])
+
+        detector.compiled_model = compile_model(detector.model)
+        calls = []
+        original = detector.compiled_model.predict_proba
+        detector.compiled_model.predict_proba = lambda X: calls.append(X.shape[0]) or original(X)
+
+        assert detector._ml_scores(["share your otp"], [[]]) == pytest.approx(expected, abs=1e-9)
+        assert calls == [1]
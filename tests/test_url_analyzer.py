@@ -0,0 +1,100 @@
+"""
+Unit Tests for URL Canonicalization and Domain Reputation
+"""
+from intelligence_extractor import IntelligenceExtractor
+from url_analyzer import DomainSuffixTrie, URLAnalyzer, canonicalize, refang
+
+
+class TestCanonicalize:
+    """Test links are parsed into one canonical form"""
+
+    def test_defanged_forms_restored(self):
+        """Test hxxp, [.] and (dot) are undone"""
+        assert refang("hxxps://evil[.]com/login") == "https://evil.com/login"
+        assert canonicalize("hXXp[:]//pay(dot)example[.]in").host == "pay.example.in"
+
+    def test_host_lowercased_without_userinfo_port_or_fragment(self):
+        """Test userinfo, trailing dots and fragments are dropped and the port kept"""
+        url = canonicalize("http://user:pw@MAIL.Google.COM.:8080/a?b=1#frag")
+
+        assert url.host == "mail.google.com"
+        assert url.url == "http://mail.google.com:8080/a?b=1"
+
+    def test_idn_host_to_punycode(self):
+        """Test a Cyrillic look-alike host becomes punycode and is flagged"""
+        url = canonicalize("http://аpple.com/")
+
+        assert url.host == "xn--pple-43d.com"
+        assert url.is_idn
+
+    def test_scheme_less_and_ip_links(self):
+        """Test www./shortener links get a scheme and IP hosts are recognised"""
+        assert canonicalize("bit.ly/abc").url == "http://bit.ly/abc"
+        assert canonicalize("http://192.168.1.1/verify").is_ip
+        assert canonicalize("http://[bad") is None
+
+
+class TestDomainSuffixTrie:
+    """Test reversed-label suffix matching"""
+
+    def test_longest_suffix_wins(self):
+        """Test subdomains inherit, look-alikes do not, and deeper entries override"""
+        trie = DomainSuffixTrie({"google.com": "allow", "sites.google.com": "block"})
+
+        assert trie.match("mail.google.com") == "allow"
+        assert trie.match("evil.sites.google.com") == "block"
+        assert trie.match("google.com.evil.in") is None
+        assert trie.match("notgoogle.com") is None
+        assert len(trie) == 2
+
+
+class TestURLAnalyzer:
+    """Test list loading, verdicts and the cache"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.analyzer = URLAnalyzer(allowlist_path="", blocklist_path="", cache_size=2)
+
+    def test_lookalike_not_legitimate(self):
+        """Test a legitimate domain as a subdomain of another is not allowlisted"""
+        assert self.analyzer.is_legitimate("https://www.google.com")
+        assert not self.analyzer.is_legitimate("https://google.com.evil.in/login")
+
+    def test_list_files_loaded(self, tmp_path):
+        """Test list files accept comments, wildcards and defanged URLs, and block beats allow"""
+        allow = tmp_path / "allow.txt"
+        allow.write_text("# partners\n*.partner.example\nsbi-kyc.xyz\n")
+        block = tmp_path / "block.txt"
+        block.write_text("hxxp://sbi-kyc[.]xyz/verify  # campaign 12\n")
+
+        self.analyzer.load(str(allow), str(block))
+
+        assert self.analyzer.is_legitimate("https://pay.partner.example/x")
+        assert self.analyzer.analyze("http://login.sbi-kyc.xyz").blocked
+
+    def test_shortener_detection(self):
+        """Test shorteners are matched by host, not substring"""
+        assert self.analyzer.analyze("https://t.co/abc").shortener
+        assert not self.analyzer.analyze("https://secure-bankt.co.in/x").shortener
+
+    def test_verdicts_cached_and_bounded(self):
+        """Test repeated links hit the cache and the cache stays within cache_size"""
+        for url in ("bit.ly/a", "bit.ly/a", "bit.ly/b", "bit.ly/c"):
+            self.analyzer.analyze(url)
+
+        stats = self.analyzer.get_stats()
+        assert stats["hits"] == 1
+        assert stats["cacheSize"] == 2
+
+
+class TestExtractorLinkFilter:
+    """Test the extractor's legitimate-link filter uses domain suffixes"""
+
+    def test_lookalike_domain_kept(self):
+        """Test google.com.evil.in is reported while google.com is filtered"""
+        extracted = IntelligenceExtractor().extract_from_text(
+            "Visit https://www.google.com or https://google.com.evil.in/pay"
+        )
+
+        assert extracted['phishing_links'] == {"https://google.com.evil.in/pay"}
+        assert "link:https://www.google.com" not in extracted['confidence_scores']
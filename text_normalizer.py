@@ -0,0 +1,57 @@
+"""
+Shared Text Normalization
+One NormalizedMessage per incoming message, reused by the detector, the
+intelligence extractor, session analytics and the agent's emotion tracking
+"""
+import unicodedata
+from functools import cached_property
+from typing import Union
+
+# Invisible characters used to split keywords (e.g. "o\u200btp") and dodge filters
+ZERO_WIDTH_CHARS = "\u200b\u200c\u200d\u2060\ufeff\u00ad"
+_ZERO_WIDTH_TABLE = str.maketrans("", "", ZERO_WIDTH_CHARS)
+
+
+class NormalizedMessage:
+    """
+    Normalized views of one message text.
+
+    `lower` is exactly text.lower() so existing substring and keyword checks
+    behave as before; `nfkc` and `canonical` are computed on first access and
+    then cached. `canonical` is the NFKC form with zero-width characters
+    removed, lowercased; it is the place to undo obfuscation.
+    """
+
+    def __init__(self, text: str):
+        self.raw = text
+        self.lower = text.lower()
+
+    @cached_property
+    def nfkc(self) -> str:
+        """Unicode NFKC form with zero-width characters removed"""
+        return unicodedata.normalize("NFKC", self.raw).translate(_ZERO_WIDTH_TABLE)
+
+    @cached_property
+    def canonical(self) -> str:
+        """Lowercased NFKC form (fullwidth/compatibility characters folded)"""
+        return self.nfkc.lower()
+
+    def __str__(self) -> str:
+        return self.raw
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __repr__(self) -> str:
+        return f"NormalizedMessage({self.raw!r})"
+
+
+# Anything that accepts a message text also accepts its NormalizedMessage
+MessageText = Union[str, NormalizedMessage]
+
+
+def normalize(text: MessageText) -> NormalizedMessage:
+    """Return text as a NormalizedMessage, reusing it if it already is one"""
+    if isinstance(text, NormalizedMessage):
+        return text
+    return NormalizedMessage(str(text))
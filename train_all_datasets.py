@@ -3,7 +3,6 @@ Full model training on all available datasets.
 Combines all massive datasets + additional data for comprehensive training.
 """
 import pandas as pd
-import joblib
 import os
 import time
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -11,6 +10,9 @@ from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 import logging
 
+from config import MODEL_PATH, VECTORIZER_PATH
+from model_artifacts import save_artifacts
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -155,11 +157,10 @@ try:
     
     # Save model
     logger.info(f"\n💾 Saving model artifacts...")
-    joblib.dump(model, "models/scam_detector.joblib")
-    joblib.dump(vectorizer, "models/tfidf_vectorizer.joblib")
+    save_artifacts(model, vectorizer, MODEL_PATH, VECTORIZER_PATH, accuracy=test_accuracy)
     
-    model_size = os.path.getsize("models/scam_detector.joblib") / (1024 * 1024)
-    vectorizer_size = os.path.getsize("models/tfidf_vectorizer.joblib") / (1024 * 1024)
+    model_size = os.path.getsize(MODEL_PATH) / (1024 * 1024)
+    vectorizer_size = os.path.getsize(VECTORIZER_PATH) / (1024 * 1024)
     total_size = model_size + vectorizer_size
     
     logger.info(f"   Model file: {model_size:.2f} MB")
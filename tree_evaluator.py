@@ -0,0 +1,223 @@
+"""
+Compiled Tree-Ensemble Evaluator
+Flattens a trained binary GradientBoostingClassifier into contiguous NumPy arrays
+and scores sparse TF-IDF rows without sklearn's per-call validation overhead.
+
+Usage: python tree_evaluator.py   (export models/scam_detector.joblib and verify/benchmark it)
+"""
+import os
+import time
+from typing import Optional
+
+import joblib
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+from config import MODEL_PATH, COMPILED_MODEL_PATH
+from logging_config import get_logger
+from model_artifacts import temp_path
+
+logger = get_logger("honeypot.tree_evaluator")
+
+# Larger batches go back to sklearn, whose per-call overhead is amortized
+MAX_COMPILED_BATCH_ROWS = 8
+
+
+class CompiledTreeEnsemble:
+    """
+    Flattened binary GradientBoostingClassifier.
+
+    All trees live in one node array. Leaves point to themselves and carry an
+    infinite threshold, so every tree can be walked for exactly max_depth steps
+    in lock-step (one vectorized step per tree level). Feature values are looked
+    up by binary search over the row's nonzero indices, so only features the
+    trees actually test are touched. Like sklearn, inputs are compared as float32.
+    """
+
+    max_batch_rows = MAX_COMPILED_BATCH_ROWS
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        init_raw: float,
+        learning_rate: float,
+        max_depth: int,
+        n_features: int
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.init_raw = float(init_raw)
+        self.learning_rate = float(learning_rate)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledTreeEnsemble":
+        """Flatten a fitted binary log-loss GradientBoostingClassifier"""
+        if getattr(model, "n_classes_", None) != 2 or getattr(model, "loss", None) != "log_loss":
+            raise ValueError("Only binary log-loss GradientBoostingClassifier models can be compiled")
+        if model.init not in (None, "zero"):
+            raise ValueError("Custom init estimators cannot be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_[:, 0]:
+            tree = estimator.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(offset, offset + n)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        init_raw = model._raw_predict_init(sparse.csr_matrix((1, model.n_features_in_)))[0, 0]
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            init_raw=init_raw,
+            learning_rate=model.learning_rate,
+            max_depth=max_depth,
+            n_features=model.n_features_in_,
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Write the flattened arrays with joblib (uncompressed, so load() can memory-map them)
+        The file is replaced atomically: other processes may have the old one mapped, and
+        workers loading the same model may export it at once, so each writes its own temp file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = temp_path(path)
+        joblib.dump({
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "value": self.value,
+            "roots": self.roots,
+            "meta": np.array([self.init_raw, self.learning_rate, self.max_depth, self.n_features], dtype=np.float64),
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> "CompiledTreeEnsemble":
+        """Load arrays written by save(); mmap_mode="r" shares their pages between processes"""
+        data = joblib.load(path, mmap_mode=mmap_mode)
+        init_raw, learning_rate, max_depth, n_features = data["meta"]
+        return cls(
+            feature=data["feature"],
+            threshold=data["threshold"],
+            left=data["left"],
+            right=data["right"],
+            value=data["value"],
+            roots=data["roots"],
+            init_raw=init_raw,
+            learning_rate=learning_rate,
+            max_depth=int(max_depth),
+            n_features=int(n_features),
+        )
+
+    def decision_row(self, indices: np.ndarray, data: np.ndarray) -> float:
+        """Raw log-odds for one sparse row given its sorted nonzero indices and values"""
+        data = np.asarray(data, dtype=np.float32).astype(np.float64)
+        node = self.roots
+        for _ in range(self.max_depth):
+            feature = self.feature[node]
+            if len(indices):
+                pos = np.minimum(np.searchsorted(indices, feature), len(indices) - 1)
+                x = np.where(indices[pos] == feature, data[pos], 0.0)
+            else:
+                x = np.zeros(len(node))
+            node = np.where(x <= self.threshold[node], self.left[node], self.right[node])
+
+        # Accumulate stage by stage, in the same order as sklearn
+        stages = np.empty(len(node) + 1)
+        stages[0] = self.init_raw
+        stages[1:] = self.learning_rate * self.value[node]
+        return float(np.cumsum(stages)[-1])
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities [[p_legit, p_scam], ...] for a CSR matrix"""
+        X = sparse.csr_matrix(X)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        if not X.has_sorted_indices:
+            X = X.sorted_indices()
+
+        raw = np.array([
+            self.decision_row(X.indices[X.indptr[i]:X.indptr[i + 1]], X.data[X.indptr[i]:X.indptr[i + 1]])
+            for i in range(X.shape[0])
+        ])
+        proba_scam = expit(raw)
+        return np.column_stack([1.0 - proba_scam, proba_scam])
+
+
+def compile_model(model, verify_rows: int = 16, tolerance: float = 1e-9) -> Optional[CompiledTreeEnsemble]:
+    """
+    Flatten model and check it against sklearn on random sparse rows
+    Returns None (caller keeps using sklearn) if the model cannot be compiled or disagrees
+    """
+    try:
+        compiled = CompiledTreeEnsemble.from_sklearn(model)
+    except (ValueError, AttributeError) as e:
+        logger.info(f"Tree ensemble not compiled: {e}")
+        return None
+
+    if verify_ensemble(compiled, model, verify_rows, tolerance):
+        return compiled
+    logger.warning("Compiled tree ensemble disagrees with sklearn; using sklearn predict_proba")
+    return None
+
+
+def verify_ensemble(compiled: CompiledTreeEnsemble, model, rows: int = 16, tolerance: float = 1e-9) -> bool:
+    """Compare compiled and sklearn probabilities on random sparse rows"""
+    sample = sparse.random(rows, compiled.n_features, density=0.01, format="csr", random_state=0)
+    expected = model.predict_proba(sample)
+    actual = compiled.predict_proba(sample)
+    return bool(np.max(np.abs(expected - actual)) <= tolerance)
+
+
+def main():
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledTreeEnsemble.from_sklearn(model)
+    compiled.save(COMPILED_MODEL_PATH)
+    print(f"✅ Exported {len(compiled.roots)} trees ({len(compiled.value)} nodes) to {COMPILED_MODEL_PATH}")
+
+    sample = sparse.random(1000, compiled.n_features, density=0.005, format="csr", random_state=1)
+    max_error = np.max(np.abs(model.predict_proba(sample) - compiled.predict_proba(sample)))
+    print(f"Max |sklearn - compiled| over 1000 rows: {max_error:.2e}")
+
+    for name, predict in (("sklearn", model.predict_proba), ("compiled", compiled.predict_proba)):
+        timings = []
+        for i in range(1000):
+            start = time.perf_counter()
+            predict(sample[i])
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{name:9s} single-row p50={np.percentile(timings, 50):.3f}ms p99={np.percentile(timings, 99):.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
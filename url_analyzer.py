@@ -0,0 +1,262 @@
+"""
+URL Analyzer
+Parses and canonicalizes extracted links once (defanged forms, IDNA hosts,
+userinfo/ports) and matches the host against domain-suffix tries built from
+the built-in lists plus loadable allow/block files. Verdicts are LRU cached,
+since campaign links repeat heavily.
+"""
+import ipaddress
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from config import URL_REPUTATION_CONFIG
+from lazy_singleton import LazySingleton
+from logging_config import get_logger
+from pattern_registry import pattern_registry
+
+logger = get_logger("honeypot.url_analyzer")
+
+# Known-good hosts; subdomains match too (mail.google.com), look-alikes do not (google.com.evil.in)
+DEFAULT_ALLOWLIST = [
+    'google.com', 'facebook.com', 'twitter.com', 'linkedin.com',
+    'github.com', 'microsoft.com', 'apple.com', 'amazon.in',
+    'flipkart.com', 'sbi.co.in', 'hdfcbank.com', 'icicibank.com',
+    'onlinesbi.com', 'netbanking.hdfcbank.com',
+]
+
+SHORTENER_DOMAINS = [
+    'bit.ly', 'tinyurl.com', 'rb.gy', 'is.gd', 't.co', 'goo.gl', 'cutt.ly',
+    'ow.ly', 'shorturl.at', 'tiny.cc', 'v.gd', 'rebrand.ly', 't.ly', 's.id',
+]
+
+ALLOW = "allow"
+BLOCK = "block"
+
+# "hxxp://", "hXXps[:]//", "evil[.]com", "evil(dot)com" as written in threat feeds and reports
+_DEFANGED_SCHEME = pattern_registry.compile("url.defanged_scheme", r"^h[x*]{2}p(s?)", re.IGNORECASE)
+_DEFANGED_DOT = pattern_registry.compile(
+    "url.defanged_dot", r"[\[({]\s{0,3}(?:\.|dot)\s{0,3}[\])}]", re.IGNORECASE
+)
+_DEFANGED_COLON = pattern_registry.compile("url.defanged_colon", r"\[(:|://)\]")
+_TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+
+
+class CanonicalURL(NamedTuple):
+    """A parsed link"""
+    url: str                # scheme://host[:port]/path[?query], lowercased scheme and host, no fragment
+    host: str               # ASCII (punycode) host without userinfo, port or trailing dot
+    is_ip: bool             # Host is an IPv4/IPv6 literal
+    is_idn: bool            # Host has internationalized labels (possible homograph)
+
+
+class URLVerdict(NamedTuple):
+    """Reputation of one link"""
+    url: CanonicalURL
+    listed: Optional[str]   # ALLOW, BLOCK or None when the host is on neither list
+    shortener: bool
+
+    @property
+    def allowed(self) -> bool:
+        return self.listed == ALLOW
+
+    @property
+    def blocked(self) -> bool:
+        return self.listed == BLOCK
+
+
+def refang(url: str) -> str:
+    """Undo common defanging: hxxp -> http, [.] / (dot) -> ., [:] -> :"""
+    url = _DEFANGED_SCHEME.sub(r"http\1", url.strip())
+    url = _DEFANGED_DOT.sub(".", url)
+    return _DEFANGED_COLON.sub(r"\1", url)
+
+
+def _ascii_host(host: str) -> tuple:
+    """(punycode host, is_idn) for a lowercased host"""
+    if host.isascii():
+        return host, any(label.startswith("xn--") for label in host.split("."))
+    try:
+        return host.encode("idna").decode("ascii"), True
+    except UnicodeError:
+        # Not valid IDNA (e.g. an over-long label); keep it so it can still be reported
+        return host, True
+
+
+def canonicalize(url: str) -> Optional[CanonicalURL]:
+    """Parse a (possibly defanged or scheme-less) link; None when it has no host"""
+    url = refang(url).rstrip(_TRAILING_PUNCTUATION)
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname
+        port = parts.port
+    except ValueError:
+        # Malformed IPv6 brackets or port
+        return None
+    if not host:
+        return None
+
+    host, is_idn = _ascii_host(host.rstrip("."))
+    try:
+        ipaddress.ip_address(host)
+        is_ip = True
+    except ValueError:
+        is_ip = False
+
+    netloc = f"[{host}]" if ":" in host else host
+    if port is not None:
+        netloc = f"{netloc}:{port}"
+    canonical = urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", parts.query, ""))
+    return CanonicalURL(canonical, host, is_ip, is_idn)
+
+
+class DomainSuffixTrie:
+    """
+    Trie over reversed host labels ("com" -> "google" -> "mail"); a host matches
+    the value of the longest listed domain it equals or is a subdomain of
+    """
+
+    _VALUE = ""     # Child key holding a node's value (labels are never empty)
+
+    def __init__(self, domains: Optional[Dict[str, Any]] = None):
+        self._root: Dict[str, Any] = {}
+        self._size = 0
+        for domain, value in (domains or {}).items():
+            self.add(domain, value)
+
+    def add(self, domain: str, value: Any) -> None:
+        node = self._root
+        for label in reversed(domain.lower().strip(".").split(".")):
+            node = node.setdefault(label, {})
+        if self._VALUE not in node:
+            self._size += 1
+        node[self._VALUE] = value
+
+    def match(self, host: str) -> Optional[Any]:
+        node, value = self._root, None
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            value = node.get(self._VALUE, value)
+        return value
+
+    def __len__(self) -> int:
+        return self._size
+
+
+def _domain_entries(lines: Iterable[str]) -> List[str]:
+    """Hosts of a list file's entries: domains, '*.' wildcards or whole (defanged) URLs"""
+    hosts = []
+    for line in lines:
+        entry = line.split("#", 1)[0].strip()
+        if entry.startswith("*."):
+            entry = entry[2:]
+        if not entry:
+            continue
+        parsed = canonicalize(entry)
+        if parsed is None:
+            logger.warning(f"Ignoring unparseable URL list entry: {entry!r}")
+            continue
+        hosts.append(parsed.host)
+    return hosts
+
+
+def _read_domain_file(path: str) -> List[str]:
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            return _domain_entries(f)
+    except OSError as e:
+        logger.warning(f"Could not read URL list {path}: {e}")
+        return []
+
+
+class URLAnalyzer:
+    """
+    Canonicalizes links and looks their hosts up in the allow/block and
+    shortener suffix tries, with an LRU cache of verdicts keyed by the raw link.
+    A host on both lists resolves to the longer (more specific) entry, and to
+    the blocklist on a tie.
+    """
+
+    def __init__(
+        self,
+        allowlist_path: str = URL_REPUTATION_CONFIG["allowlist_path"],
+        blocklist_path: str = URL_REPUTATION_CONFIG["blocklist_path"],
+        cache_size: int = URL_REPUTATION_CONFIG["cache_size"]
+    ):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Optional[URLVerdict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._shorteners = DomainSuffixTrie(dict.fromkeys(SHORTENER_DOMAINS, True))
+
+        self.hits = 0
+        self.misses = 0
+        self.load(allowlist_path, blocklist_path)
+
+    def load(self, allowlist_path: str = "", blocklist_path: str = "") -> None:
+        """(Re)build the reputation trie from the built-in list and the given files"""
+        reputation = DomainSuffixTrie(dict.fromkeys(DEFAULT_ALLOWLIST, ALLOW))
+        for host in _read_domain_file(allowlist_path):
+            reputation.add(host, ALLOW)
+        # Added last so a domain on both lists is blocked
+        blocked = _read_domain_file(blocklist_path)
+        for host in blocked:
+            reputation.add(host, BLOCK)
+
+        with self._lock:
+            self._reputation = reputation
+            self._cache.clear()
+        logger.info(f"URL reputation loaded: {len(reputation)} domains ({len(blocked)} blocked)")
+
+    def analyze(self, url: str) -> Optional[URLVerdict]:
+        """Verdict for a link as extracted; None when it has no parseable host"""
+        with self._lock:
+            if url in self._cache:
+                self._cache.move_to_end(url)
+                self.hits += 1
+                return self._cache[url]
+            self.misses += 1
+            reputation = self._reputation
+
+        canonical = canonicalize(url)
+        verdict = None
+        if canonical is not None:
+            verdict = URLVerdict(
+                canonical,
+                None if canonical.is_ip else reputation.match(canonical.host),
+                bool(self._shorteners.match(canonical.host)),
+            )
+
+        with self._lock:
+            if reputation is self._reputation and self.cache_size > 0:
+                self._cache[url] = verdict
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return verdict
+
+    def is_legitimate(self, url: str) -> bool:
+        """Link points at an allowlisted domain"""
+        verdict = self.analyze(url)
+        return verdict is not None and verdict.allowed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for the stats endpoint"""
+        lookups = self.hits + self.misses
+        return {
+            "domains": len(self._reputation),
+            "cacheSize": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global instance (built on first use: reading the list files is not import-time work)
+url_analyzer = LazySingleton(URLAnalyzer)